@@ -1,15 +1,17 @@
 # app.py – slim orchestrator: registers blueprints; keeps engine/status/catalog intact
-from flask import Flask, render_template, request, jsonify, g, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, g, send_from_directory
 from pathlib import Path
 from datetime import datetime, timezone
-from time import time as now_time
-import threading, json, logging, uuid, os
-import pandas as pd
+from time import monotonic, time as now_time
+import json, logging, uuid, os
 
 from config import Settings
-from services.calendar_service import set_engine_ready
-from utils.notebook_runner import run_notebook as nb_run
-from utils.notebook_status import update_status, get_status, Heartbeat
+from services.catalog_service import get_catalog_index
+from services.run_service import (
+    IGNITION_NB, SCHEDULE_NB, notebook_for_mode, submit_batch_run, submit_notebook_run, week_range
+)
+from utils.notebook_status import get_status, start_status_store
+from utils.ui_state import start_ui_state_store, write_state
 
 # --- Environment defaults (before Settings is loaded is fine)
 os.environ.setdefault("ENABLE_OUTLOOK", "1")
@@ -38,6 +40,11 @@ IRON_DATA_PATH.mkdir(parents=True, exist_ok=True)
 Path("notebooks").mkdir(parents=True, exist_ok=True)
 LOCKED_PATH.mkdir(parents=True, exist_ok=True)
 
+# Run status lives in memory here; status.json is the write-behind copy notebooks also write to
+STATUS_STORE = start_status_store()
+# UI state files (filters, locks, selection) are written behind, coalesced per file
+UI_STATE_STORE = start_ui_state_store()
+
 # Expose path for other blueprints
 app.config["IRON_DATA"] = str(IRON_DATA_PATH)
 
@@ -96,9 +103,7 @@ def cockpit():
     return render_template("cockpit_ui.html", app_version=int(now_time()), env_warning=warning)
 
 # --------------------------- Status --------------------------------
-@app.route("/status")
-def status():
-    data = get_status() or {}
+def _status_payload(data: dict) -> dict:
     raw_progress = data.get("progress", 0)
     try:
         progress = int(float(raw_progress)) if isinstance(raw_progress, (int, float, str)) else 0
@@ -114,7 +119,7 @@ def status():
             duration_sec = (isoparse(updated_at) - isoparse(started_at)).total_seconds()
     except Exception:
         duration_sec = None
-    payload = {
+    return {
         "notebook": data.get("notebook", ""),
         "state": (data.get("state") or data.get("status") or "idle"),
         "progress": progress,
@@ -122,205 +127,124 @@ def status():
         "updated_at": data.get("updated_at") or datetime.now(timezone.utc).isoformat(),
         "done": bool(data.get("done") or (data.get("state") in {"ok", "completed", "error"})),
         "duration_sec": duration_sec,
+        "eta_sec": data.get("eta_sec"),
+        "job_id": data.get("job_id"),
     }
-    resp = jsonify(payload)
+
+@app.route("/status")
+def status():
+    resp = jsonify(_status_payload(get_status() or {}))
     resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
     resp.headers["Pragma"] = "no-cache"
     return resp
 
+def _job_payload(job_id: str) -> dict:
+    from utils.job_manager import get_job_manager
+    return get_job_manager().get(job_id) or {"job_id": job_id, "state": "unknown", "done": True, "error": "unknown job"}
+
+@app.get("/status/stream")
+def status_stream():
+    """Server-Sent Events: one `status` event per change, comments as keepalive.
+    ?job_id= follows one run (its job dict, with its own progress/ETA) and ends when it is done.
+    Any stream is closed after Settings.STATUS_STREAM_MAX_SEC; the client reconnects (`retry:`).
+
+    Each open stream holds a server thread while it waits, so this needs a threaded server
+    (app.run(threaded=True) below, or a threaded/async WSGI server in production)."""
+    store = STATUS_STORE
+    job_id = request.args.get("job_id")
+    payload = (lambda data: _job_payload(job_id)) if job_id else _status_payload
+    deadline = monotonic() + Settings.STATUS_STREAM_MAX_SEC
+
+    def events():
+        version, data = store.snapshot()
+        out = payload(data)
+        yield "retry: 3000\n"
+        yield f"event: status\ndata: {json.dumps(out, ensure_ascii=False)}\n\n"
+        while not store.closed and not (job_id and out.get("done")):
+            left = deadline - monotonic()
+            if left <= 0:
+                return  # bounded lifetime: frees this thread; EventSource reconnects after `retry`
+            new_version, data = store.wait(version, timeout=min(15, left))
+            if new_version == version:
+                yield ": keepalive\n\n"
+                continue
+            version = new_version
+            out = payload(data)
+            yield f"event: status\ndata: {json.dumps(out, ensure_ascii=False)}\n\n"
+
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+    })
+
 # ---------------------- Selected wine (transient) -------------------
 @app.post("/api/selected_wine")
 def set_selected_wine():
     try:
         payload = request.get_json(force=True) or {}
-        SELECTED_WINE_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        write_state(SELECTED_WINE_PATH, payload)
         return jsonify({"ok": True})
     except Exception as e:
         app.logger.exception("selected_wine failed")
         return jsonify({"ok": False, "error": str(e)}), 500
 
 # ------------------------ Run full engine ---------------------------
-RUNTIME = {"inflight": False}
-RUNTIME_LOCK = threading.Lock()
-
-def _start_run() -> bool:
-    with RUNTIME_LOCK:
-        if RUNTIME["inflight"]:
-            return False
-        RUNTIME["inflight"] = True
-        return True
-
-def _end_run():
-    with RUNTIME_LOCK:
-        RUNTIME["inflight"] = False
-
+# Runs go through the job manager: ignition is exclusive, schedule/offer runs for
+# different weeks execute side by side (see services/run_service.conflict_keys).
 @app.post("/run_full_engine")
 def run_full_engine():
-    if not _start_run():
-        return jsonify({"error": "A run is already in progress."}), 409
-
-    notebook = "AVU_ignition_1.ipynb"
-    input_path = Path("notebooks") / notebook
-    output_path = Path("notebooks") / f"executed_{notebook}"
-
-    hb = Heartbeat(interval=5, notebook=notebook, base_message="🔥 Ignition running…")
-
-    def run_thread():
-        hb.start()
-        update_status({
-            "notebook": notebook, "state": "running", "done": False,
-            "progress": 0, "message": "🚀 Starting full AVU engine…"
-        })
-        try:
-            nb_run(str(input_path), str(output_path), {
-                "input_path": str(SOURCE_PATH),
-                "output_path": str(IRON_DATA_PATH),
-                "week_number": datetime.now().isocalendar().week,
-            })
-            update_status({"progress": 95, "message": "Writing schedule…"})
-        except Exception as e:
-            update_status({
-                "notebook": notebook, "state": "error", "done": True,
-                "progress": 0, "message": f"❌ Error: {e}"
-            })
-        else:
-            set_engine_ready(IRON_DATA_PATH)
-            update_status({
-                "notebook": notebook, "state": "completed", "done": True,
-                "progress": 100, "message": "✅ AVU engine finished."
-            })
-        finally:
-            hb.stop()
-            _end_run()
-
-    threading.Thread(target=run_thread, daemon=True).start()
-    return jsonify({"message": "✅ Full AVU Engine started.", "rid": g.request_id}), 200
+    job = submit_notebook_run(IGNITION_NB, week=datetime.now().isocalendar().week,
+                              base_message="🔥 Ignition running…", done_message="✅ AVU engine finished.")
+    return jsonify({"message": "✅ Full AVU Engine started.", "rid": g.request_id,
+                    "job_id": job["job_id"], "state": job["state"]}), 200
 
 # ---------------------- Run schedule/offer notebook -----------------
 @app.post("/run_notebook")
 def run_notebook_route():
-    if not _start_run():
-        return jsonify({"error": "A run is already in progress."}), 409
     try:
         data = request.get_json(force=True, silent=False) or {}
     except Exception as e:
-        _end_run()
         return jsonify({"error": f"Invalid JSON: {e}"}), 400
 
     run_mode = data.get("mode", "full")  # 'partial' (schedule), 'offer', or 'full'
-    requested_nb = (data.get("notebook") or "").strip()
-    week_number = data.get("week_number") or datetime.now().isocalendar().week
-    ui_sel = data.get("ui_selection")
-    selected_wine = data.get("selected_wine")
-    locked_calendar = data.get("locked_calendar") or {}
-    filters = data.get("filters") or {}
-
-    # Persist transient UI state (used by notebooks)
+    notebook = notebook_for_mode(run_mode, data.get("notebook"))
+    if data.get("week_range") and notebook == SCHEDULE_NB:
+        # batch: every week of the range in one job (shared data loaded once)
+        try:
+            weeks = week_range(data["week_range"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        job = submit_batch_run(weeks, year=data.get("year"), filters=data.get("filters") or {},
+                               locked_calendar=data.get("locked_calendar") or {},
+                               current_week=data.get("week_number"))
+        return jsonify({"ok": True, "notebook": notebook, "rid": g.request_id, "weeks": weeks,
+                        "job_id": job["job_id"], "state": job["state"]})
     try:
-        FILTERS_PATH.write_text(json.dumps(filters, indent=2), encoding="utf-8")
-        TRANSIENT_LOCKED_SNAPSHOT.write_text(json.dumps(locked_calendar, indent=2), encoding="utf-8")
-        if ui_sel is not None:
-            UI_SELECTION_PATH.write_text(json.dumps(ui_sel, indent=2), encoding="utf-8")
-        if selected_wine is not None:
-            SELECTED_WINE_PATH.write_text(json.dumps(selected_wine, indent=2), encoding="utf-8")
+        job = submit_notebook_run(
+            notebook,
+            week=data.get("week_number") or datetime.now().isocalendar().week,
+            year=data.get("year"),
+            filters=data.get("filters") or {},
+            locked_calendar=data.get("locked_calendar") or {},
+            ui_selection=data.get("ui_selection"),
+            selected_wine=data.get("selected_wine"),
+            offer_batch=bool(data.get("offer_batch")),
+        )
     except Exception as e:
-        _end_run()
-        return jsonify({"error": f"Failed to write transient UI state: {e}"}), 500
-
-    if requested_nb:
-        notebook = requested_nb
-    elif run_mode == "partial":
-        notebook = "AVU_schedule_only.ipynb"
-    elif run_mode == "offer":
-        notebook = "AUTONOMOUS_AVU_OMT_3.ipynb"
-    else:
-        notebook = "AVU_ignition_1.ipynb"
-
-    input_path = Path("notebooks") / notebook
-    output_path = Path("notebooks") / f"executed_{notebook}"
-    hb = Heartbeat(interval=5, notebook=notebook, base_message="⏳ Processing…")
-
-    def run_with_status():
-        hb.start()
-        update_status({
-            "notebook": notebook, "state": "running", "done": False,
-            "progress": 0, "message": f"Notebook started for Week {week_number}…"
-        })
-        try:
-            nb_run(str(input_path), str(output_path), {
-                "input_path": str(SOURCE_PATH),
-                "output_path": str(IRON_DATA_PATH),
-                "week_number": int(week_number),
-            })
-            update_status({"progress": 95, "message": "Writing schedule…"})
-        except Exception as e:
-            update_status({
-                "notebook": notebook, "state": "error", "done": True,
-                "progress": 0, "message": f"❌ Error: {e}"
-            })
-        else:
-            update_status({
-                "notebook": notebook, "state": "completed", "done": True,
-                "progress": 100, "message": f"✅ Notebook executed for Week {week_number}."
-            })
-        finally:
-            hb.stop()
-            _end_run()
-
-    threading.Thread(target=run_with_status, daemon=True).start()
-    return jsonify({"ok": True, "notebook": notebook, "rid": g.request_id})
+        app.logger.exception("run_notebook submit failed")
+        return jsonify({"error": f"Failed to queue notebook: {e}"}), 500
+    return jsonify({"ok": True, "notebook": notebook, "rid": g.request_id,
+                    "job_id": job["job_id"], "state": job["state"]})
 
 # --------------------------- Catalog API ----------------------------
-_CATALOG_CACHE = {"df": None, "src": None, "mtime": None}
-
 @app.get("/api/catalog")
 def catalog_search():
     try:
-        q = (request.args.get("q") or "").strip().lower()
+        q = (request.args.get("q") or "").strip()
         limit = min(max(int(request.args.get("limit", 15)), 1), 50)
-
-        candidates = [
-            IRON_DATA_PATH / "stock_df_final.pkl",
-            IRON_DATA_PATH / "stock_df_with_seasonality.pkl",
-        ]
-        src = next((p for p in candidates if p.exists()), None)
-        if src is None:
+        index = get_catalog_index(IRON_DATA_PATH)
+        if index is None:
             return jsonify({"items": []})
-
-        mtime = src.stat().st_mtime
-        if (_CATALOG_CACHE["df"] is None
-            or _CATALOG_CACHE["src"] != str(src)
-            or _CATALOG_CACHE["mtime"] != mtime):
-            df = pd.read_pickle(src)
-            df = df.rename(columns={"Stock": "stock"})
-            for c in ("id", "wine", "vintage", "region_group", "full_type", "stock"):
-                if c not in df.columns:
-                    df[c] = "" if c != "stock" else 0
-            df["id"] = df["id"].astype(str).str.replace(r"\.0$", "", regex=True)
-            df["wine_lc"] = df["wine"].astype(str).str.strip().str.lower()
-            _CATALOG_CACHE.update(df=df, src=str(src), mtime=mtime)
-
-        df = _CATALOG_CACHE["df"]
-        sub = df if not q else df[df["wine_lc"].str.contains(q, na=False)]
-
-        grp = sub.groupby("wine", dropna=False).agg({
-            "vintage": lambda s: sorted(set(str(x).strip() for x in s.dropna())),
-            "id": lambda s: {str(v): str(i) for v, i in zip(sub.loc[s.index, "vintage"], s)},
-            "region_group": "first",
-            "full_type": "first",
-        }).reset_index()
-
-        items = []
-        for _, r in grp.head(limit).iterrows():
-            vintages = [v if str(v).upper() == "NV" else v for v in r["vintage"]]
-            items.append({
-                "wine": r["wine"],
-                "vintages": vintages,
-                "ids_by_vintage": r["id"],
-                "region_group": (r["region_group"] or "Unknown"),
-                "full_type": (r["full_type"] or "Unknown"),
-            })
-        return jsonify({"items": items})
+        return jsonify({"items": index.search(q, limit)})
     except Exception as e:
         return jsonify({"error": str(e), "items": []}), 200
 
@@ -357,4 +281,5 @@ def routes_json():
 
 if __name__ == "__main__":
     _print_route_map(app)
-    app.run(host="0.0.0.0", port=5000, debug=False)
+    # threaded: every open /status/stream holds a thread (see status_stream)
+    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
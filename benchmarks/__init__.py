@@ -0,0 +1 @@
+# benchmarks/ — synthetic AVU datasets (datagen) and timed runs of the engine hot paths (run, compare)
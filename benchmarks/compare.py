@@ -0,0 +1,60 @@
+# benchmarks/compare.py — two results files side by side: time and peak-memory ratios per case
+#
+#   python -m benchmarks.compare OLD.json NEW.json [--threshold 0.15] [--fail]
+from __future__ import annotations
+from pathlib import Path
+import argparse, json, sys
+
+def load(path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+def compare(old: dict, new: dict, threshold: float = 0.15) -> list[dict]:
+    """One row per case in either file; `regressed` when the best time (less noisy than the median)
+    or peak memory grew by more than `threshold` (0.15 = 15%)."""
+    rows = []
+    a, b = old.get("cases", {}), new.get("cases", {})
+    for name in list(a) + [n for n in b if n not in a]:
+        o, n = a.get(name) or {}, b.get(name) or {}
+        row = {"case": name, "old_ms": None, "new_ms": None, "time_ratio": None,
+               "old_mb": o.get("peak_mb"), "new_mb": n.get("peak_mb"), "mem_ratio": None, "regressed": False,
+               "note": n.get("error") or o.get("error") or ("" if o and n else ("only in new" if n else "only in old"))}
+        if "sec_min" in o:
+            row["old_ms"] = o["sec_min"] * 1000
+        if "sec_min" in n:
+            row["new_ms"] = n["sec_min"] * 1000
+        if row["old_ms"] and row["new_ms"] is not None:
+            row["time_ratio"] = row["new_ms"] / row["old_ms"]
+        if row["old_mb"] and row["new_mb"] is not None:
+            row["mem_ratio"] = row["new_mb"] / row["old_mb"]
+        row["regressed"] = any(r is not None and r > 1 + threshold for r in (row["time_ratio"], row["mem_ratio"]))
+        rows.append(row)
+    return rows
+
+def _fmt(v, spec):
+    return format(v, spec) if v is not None else format("-", ">" + spec.split(".")[0])
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare two benchmarks/run.py results files.")
+    ap.add_argument("old")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=0.15, help="relative growth that counts as a regression")
+    ap.add_argument("--fail", action="store_true", help="exit 1 when a case regressed")
+    a = ap.parse_args(argv)
+    old, new = load(a.old), load(a.new)
+    for label, r in (("old", old), ("new", new)):
+        m = r.get("meta", {})
+        print(f"{label}: {m.get('commit')}{'+dirty' if m.get('dirty') else ''}  {m.get('created_at')}  {m.get('dataset')}")
+    if old.get("meta", {}).get("dataset") != new.get("meta", {}).get("dataset"):
+        print("⚠️ different datasets: ratios compare unlike inputs")
+    rows = compare(old, new, a.threshold)
+    print(f"\n{'case':20} {'old ms':>10} {'new ms':>10} {'×time':>7} {'old MB':>8} {'new MB':>8} {'×mem':>6}")
+    for r in rows:
+        print(f"{r['case']:20} {_fmt(r['old_ms'], '10.2f')} {_fmt(r['new_ms'], '10.2f')} {_fmt(r['time_ratio'], '7.2f')} "
+              f"{_fmt(r['old_mb'], '8.1f')} {_fmt(r['new_mb'], '8.1f')} {_fmt(r['mem_ratio'], '6.2f')}"
+              f"{'  ← REGRESSED' if r['regressed'] else ''}{'  ' + r['note'] if r['note'] else ''}")
+    regressed = [r["case"] for r in rows if r["regressed"]]
+    print(f"\n{len(regressed)} regression(s) over {a.threshold:.0%}" + (f": {', '.join(regressed)}" if regressed else ""))
+    return 1 if (a.fail and regressed) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# benchmarks/datagen.py — synthetic stock / client prefs / campaign history / filters / locks in the
+# shapes the engines read, at any scale and reproducible from a seed
+#
+#   python -m benchmarks.datagen --scale m --out /tmp/avu_bench_m
+from __future__ import annotations
+from datetime import date, timedelta
+from itertools import combinations
+from pathlib import Path
+import argparse, json
+
+import numpy as np
+import pandas as pd
+
+# name -> (wines, clients)
+SCALES = {
+    "xs": (1_000, 10_000),
+    "s": (10_000, 100_000),
+    "m": (100_000, 100_000),
+    "l": (100_000, 1_000_000),
+}
+REF_DATE = date(2025, 3, 17)  # Monday of 2025-W12: dates are relative to it, so a seed always gives the same files
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+NUM_SLOTS = 5
+
+# (type, color, full_type) with a realistic skew towards reds
+TYPES = [("Still", "Red", "Red"), ("Still", "White", "White"), ("Sparkling", "White", "Sparkling White"),
+         ("Still", "Rosé", "Rosé"), ("Sweet", "White", "Sweet White"), ("Fortified", "Red", "Fortified Red")]
+TYPE_P = [0.5, 0.25, 0.1, 0.07, 0.05, 0.03]
+REGIONS = {
+    "Bordeaux": ["Pauillac", "Margaux", "Saint-Émilion", "Pomerol", "Pessac-Léognan"],
+    "Burgundy": ["Côte de Nuits", "Côte de Beaune", "Chablis"],
+    "Rhône": ["Hermitage", "Côte-Rôtie", "Châteauneuf-du-Pape"],
+    "Italy": ["Barolo", "Barbaresco", "Brunello di Montalcino", "Bolgheri"],
+    "Spain": ["Rioja", "Ribera del Duero", "Priorat"],
+    "Champagne": ["Reims", "Épernay"],
+    "USA": ["Napa Valley", "Sonoma"],
+    "Switzerland": ["Valais", "Vaud"],
+}
+GRAPES = ["cabernet sauvignon", "merlot", "pinot noir", "chardonnay", "syrah", "grenache", "nebbiolo",
+          "sangiovese", "tempranillo", "sauvignon blanc", "riesling", "chenin blanc", "petit verdot"]
+TIERS = ["Budget", "Mid-range", "Premium", "Luxury", "Ultra Luxury"]
+TIER_P = [0.25, 0.3, 0.25, 0.15, 0.05]
+TIER_PRICE = {"Budget": (8, 25), "Mid-range": (25, 50), "Premium": (50, 120), "Luxury": (120, 400),
+              "Ultra Luxury": (400, 3000)}
+OCCASIONS = ["Casual", "Dinner", "Party", "Gifting", "Celebration"]
+SEASONS = ["Winter", "Spring", "Summer", "Autumn"]
+LOYALTY = ["bronze", "silver", "gold", "vip"]
+LOYALTY_P = [0.6, 0.25, 0.12, 0.03]
+SIZES = [375, 750, 750, 750, 750, 1500, 3000]
+GRAPE_SETS = [c for k in (1, 2, 3) for c in combinations(GRAPES, k)]
+SEASON_SETS = [c for k in (1, 2) for c in combinations(SEASONS, k)]
+WORDS = ["Château", "Domaine", "Clos", "Tenuta", "Bodega", "Cuvée", "Réserve", "Grand", "Vieilles", "Vignes",
+         "Saint", "Mont", "Roche", "Lune", "Pierre", "Cru", "Rouge", "Blanc", "Estate", "Heritage"]
+
+def make_stock(n: int, seed: int = 0, today: date | None = None) -> pd.DataFrame:
+    """stock_df_final.pkl-like frame: one row per (wine, vintage, size)."""
+    rng = np.random.default_rng(seed)
+    today = today or REF_DATE
+    t = rng.choice(len(TYPES), n, p=TYPE_P)
+    groups = list(REGIONS)
+    g = rng.integers(0, len(groups), n)
+    sub = rng.random(n)
+    region = [REGIONS[groups[k]][int(u * len(REGIONS[groups[k]]))] for k, u in zip(g, sub)]
+    n_names = max(1, n // 3)  # ~3 vintages/sizes per wine name
+    w = rng.integers(0, len(WORDS), (n_names, 3))
+    names = np.array([f"{WORDS[a]} {WORDS[b]} {WORDS[c]} {i}" for i, (a, b, c) in enumerate(w)], dtype=object)
+    tier = rng.choice(TIERS, n, p=TIER_P)
+    lo = np.array([TIER_PRICE[x][0] for x in tier]); hi = np.array([TIER_PRICE[x][1] for x in tier])
+    grapes = ["/".join(GRAPE_SETS[k]) for k in rng.integers(0, len(GRAPE_SETS), n)]
+    last_offer = [today - timedelta(days=int(d)) for d in rng.integers(1, 900, n)]
+    df = pd.DataFrame({
+        "id": (100000 + np.arange(n)).astype(str),
+        "wine": names[rng.integers(0, n_names, n)],
+        "vintage": rng.integers(1985, today.year, n).astype(str),
+        "type": [TYPES[k][0] for k in t], "color": [TYPES[k][1] for k in t], "full_type": [TYPES[k][2] for k in t],
+        "region": region, "region_group": [groups[k] for k in g], "origin": [groups[k] for k in g],
+        "grape_list": grapes,
+        "sweetness": rng.integers(1, 6, n).astype(float), "body": rng.integers(1, 6, n).astype(float),
+        "avg_score": np.round(rng.normal(91, 3, n).clip(80, 100), 1),
+        "price_tier": tier, "CHF Price": np.round(rng.uniform(lo, hi), 2),
+        "stock": rng.integers(0, 120, n), "bottle_size_ml": rng.choice(SIZES, n),
+        "occasion": rng.choice(OCCASIONS, n),
+        "OMT last offer date": pd.to_datetime(last_offer),
+        "seasonality_boost": [list(SEASON_SETS[k]) for k in rng.integers(0, len(SEASON_SETS), n)],
+    })
+    df.loc[rng.random(n) < 0.02, "avg_score"] = np.nan
+    return df
+
+def make_clients(n: int, seed: int = 0) -> pd.DataFrame:
+    """client_pref_df_latest.pkl-like frame (the columns CPI and segment scoring read)."""
+    rng = np.random.default_rng(seed + 1)
+    t = rng.choice(len(TYPES), n, p=TYPE_P)
+    groups = list(REGIONS)
+    g = rng.integers(0, len(groups), n)
+    return pd.DataFrame({
+        "customer_no": (500000 + np.arange(n)).astype(str),
+        "client_name": [f"Client {i}" for i in range(n)],
+        "inferred_grape_preferences": [",".join(GRAPE_SETS[k]) for k in rng.integers(0, len(GRAPE_SETS), n)],
+        "inferred_type": [TYPES[k][0].lower() for k in t],
+        "inferred_region": [REGIONS[groups[k]][0] for k in g],
+        "inferred_sweetness": rng.integers(1, 6, n).astype(float),
+        "inferred_body": rng.integers(1, 6, n).astype(float),
+        "inferred_budget": rng.choice(TIERS, n, p=TIER_P),
+        "avg_critic_score": np.round(rng.normal(92, 2, n), 1),
+        "loyalty_level": rng.choice(LOYALTY, n, p=LOYALTY_P),
+        "prefers_high_scores": rng.random(n) < 0.3,
+        "region_group": [groups[k] for k in g], "full_type": [TYPES[k][2] for k in t],
+        "occasion": rng.choice(OCCASIONS, n),
+    })
+
+def make_history(stock: pd.DataFrame, rows: int, seed: int = 0, today: date | None = None) -> pd.DataFrame:
+    """campaign_history.csv: past sends (id, name, vintage, date), several per wine."""
+    rng = np.random.default_rng(seed + 2)
+    today = today or REF_DATE
+    pick = rng.integers(0, len(stock), rows)
+    days = rng.integers(1, 1500, rows)
+    return pd.DataFrame({
+        "id": stock["id"].to_numpy()[pick], "wine": stock["wine"].to_numpy()[pick],
+        "vintage": stock["vintage"].to_numpy()[pick],
+        "last_campaign_date": [(today - timedelta(days=int(d))).isoformat() for d in days],
+    }).sort_values("last_campaign_date", kind="stable")
+
+def make_filters(seed: int = 0) -> dict:
+    """A filters.json with every hard filter switched on (the slowest realistic case)."""
+    rng = np.random.default_rng(seed + 3)
+    return {"price_tiers": list(rng.choice(TIERS, 2, replace=False)), "price_tier_bucket": "",
+            "wine_type": "red", "bottle_size": 750, "last_stock": True, "last_stock_threshold": 40,
+            "seasonality_boost": False, "style": "default", "loyalty": "all", "calendar_day": ""}
+
+def make_locked_calendar(stock: pd.DataFrame, seed: int = 0, per_day: int = 2) -> dict:
+    """{day: [item]} with `per_day` locked slots per day, as the UI saves them."""
+    rng = np.random.default_rng(seed + 4)
+    rows = stock.iloc[rng.choice(len(stock), len(DAYS) * per_day, replace=False)]
+    it = iter(rows.to_dict("records"))
+    cal = {}
+    for d in DAYS:
+        cal[d] = []
+        for s in range(per_day):
+            r = next(it)
+            cal[d].append({"id": r["id"], "wine": r["wine"], "vintage": r["vintage"], "full_type": r["full_type"],
+                           "region_group": r["region_group"], "stock": int(r["stock"]), "price_tier": r["price_tier"],
+                           "slot": s, "locked": True})
+    return cal
+
+def make_schedule(stock: pd.DataFrame, seed: int = 0) -> dict:
+    """A filled week in the .ui.json shape ({weekly_calendar: {day: [item] * NUM_SLOTS}})."""
+    rng = np.random.default_rng(seed + 5)
+    rows = stock.iloc[rng.choice(len(stock), len(DAYS) * NUM_SLOTS, replace=False)].to_dict("records")
+    cal = {d: [{"id": r["id"], "wine": r["wine"], "name": r["wine"], "vintage": r["vintage"],
+                "full_type": r["full_type"], "type": r["full_type"], "region_group": r["region_group"],
+                "region": r["region"], "stock": int(r["stock"]), "price_tier": r["price_tier"],
+                "price": float(r["CHF Price"]), "match_quality": "Auto", "locked": False}
+               for r in rows[i * NUM_SLOTS:(i + 1) * NUM_SLOTS]] for i, d in enumerate(DAYS)}
+    return {"weekly_calendar": cal}
+
+def write_dataset(out_dir, wines: int, clients: int, seed: int = 0, history_rows: int | None = None,
+                  year: int = 2025, week: int = 12) -> dict:
+    """Everything above under `out_dir`, laid out like IRON_DATA; returns {name: path}."""
+    out = Path(out_dir)
+    (out / "locked_weeks").mkdir(parents=True, exist_ok=True)
+    stock = make_stock(wines, seed)
+    client = make_clients(clients, seed)
+    paths = {"stock": out / "stock_df_final.pkl", "clients": out / "client_pref_df_latest.pkl",
+             "history": out / "campaign_history.csv", "filters": out / "filters.json",
+             "locked": out / "locked_weeks" / f"locked_calendar_{year}_week_{week}.json",
+             "schedule": out / f"weekly_campaign_schedule_{year}_week_{week}.ui.json",
+             "schedule_legacy": out / f"weekly_campaign_schedule_week_{week}.json"}
+    stock.to_pickle(paths["stock"])
+    client.to_pickle(paths["clients"])
+    make_history(stock, history_rows or wines * 5, seed).to_csv(paths["history"], index=False)
+    paths["filters"].write_text(json.dumps(make_filters(seed), indent=2), encoding="utf-8")
+    paths["locked"].write_text(json.dumps(make_locked_calendar(stock, seed), indent=2), encoding="utf-8")
+    schedule = make_schedule(stock, seed)
+    paths["schedule"].write_text(json.dumps(schedule, indent=2), encoding="utf-8")
+    paths["schedule_legacy"].write_text(json.dumps(schedule["weekly_calendar"], indent=4), encoding="utf-8")
+    manifest = {"wines": wines, "clients": clients, "seed": seed, "year": year, "week": week,
+                "files": {k: str(v) for k, v in paths.items()}}
+    (out / "dataset.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return paths
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write a synthetic IRON_DATA-like dataset.")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="xs")
+    ap.add_argument("--wines", type=int, help="overrides the scale's wine count")
+    ap.add_argument("--clients", type=int, help="overrides the scale's client count")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", required=True)
+    a = ap.parse_args(argv)
+    wines, clients = SCALES[a.scale]
+    paths = write_dataset(a.out, a.wines or wines, a.clients or clients, a.seed)
+    for k, p in paths.items():
+        print(f"{k:9} {p}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/run.py — time and peak memory of the engine hot paths on a synthetic dataset
+#
+#   python -m benchmarks.run --scale xs                    # generates the data under .bench_data/ if missing
+#   python -m benchmarks.run --data /tmp/avu_bench_m --only cpi,ui_filters
+#   python -m benchmarks.compare benchmarks/results/xs_<old>.json benchmarks/results/xs_<new>.json
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+import argparse, gc, json, os, platform, statistics, subprocess, sys, time, tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import datagen
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DATA_ROOT = Path(".bench_data")
+CPI_CLIENTS = 2000  # the CPI matrix is clients × wines floats: larger client sets are sliced to this
+SEARCHES = ("ch", "dom", "clos", "rouge", "grand cru", "vieilles vignes", "xyz", "saint 12")
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+class Context:
+    """The dataset loaded once; cases only time their own work."""
+    def __init__(self, data_dir: Path):
+        self.dir = data_dir
+        self.info = json.loads((data_dir / "dataset.json").read_text(encoding="utf-8"))
+        self.year, self.week = self.info["year"], self.info["week"]
+        self.stock = pd.read_pickle(data_dir / "stock_df_final.pkl")
+        self.clients = pd.read_pickle(data_dir / "client_pref_df_latest.pkl")
+        self.filters = json.loads((data_dir / "filters.json").read_text(encoding="utf-8"))
+
+# -- cases: setup(ctx) → (run, params); only run() is timed ----------------------------------------
+def _cpi(ctx):
+    from utils.cpi_engine import compute_cpi_matrix
+    clients = ctx.clients.iloc[:CPI_CLIENTS]
+    return lambda: compute_cpi_matrix(clients, ctx.stock), {"clients": len(clients)}
+
+def _segment_scores(ctx):
+    from utils.segment_scoring import segment_scores
+    return lambda: segment_scores(ctx.stock, ctx.clients, normalize=True), {}
+
+def _ui_filters(ctx):
+    from utils.ui_filters import apply_ui_filters, week_to_season
+    season, now = week_to_season(ctx.week), datetime.combine(datagen.REF_DATE, datetime.min.time())
+    return lambda: apply_ui_filters(ctx.stock, ctx.filters, season, log=lambda *_: None, now=now), {}
+
+def _prepare_pool(ctx):
+    from services.batch_service import normalize_filters, prepare_pool
+    f = normalize_filters(ctx.filters)
+    return lambda: prepare_pool(ctx.stock, ctx.clients, f), {}
+
+def _seasonal_selection(ctx):
+    # ignition's get_seasonal_wines_modular over the whole in-stock pool (first level that finds wines)
+    from services.batch_service import DAY_OCCASION, DAY_TIERS, normalize_filters, prepare_pool
+    from utils.week_scheduler import IGNITION_STEPS, WeekScheduler
+    pool = prepare_pool(ctx.stock, ctx.clients, normalize_filters({}))
+    days = list(DAY_TIERS)
+    def run():
+        return WeekScheduler(pool, DAY_TIERS, DAY_OCCASION).plan(
+            days, {d: datagen.NUM_SLOTS for d in days}, steps=IGNITION_STEPS, top_up=False)
+    return run, {"pool": len(pool)}
+
+def _week_plan(ctx):
+    from services.batch_service import normalize_filters, plan_weeks, prepare_pool
+    shared = {"pool": prepare_pool(ctx.stock, ctx.clients, normalize_filters({})), "history": {}, "cpi": {}}
+    weeks = list(range(ctx.week, ctx.week + 4))
+    return lambda: plan_weeks(shared, ctx.year, weeks, {}), {"weeks": len(weeks)}
+
+def _campaign_index(ctx):
+    from routes.campaign_index import _build_index
+    csv = ctx.dir / "campaign_history.csv"
+    return lambda: _build_index(csv), {"rows": sum(1 for _ in open(csv, "rb")) - 1}
+
+def _catalog_build(ctx):
+    from services.catalog_service import CatalogIndex
+    return lambda: CatalogIndex(ctx.stock), {}
+
+def _catalog_search(ctx):
+    from services.catalog_service import CatalogIndex
+    index = CatalogIndex(ctx.stock)
+    return lambda: [index.search(q, 15) for q in SEARCHES], {"queries": len(SEARCHES)}
+
+def _api_client(ctx):
+    from flask import Flask
+    from routes.calendar import IRON_DATA_PATH, calendar_bp
+    if Path(IRON_DATA_PATH).resolve() != ctx.dir.resolve():
+        raise RuntimeError(f"routes.calendar already bound to {IRON_DATA_PATH}; run one dataset per process")
+    app = Flask(__name__)
+    app.register_blueprint(calendar_bp)
+    return app.test_client()
+
+def _api_schedule_cold(ctx):
+    from services import schedule_view
+    client, url = _api_client(ctx), f"/api/schedule?week={ctx.week}"
+    def run():
+        schedule_view._CACHE.clear()
+        return client.get(url).status_code
+    return run, {}
+
+def _api_schedule_warm(ctx):
+    client, url = _api_client(ctx), f"/api/schedule?week={ctx.week}"
+    client.get(url)
+    return lambda: client.get(url).status_code, {}
+
+def _api_schedule_304(ctx):
+    client, url = _api_client(ctx), f"/api/schedule?week={ctx.week}"
+    etag = client.get(url).headers["ETag"]
+    return lambda: client.get(url, headers={"If-None-Match": etag}).status_code, {}
+
+CASES = {
+    "cpi": _cpi,
+    "segment_scores": _segment_scores,
+    "ui_filters": _ui_filters,
+    "prepare_pool": _prepare_pool,
+    "seasonal_selection": _seasonal_selection,
+    "week_plan": _week_plan,
+    "campaign_index": _campaign_index,
+    "catalog_build": _catalog_build,
+    "catalog_search": _catalog_search,
+    "api_schedule_cold": _api_schedule_cold,
+    "api_schedule_warm": _api_schedule_warm,
+    "api_schedule_304": _api_schedule_304,
+}
+
+def measure(run, repeats: int, budget: float) -> dict:
+    """Wall time of up to `repeats` calls (fewer once `budget` seconds are spent; at least one),
+    then one more call under tracemalloc for the peak of Python + numpy allocations."""
+    times = []
+    t_start = time.perf_counter()
+    while len(times) < repeats:
+        gc.collect()
+        t = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t)
+        if time.perf_counter() - t_start >= budget:
+            break
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"sec_min": round(min(times), 6), "sec_median": round(statistics.median(times), 6),
+            "repeats": len(times), "peak_mb": round(peak / 2**20, 3)}
+
+def run_suite(data_dir: Path, only=None, repeats: int = 7, budget: float = 5.0, log=print) -> dict:
+    os.environ["AVU_OUTPUT_PATH"] = str(data_dir.resolve())  # config.Settings reads it once, at first import
+    ctx = Context(data_dir)
+    results = {}
+    for name, case in CASES.items():
+        if only and name not in only:
+            continue
+        try:
+            run, params = case(ctx)
+            results[name] = dict(measure(run, repeats, budget), **params)
+        except Exception as e:  # a missing dependency or a broken path: recorded, the suite goes on
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        r = results[name]
+        log(f"{name:20} " + (f"{r['sec_median'] * 1000:10.2f} ms  (min {r['sec_min'] * 1000:.2f}, n={r['repeats']})"
+                              f"  peak {r['peak_mb']:.1f} MB" if "error" not in r else f"ERROR {r['error']}"))
+    return {
+        "meta": {
+            "commit": _git("rev-parse", "--short", "HEAD"), "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "created_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "machine": platform.machine(),
+            "platform": platform.platform(terse=True), "cpus": os.cpu_count(),
+            "dataset": {k: ctx.info[k] for k in ("wines", "clients", "seed")},
+        },
+        "cases": results,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the engine hot paths.")
+    ap.add_argument("--scale", choices=sorted(datagen.SCALES), default="xs")
+    ap.add_argument("--data", help="dataset directory (default: .bench_data/<scale>, generated if missing)")
+    ap.add_argument("--only", help="comma-separated case names: " + ", ".join(CASES))
+    ap.add_argument("--repeats", type=int, default=7, help="timed calls per case")
+    ap.add_argument("--budget", type=float, default=5.0, help="seconds after which a slow case stops repeating")
+    ap.add_argument("--out", help="results file (default: benchmarks/results/<scale>_<commit>.json)")
+    a = ap.parse_args(argv)
+
+    data_dir = Path(a.data) if a.data else DATA_ROOT / a.scale
+    if not (data_dir / "dataset.json").exists():
+        wines, clients = datagen.SCALES[a.scale]
+        print(f"generating {a.scale} dataset ({wines} wines, {clients} clients) in {data_dir} …")
+        datagen.write_dataset(data_dir, wines, clients)
+    only = set(a.only.split(",")) if a.only else None
+    res = run_suite(data_dir, only, a.repeats, a.budget)
+    res["meta"]["scale"] = a.scale if not a.data else None
+    out = Path(a.out) if a.out else RESULTS_DIR / f"{a.scale if not a.data else data_dir.name}_{res['meta']['commit'] or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(res, indent=2), encoding="utf-8")
+    print(f"results → {out}")
+    return 1 if any("error" in r for r in res["cases"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,13 @@ class Settings:
     SOURCE_PATH = AVU_SOURCE_PATH
     IRON_DATA_PATH = AVU_OUTPUT_PATH
 
+    # Notebook execution backend: "papermill" (kernel per run) or "warm" (long-lived worker)
+    ENGINE_BACKEND = os.getenv("AVU_ENGINE_BACKEND", "papermill").strip().lower()
+    # Engine job pool size (runs on different weeks execute side by side)
+    ENGINE_MAX_WORKERS = int(os.getenv("AVU_ENGINE_WORKERS", "2"))
+    # An SSE /status/stream connection is closed after this long; EventSource reconnects by itself
+    STATUS_STREAM_MAX_SEC = int(os.getenv("AVU_STATUS_STREAM_SEC", "300"))
+
     @staticmethod
     def missing_path_messages():
         msgs = []
@@ -5,9 +5,16 @@ from __future__ import annotations
 
 from flask import Blueprint, jsonify, request
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import json, logging
 
 from config import Settings
+from services.run_service import SCHEDULE_NB, notebook_for_mode, submit_batch_run, submit_notebook_run, week_range
+from utils.http_cache import conditional, dumps, json_body
+from utils.ui_state import flush_state
+from utils.job_manager import get_job_manager
+from utils.run_profile import compare_profiles, get_profile_store
 from pathlib import Path as _Path
 calendar_api = Blueprint("calendar_api", __name__)
 ROOT = _Path(__file__).resolve().parents[1]
@@ -62,13 +69,15 @@ def api_leads():
     year = request.args.get("year", type=int)
     week = request.args.get("week", type=int)
     # You can wire to leads_service; return empty array if none
-    return jsonify({"leads": []})
-from utils.schemas import ScheduleValidator, LockedValidator, list_errors
+    return conditional((), lambda: jsonify({"leads": []}))
+from utils.schemas import LockedValidator, list_errors
 from services.calendar_service import (
-    clamp_week, load_schedule, default_empty_schedule,
-    is_engine_ready, load_locked_calendar, save_locked_calendar
+    clamp_week, is_engine_ready, load_locked_calendar, load_week_range, locked_file, locked_sources,
+    save_locked_calendar,
 )
-from services.cards_service import attach_cards
+from services.leads_service import leads_sources, leads_view
+from services.schedule_view import schedule_sources, schedule_view
+from routes.campaign_index import campaign_entries, history_csv_path
 
 calendar_bp = Blueprint("calendar_bp", __name__)
 
@@ -76,25 +85,6 @@ IRON_DATA_PATH: Path = Settings.IRON_DATA_PATH
 LOCKED_PATH: Path = IRON_DATA_PATH / "locked_weeks"
 LOCKED_PATH.mkdir(parents=True, exist_ok=True)
 
-DAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-NUM_SLOTS = 5
-
-def _nocache(resp):
-    resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-    resp.headers["Pragma"] = "no-cache"
-    return resp
-
-def _ensure_five_slots(payload: dict) -> dict:
-    fixed = {}
-    for d in DAYS:
-        lst = list(payload.get(d, []))
-        if len(lst) < NUM_SLOTS:
-            lst = lst + [None] * (NUM_SLOTS - len(lst))
-        elif len(lst) > NUM_SLOTS:
-            lst = lst[:NUM_SLOTS]
-        fixed[d] = lst
-    return fixed
-
 @calendar_bp.get("/engine_ready")
 def engine_ready():
     return ("", 204) if is_engine_ready(IRON_DATA_PATH) else ("", 409)
@@ -102,14 +92,29 @@ def engine_ready():
 @calendar_bp.get("/api/locked")
 def get_locked():
     week = clamp_week(request.args.get("week"))
-    data = load_locked_calendar(LOCKED_PATH, week)
-    return _nocache(jsonify({"locked_calendar": data}))
+    year = request.args.get("year", type=int)
+    paths = ([locked_file(LOCKED_PATH, week, year)] if year else []) + [locked_file(LOCKED_PATH, week)]
+    flush_state(*paths)
+    return conditional(locked_sources(LOCKED_PATH, week, year),
+                       lambda: jsonify({"locked_calendar": load_locked_calendar(LOCKED_PATH, week, year)}))
+
+@calendar_bp.get("/api/calendar/range")
+def get_calendar_range():
+    """Schedules, locks and leads for weeks from..to of `year` in one store query each."""
+    year = request.args.get("year", type=int)
+    first = clamp_week(request.args.get("from"))
+    last = clamp_week(request.args.get("to", first))
+    if last < first:
+        return jsonify({"error": "from must not be after to"}), 400
+    weeks = load_week_range(IRON_DATA_PATH, year, first, last)
+    return jsonify({"year": year, "weeks": {str(w): v for w, v in weeks.items()}})
 
 @calendar_bp.post("/api/locked")
 def save_locked():
     try:
         data = request.get_json(force=True) or {}
         week = clamp_week(data.get("week"))
+        year = int(data["year"]) if data.get("year") else None
         locked_calendar = data.get("locked_calendar")
         if locked_calendar is None:
             return jsonify({"error": "locked_calendar required"}), 400
@@ -119,7 +124,7 @@ def save_locked():
             logging.warning("locked_calendar validation failed: %s", errs)
             return jsonify({"error": "Validation failed", "details": errs}), 400
 
-        out = save_locked_calendar(LOCKED_PATH, int(week), locked_calendar)
+        out = save_locked_calendar(LOCKED_PATH, int(week), locked_calendar, year=year)
         return jsonify({"ok": True, "saved": out.name})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -129,39 +134,100 @@ def get_schedule():
     # Accept ?week= (UI may also send ?year=)
     week_arg = request.args.get("week")
     week = clamp_week(week_arg) if week_arg else None
+    return conditional(schedule_sources(IRON_DATA_PATH, week),
+                       lambda: json_body(schedule_view(IRON_DATA_PATH, week), "identity"))
+# sources of a bundle are independent files: read them side by side
+_BUNDLE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="week-bundle")
+
+@calendar_bp.get("/api/week_bundle")
+def get_week_bundle():
+    """Schedule (with cards), locks, leads and the campaign-history entries of the week's wines in
+    one response. The client prefetches the neighbouring weeks' bundles itself (utils.js)."""
+    year = request.args.get("year", type=int) or datetime.now().year
+    week = clamp_week(request.args.get("week"))
+    flush_state(locked_file(LOCKED_PATH, week, year), locked_file(LOCKED_PATH, week))
+    sources = (schedule_sources(IRON_DATA_PATH, week) + locked_sources(LOCKED_PATH, week, year)
+               + leads_sources(IRON_DATA_PATH, year, week) + [history_csv_path()])
+
+    def build():
+        sched = _BUNDLE_POOL.submit(schedule_view, IRON_DATA_PATH, week)
+        locked = _BUNDLE_POOL.submit(load_locked_calendar, LOCKED_PATH, week, year)
+        leads = _BUNDLE_POOL.submit(leads_view, IRON_DATA_PATH, year, week)
+        sched_body = sched.result()
+        items = [it for slots in json.loads(sched_body).values() for it in (slots or []) if isinstance(it, dict)]
+        locked_cal = locked.result()
+        items += [it for slots in locked_cal.values() if isinstance(slots, list) for it in slots if isinstance(it, dict)]
+        campaign = campaign_entries(items)  # needs the app context, so it stays on this thread
+        body = (b'{"year":' + dumps(year) + b',"week":' + dumps(week) + b',"schedule":' + sched_body
+                + b',"locked_calendar":' + dumps(locked_cal) + b',"leads":' + dumps(leads.result())
+                + b',"campaign":' + dumps(campaign) + b"}")
+        return json_body(body, "identity")
+
+    return conditional(sources, build)
 
-    schedule = load_schedule(IRON_DATA_PATH, week)
-    if schedule is None:
-        payload = default_empty_schedule()
-        return _nocache(jsonify(payload))
-
-    schedule_fixed = _ensure_five_slots(schedule)
-    errs = list_errors(ScheduleValidator, schedule_fixed)
-    if errs:
-        logging.warning("schedule validation failed: %s", errs)
-        payload = default_empty_schedule()
-    else:
-        payload = attach_cards(schedule_fixed)
-
-    return _nocache(jsonify(payload))
 # --- Notebook runner endpoints ---
 notebook_runner_api = Blueprint("notebook_runner_api", __name__)
 
 @notebook_runner_api.post("/api/run-notebook")
 def run_notebook():
     payload = request.get_json(force=True) or {}
-    notebook = payload.get("notebook")
-    year = payload.get("year")
-    week = payload.get("week")
-    filters = payload.get("filters", {})
-    # Call your actual runner; here stub a fake job id
-    job_id = "job-" + str(week)
-    # TODO: trigger utils.notebook_runner.run_async(notebook, year, week, filters)
-    return jsonify({"job_id": job_id})
+    notebook = notebook_for_mode(payload.get("mode") or "partial", payload.get("notebook"))
+    if payload.get("week_range") and notebook == SCHEDULE_NB:
+        try:
+            weeks = week_range(payload["week_range"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(submit_batch_run(weeks, year=payload.get("year"), filters=payload.get("filters", {}),
+                                        locked_calendar=payload.get("locked_calendar") or {},
+                                        current_week=payload.get("week")))
+    job = submit_notebook_run(
+        notebook,
+        week=payload.get("week"),
+        year=payload.get("year"),
+        filters=payload.get("filters", {}),
+        locked_calendar=payload.get("locked_calendar") or {},
+        ui_selection=payload.get("ui_selection"),
+        selected_wine=payload.get("selected_wine"),
+        offer_batch=bool(payload.get("offer_batch")),
+    )
+    return jsonify(job)
 
 @notebook_runner_api.get("/api/status")
 def job_status():
+    manager = get_job_manager()
     job_id = request.args.get("job_id")
-    # TODO: read real status from utils/notebook_status.py
-    # Stub: pretend it's done
-    return jsonify({"state": "completed"})
+    if not job_id:
+        return jsonify({"jobs": manager.list(), "busy": manager.busy()})
+    job = manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job", "job_id": job_id, "state": "unknown"}), 404
+    return jsonify(job)
+
+@notebook_runner_api.get("/api/engine/profile")
+def engine_profile():
+    """?run=<job_id> → one profile; ?compare=<base>,<run> → per-stage deltas;
+    otherwise recent runs (?notebook=, ?limit=). ?threshold= is the regression ratio (0.15 = 15%)."""
+    store = get_profile_store(Settings.IRON_DATA_PATH)
+    if request.args.get("compare"):
+        ids = [x.strip() for x in request.args["compare"].split(",") if x.strip()]
+        if len(ids) != 2:
+            return jsonify({"error": "compare takes two run ids: ?compare=<base>,<run>"}), 400
+        try:
+            threshold = float(request.args.get("threshold", 0.15))
+        except ValueError:
+            return jsonify({"error": "threshold must be a number"}), 400
+        base, run = store.get(ids[0]), store.get(ids[1])
+        missing = [i for i, p in zip(ids, (base, run)) if p is None]
+        if missing:
+            return jsonify({"error": "unknown run", "run_ids": missing}), 404
+        return jsonify(compare_profiles(base, run, threshold=threshold))
+    if request.args.get("run"):
+        profile = store.get(request.args["run"])
+        if profile is None:
+            return jsonify({"error": "unknown run", "run_id": request.args["run"]}), 404
+        return jsonify(profile)
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 200))
+    except ValueError:
+        limit = 50
+    return jsonify({"runs": store.list(request.args.get("notebook") or None, limit)})
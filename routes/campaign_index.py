@@ -4,14 +4,17 @@ from flask import make_response
 
 from flask import Blueprint, current_app, jsonify, request
 from pathlib import Path
-import os, time
+import hashlib, io, os, time
 import pandas as pd
 from datetime import datetime
 
+from services.artifact_store import attach, file_source, publish
+from utils.http_cache import MIN_COMPRESS, conditional, dumps, encode, json_body, pick_encoding
+
 campaign_bp = Blueprint("campaign_index", __name__)
 
 # in-process cache by file mtime so we don't re-parse constantly
-_CACHE = {"path": None, "mtime": None, "data": None, "meta": None}
+_CACHE = {"path": None, "mtime": None, "data": None, "meta": None, "mark": None}
 
 # flexible header detection
 ID_COLS       = ["id", "wine_id", "Id", "ID", "WineID", "wineId"]
@@ -69,6 +72,71 @@ def _parse_date(v) -> str | None:
         pass
     return None
 
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%Y/%m/%d", "%d-%m-%Y")
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """Vectorized _parse_date: each distinct string is tried against the formats in order;
+    whatever none of them match goes through _parse_date itself (pandas fallback)."""
+    s = values.astype(str).str.strip()
+    uniq = pd.Series(s.unique())
+    out = pd.Series([None] * len(uniq), dtype=object)
+    todo = uniq != ""
+    for fmt in _DATE_FORMATS:
+        if not todo.any():
+            break
+        parsed = pd.to_datetime(uniq[todo], format=fmt, errors="coerce")
+        ok = parsed.notna()
+        if ok.any():
+            hit = ok[ok].index
+            out[hit] = [t.date().isoformat() for t in parsed[hit]]  # strftime drops the zero pad on years < 1000
+            todo[hit] = False
+    for i in todo[todo].index:
+        out[i] = _parse_date(uniq[i])
+    return s.map(dict(zip(uniq, out)))
+
+def _max_by(keys: pd.Series, dates: pd.Series) -> dict[str, str]:
+    # ISO dates compare correctly as strings; sort=False keeps first-seen key order
+    return dates.groupby(keys, sort=False).max().to_dict()
+
+def _merge_max(dst: dict, src: dict):
+    for k, v in src.items():
+        if k not in dst or dst[k] < v:
+            dst[k] = v
+
+def _index_frame(df: pd.DataFrame, cols: dict) -> dict:
+    name_col, date_col, id_col, vintage_col = cols["name"], cols["date"], cols["id"], cols["vintage"]
+    if not date_col or not name_col or df.empty:  # date and name are minimum viable
+        return {"by_id": {}, "by_name": {}}
+
+    last = _parse_dates(df[date_col])
+    keep = last.notna()
+    df, last = df[keep], last[keep]
+
+    nm = df[name_col].astype(str).str.strip().str.lower()
+    if vintage_col in df.columns:
+        raw = df[vintage_col].astype(str).str.strip()
+        vt = raw.str.replace(".", "", regex=False).str.upper()  # "N.V." -> "NV"
+        vt = vt.mask(raw == "", "NV").mask(vt.isin(["N/A", "NA", "NONE"]), "NV")
+    else:
+        vt = pd.Series("NV", index=df.index)
+    by_name = _max_by(nm + "::" + vt.str.lower(), last)
+
+    by_id: dict[str, str] = {}
+    if id_col:
+        rid = df[id_col].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+        has = rid != ""
+        by_id = _max_by(rid[has], last[has])
+    return {"by_id": by_id, "by_name": by_name}
+
+def _read_history(csv_path: Path, start: int = 0, header: bytes = b"") -> pd.DataFrame:
+    """Whole file, or only the bytes from `start` on (parsed under the original header line)."""
+    if not start:
+        return pd.read_csv(csv_path, dtype=str).fillna("")
+    with open(csv_path, "rb") as f:
+        f.seek(start)
+        chunk = f.read()
+    return pd.read_csv(io.BytesIO(header + chunk), dtype=str).fillna("")
+
 def _build_index(csv_path: Path):
     if not csv_path.exists():
         return {"by_id": {}, "by_name": {}}, {
@@ -78,54 +146,90 @@ def _build_index(csv_path: Path):
             "used_columns": {},
         }
 
-    df = pd.read_csv(csv_path, dtype=str).fillna("")
-    id_col      = _pick_col(df, ID_COLS)
-    name_col    = _pick_col(df, NAME_COLS)
-    vintage_col = _pick_col(df, VINTAGE_COLS)
-    date_col    = _pick_col(df, DATE_COLS)
-
+    df = _read_history(csv_path)
+    cols = {
+        "id": _pick_col(df, ID_COLS), "name": _pick_col(df, NAME_COLS),
+        "vintage": _pick_col(df, VINTAGE_COLS), "date": _pick_col(df, DATE_COLS),
+    }
     meta = {
         "source": str(csv_path),
         "exists": True,
         "row_count": int(len(df)),
-        "used_columns": {
-            "id": id_col, "name": name_col, "vintage": vintage_col, "date": date_col
-        },
+        "used_columns": cols,
     }
+    return _index_frame(df, cols), meta
 
-    if not date_col or not name_col:  # date and name are minimum viable
-        return {"by_id": {}, "by_name": {}}, meta
+# -- append-aware cache: the history only grows, so usually only the new tail is parsed
+_TAIL_PROBE = 4096
 
-    by_id: dict[str, str] = {}
-    by_name: dict[str, str] = {}
+def _file_mark(csv_path: Path, size: int) -> dict | None:
+    """Header line + the bytes just before `size`, to tell an append from a rewrite."""
+    try:
+        with open(csv_path, "rb") as f:
+            header = f.readline()
+            f.seek(max(0, size - _TAIL_PROBE))
+            tail = f.read(size - max(0, size - _TAIL_PROBE))
+    except OSError:
+        return None
+    return {"size": size, "header": header, "tail": tail}
 
-    for _, r in df.iterrows():
-        last = _parse_date(r[date_col])
-        if not last:
-            continue
+def _try_append(csv_path: Path, size: int):
+    mark, meta = _CACHE.get("mark"), _CACHE["meta"]
+    if not mark or not meta or not meta.get("exists") or size <= mark["size"]:
+        return None
+    if not mark["tail"].endswith(b"\n"):  # last build ended mid-record
+        return None
+    now = _file_mark(csv_path, mark["size"])
+    if now is None or now["header"] != mark["header"] or now["tail"] != mark["tail"]:
+        return None
+    new = _read_history(csv_path, start=mark["size"], header=mark["header"])
+    if list(new.columns) != list(pd.read_csv(io.BytesIO(mark["header"]), dtype=str).columns):
+        return None
+    added = _index_frame(new, meta["used_columns"])
+    data = {"by_id": dict(_CACHE["data"]["by_id"]), "by_name": dict(_CACHE["data"]["by_name"])}
+    _merge_max(data["by_id"], added["by_id"])
+    _merge_max(data["by_name"], added["by_name"])
+    return data, {**meta, "row_count": meta["row_count"] + int(len(new))}
 
-        nm = _norm_name(r[name_col])
-        vt = _norm_vintage(r[vintage_col] if vintage_col in df.columns else "NV")
-        key = f"{nm}::{vt.lower()}"
+# -- shared across server workers: the first one to parse the CSV publishes the maps for the rest. This
+# only saves the parse — a worker still decodes them into its own dicts (appends merge into them and
+# the full map is served as JSON), unlike the catalog, which searches its mapped arrays in place
+ARTIFACT = "campaign_index"
 
-        # prefer the most recent date if duplicates
-        if key not in by_name or (by_name[key] < last):
-            by_name[key] = last
+def _iron():
+    return current_app.config.get("IRON_DATA")
 
-        if id_col:
-            rid = _norm_id(r[id_col])
-            if rid:
-                if rid not in by_id or (by_id[rid] < last):
-                    by_id[rid] = last
+def _publish(csv_path: Path, data: dict, meta: dict):
+    if not _iron():
+        return
+    kinds = ["id"] * len(data["by_id"]) + ["name"] * len(data["by_name"])
+    frame = pd.DataFrame({"kind": kinds, "key": [*data["by_id"], *data["by_name"]],
+                          "date": [*data["by_id"].values(), *data["by_name"].values()]})
+    try:
+        publish(_iron(), ARTIFACT, frame, source=file_source(csv_path), extra={"meta": meta})
+    except OSError:
+        current_app.logger.warning("campaign index: artifact publish failed", exc_info=True)
 
-    return {"by_id": by_id, "by_name": by_name}, meta
+def _from_artifact(csv_path: Path):
+    art = attach(_iron(), ARTIFACT) if _iron() else None
+    if art is None or art.source != file_source(csv_path):
+        return None
+    kind, key, date = (art.column(c).tolist() for c in ("kind", "key", "date"))
+    data = {"by_id": {}, "by_name": {}}
+    for k, key_, d in zip(kind, key, date):
+        data["by_" + k][key_] = d
+    return data, art.extra.get("meta") or {}
 
-def _load_cached():
-    csv_path = Path(current_app.config.get("CAMPAIGN_HISTORY_CSV", "data/campaign_history.csv"))
+def history_csv_path() -> Path:
+    return Path(current_app.config.get("CAMPAIGN_HISTORY_CSV", "data/campaign_history.csv"))
+
+def _load_cached(force: bool = False):
+    csv_path = history_csv_path()
     try:
-        mtime = csv_path.stat().st_mtime
+        st = csv_path.stat()
+        mtime, size = st.st_mtime, st.st_size
     except FileNotFoundError:
-        mtime = None
+        mtime, size = None, None
 
     if (
         _CACHE["data"] is not None
@@ -134,20 +238,108 @@ def _load_cached():
     ):
         return _CACHE["data"], _CACHE["meta"]
 
-    data, meta = _build_index(csv_path)
-    _CACHE.update(path=str(csv_path), mtime=mtime, data=data, meta=meta)
+    built = None
+    if _CACHE["data"] is not None and _CACHE["path"] == str(csv_path) and size is not None:
+        try:
+            built = _try_append(csv_path, size)
+        except Exception:
+            built = None
+    shared = _from_artifact(csv_path) if built is None and not force else None  # another worker already indexed this file
+    data, meta = built or shared or _build_index(csv_path)
+    if shared is None:
+        _publish(csv_path, data, meta)
+    mark = _file_mark(csv_path, size) if size is not None else None
+    _CACHE.update(path=str(csv_path), mtime=mtime, data=data, meta=meta, mark=mark)
     return data, meta
 
+# -- versions and deltas: a version is "<byte size>.<hash of header + the bytes before it>", so any
+# worker can tell whether the file still starts with what the client saw and index only the rest
+def _version(mark: dict | None) -> str:
+    if not mark:
+        return "0"
+    digest = hashlib.sha1(mark["header"] + b"\0" + mark["tail"]).hexdigest()[:12]
+    return f"{mark['size']}.{digest}"
+
+def _delta_since(csv_path: Path, since: str, meta: dict) -> dict | None:
+    """Keys whose max date may have moved since `since` (None: unknown version → send everything)."""
+    mark = _CACHE.get("mark")
+    if not mark or not meta.get("exists"):
+        return None
+    if since == _version(mark):
+        return {"by_id": {}, "by_name": {}}
+    try:
+        size = int(since.split(".", 1)[0])
+    except ValueError:
+        return None
+    if not 0 < size < mark["size"]:
+        return None
+    old = _file_mark(csv_path, size)
+    if old is None or _version(old) != since or not old["tail"].endswith(b"\n") or old["header"] != mark["header"]:
+        return None
+    new = _read_history(csv_path, start=size, header=mark["header"])
+    return _index_frame(new, meta["used_columns"])
+
+def _compact(data: dict) -> dict:
+    """Dates dictionary-coded: {"dates": [...sorted], "by_id": {key: date index}, ...}."""
+    dates = sorted(set(data["by_id"].values()) | set(data["by_name"].values()))
+    pos = {d: i for i, d in enumerate(dates)}
+    return {"dates": dates, "by_id": {k: pos[v] for k, v in data["by_id"].items()},
+            "by_name": {k: pos[v] for k, v in data["by_name"].items()}}
+
+_BODIES: dict = {}  # (version, query, encoding) -> encoded body, for the current version only
+
+def _payload(data: dict, meta: dict) -> dict:
+    args = request.args
+    if args.get("debug") == "1":
+        return {**data, "meta": meta}
+    since, compact = args.get("since"), args.get("format") == "compact"
+    if since is None and not compact:
+        return data  # legacy shape
+    delta = _delta_since(history_csv_path(), since, meta) if since else None
+    body = delta if delta is not None else data
+    out = {"version": _version(_CACHE.get("mark")), "full": delta is None,
+           "encoding": "compact" if compact else "plain"}
+    out.update(_compact(body) if compact else body)
+    return out
+
+def campaign_entries(items) -> dict:
+    """The slice of the index the given schedule/lock items need (keys as cards.js looks them up)."""
+    data, _ = _load_cached()
+    out = {"by_id": {}, "by_name": {}}
+    for it in items:
+        rid = _norm_id(it.get("id"))
+        if rid and rid in data["by_id"]:
+            out["by_id"][rid] = data["by_id"][rid]
+        name = _norm_name(it.get("name") or it.get("wine"))
+        key = f"{name}::{_norm_vintage(it.get('vintage')).lower()}"
+        for k in (key, name):
+            if k in data["by_name"]:
+                out["by_name"][k] = data["by_name"][k]
+    return out
+
 @campaign_bp.get("/api/campaign_index")
 def get_campaign_index():
-    data, meta = _load_cached()
-    resp = jsonify({**data, "meta": meta}) if request.args.get("debug") == "1" else jsonify(data)
-    return _nocache(resp)
+    """?format=compact dictionary-codes the dates; ?since=<version> sends only what changed after it
+    ("full": false — merge by max date); gzip/br by Accept-Encoding."""
+    enc = pick_encoding()
+    query = request.query_string.decode("latin-1")
+
+    def build():
+        data, meta = _load_cached()
+        key = (_version(_CACHE.get("mark")), query, enc)
+        if key not in _BODIES:
+            raw = dumps(_payload(data, meta))
+            if len(_BODIES) > 32 or any(k[0] != key[0] for k in _BODIES):
+                _BODIES.clear()
+            _BODIES[key] = (raw, "identity") if len(raw) < MIN_COMPRESS else (encode(raw, enc), enc)
+        body, used = _BODIES[key]
+        return json_body(body, used)
+    return conditional([history_csv_path()], build, salt=f"{query}|{enc}", vary="Accept-Encoding")
 
 @campaign_bp.post("/api/campaign_index/refresh")
 def refresh_campaign_index():
-    _CACHE.update(path=None, mtime=None, data=None, meta=None)
-    data, meta = _load_cached()
+    _CACHE.update(path=None, mtime=None, data=None, meta=None, mark=None)
+    data, meta = _load_cached(force=True)
     return _nocache(jsonify({"ok": True, "counts": {
         "by_id": len(data["by_id"]), "by_name": len(data["by_name"])
     }, "meta": meta}))
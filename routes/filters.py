@@ -3,20 +3,17 @@ from flask import Blueprint, jsonify, request
 from pathlib import Path
 from config import Settings
 from services.filters_service import load_filters, save_filters
+from utils.http_cache import conditional
+from utils.ui_state import flush_state
 
 filters_bp = Blueprint("filters_bp", __name__)
 FILTERS_PATH: Path = Path("notebooks") / "filters.json"
 FILTERS_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-def _nocache(resp):
-    resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-    resp.headers["Pragma"] = "no-cache"
-    return resp
-
 @filters_bp.get("/api/filters")
 def get_filters():
-    data = load_filters(FILTERS_PATH)
-    return _nocache(jsonify({"filters": data}))
+    flush_state(FILTERS_PATH)  # validators come from the file, so it must hold the latest POST
+    return conditional([FILTERS_PATH], lambda: jsonify({"filters": load_filters(FILTERS_PATH)}))
 
 @filters_bp.post("/api/filters")
 def set_filters():
@@ -0,0 +1,185 @@
+# services/artifact_store.py — read-mostly datasets published once as memory-mapped column files;
+# every server worker attaches to the same pages, and a CURRENT pointer swaps versions atomically
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime, timezone
+import json, os, shutil, threading, time
+
+import numpy as np
+import pandas as pd
+
+ROOT_NAME = "artifacts"
+CURRENT = "CURRENT"
+SCHEMA = "schema.json"
+KEEP_VERSIONS = 2  # the one just replaced may still be mapped by a worker mid-request
+FORMAT = 2         # text offsets are in bytes; older versions are ignored and republished
+
+def artifact_root(iron_path, name: str) -> Path:
+    return Path(iron_path) / ROOT_NAME / name
+
+def _stamp() -> str:
+    return f"{time.strftime('%Y%m%d%H%M%S')}_{time.time_ns() % 10**9:09d}"
+
+def _write_column(vdir: Path, stem: str, s: pd.Series) -> dict:
+    arr = s.to_numpy()
+    if arr.dtype.kind in "biuf":
+        np.save(vdir / f"{stem}.npy", arr)
+        return {"kind": "num", "file": f"{stem}.npy"}
+    if arr.dtype.kind == "M":
+        np.save(vdir / f"{stem}.npy", arr.astype("datetime64[ns]").view("int64"))
+        return {"kind": "datetime", "file": f"{stem}.npy"}
+    # text: one utf-8 buffer + byte offsets + null mask, so a single row decodes without the rest
+    na = s.isna().to_numpy()
+    vals = [b"" if m else str(v).encode("utf-8") for v, m in zip(s.tolist(), na)]
+    offsets = np.zeros(len(vals) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in vals], out=offsets[1:])
+    np.save(vdir / f"{stem}.dat.npy", np.frombuffer(b"".join(vals), dtype=np.uint8))
+    np.save(vdir / f"{stem}.off.npy", offsets)
+    np.save(vdir / f"{stem}.na.npy", na)
+    return {"kind": "text", "file": stem}
+
+def _write_table(vdir: Path, prefix: str, df: pd.DataFrame) -> dict:
+    df = df.reset_index(drop=True)
+    return {"rows": len(df), "columns": [{"name": str(c), **_write_column(vdir, f"{prefix}c{i}", df[c])}
+                                         for i, c in enumerate(df.columns)]}
+
+def publish(iron_path, name: str, df: pd.DataFrame, source: dict | None = None, extra: dict | None = None,
+            tables: dict[str, pd.DataFrame] | None = None) -> str:
+    """Write `df` (plus any side `tables` of other lengths, e.g. prebuilt index arrays) as a new
+    version and point CURRENT at it; returns the version."""
+    root = artifact_root(iron_path, name)
+    root.mkdir(parents=True, exist_ok=True)
+    version = _stamp()
+    tmp = root / f".tmp_{version}"
+    tmp.mkdir()
+    schema = {"version": version, "format": FORMAT, "created_at": datetime.now(timezone.utc).isoformat(),
+              **_write_table(tmp, "", df), "source": source or {}, "extra": extra or {},
+              "tables": {t: _write_table(tmp, f"t{j}_", tdf) for j, (t, tdf) in enumerate((tables or {}).items())}}
+    (tmp / SCHEMA).write_text(json.dumps(schema), encoding="utf-8")
+    os.replace(tmp, root / f"v_{version}")
+    ptr = root / (CURRENT + ".tmp")
+    ptr.write_text(version, encoding="utf-8")
+    os.replace(ptr, root / CURRENT)
+    _prune(root)
+    return version
+
+def _prune(root: Path):
+    versions = sorted(p for p in root.glob("v_*") if p.is_dir())
+    for p in versions[:-KEEP_VERSIONS]:
+        # still mapped elsewhere (Windows refuses the delete) — try again on the next publish
+        shutil.rmtree(p, ignore_errors=True)
+
+class TextColumn:
+    """A text column served straight off its mapped buffer: indexing decodes only that row, so
+    lookups (including bisect over a sorted column) never materialize the whole column."""
+    def __init__(self, dat: np.ndarray, off: np.ndarray, na: np.ndarray):
+        # memoryviews over the same mapped pages: per-row indexing without numpy scalar overhead
+        self._dat, self._off, self._na = (memoryview(np.asarray(a)) for a in (dat, off, na))
+        self._n = len(self._off) - 1
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        if self._na[i]:
+            return np.nan
+        return str(self._dat[self._off[i]:self._off[i + 1]], "utf-8")
+
+    def to_numpy(self) -> np.ndarray:
+        raw, off = bytes(self._dat), self._off.tolist()
+        out = np.array([raw[a:b].decode("utf-8") for a, b in zip(off[:-1], off[1:])], dtype=object)
+        out[np.asarray(self._na, dtype=bool)] = np.nan
+        return out
+
+class Artifact:
+    """One published version. Numeric columns are np.load(mmap_mode="r") views and text columns
+    are TextColumn views over mapped buffers — nothing is copied until touched. column() on a
+    text column decodes all of it (for frames); use text() for lookups."""
+    def __init__(self, vdir: Path, schema: dict):
+        self.dir = vdir
+        self.schema = schema
+        self._cols = {c["name"]: c for c in schema["columns"]}
+
+    def __len__(self):
+        return int(self.schema["rows"])
+
+    @property
+    def version(self) -> str:
+        return self.schema["version"]
+
+    @property
+    def source(self) -> dict:
+        return self.schema.get("source") or {}
+
+    @property
+    def extra(self) -> dict:
+        return self.schema.get("extra") or {}
+
+    @property
+    def columns(self) -> list[str]:
+        return [c["name"] for c in self.schema["columns"]]
+
+    def table(self, name: str) -> Artifact:
+        """A side table published with this version (same directory, its own row count)."""
+        return Artifact(self.dir, {**self.schema, **self.schema["tables"][name], "tables": {}})
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(self.dir / name, mmap_mode="r")
+
+    def text(self, name: str) -> TextColumn:
+        f = self._cols[name]["file"]
+        return TextColumn(self._load(f + ".dat.npy"), self._load(f + ".off.npy"), self._load(f + ".na.npy"))
+
+    def column(self, name: str) -> np.ndarray:
+        c = self._cols[name]
+        if c["kind"] == "num":
+            return self._load(c["file"])
+        if c["kind"] == "datetime":
+            return np.asarray(self._load(c["file"])).view("datetime64[ns]")
+        return self.text(name).to_numpy()
+
+    def frame(self, columns=None) -> pd.DataFrame:
+        cols = [c for c in (columns or self.columns) if c in self._cols]
+        return pd.DataFrame({c: self.column(c) for c in cols})
+
+_ATTACHED: dict[str, tuple] = {}
+_LOCK = threading.Lock()
+
+def attach(iron_path, name: str) -> Artifact | None:
+    """The CURRENT version of `name` (None if never published); re-attached only when CURRENT moves."""
+    root = artifact_root(iron_path, name)
+    try:
+        st = (root / CURRENT).stat()
+    except FileNotFoundError:
+        return None
+    mark = (str(root), st.st_mtime_ns, st.st_size)
+    with _LOCK:
+        hit = _ATTACHED.get(name)
+        if hit and hit[0] == mark:
+            return hit[1]
+        try:
+            version = (root / CURRENT).read_text(encoding="utf-8").strip()
+            vdir = root / f"v_{version}"
+            schema = json.loads((vdir / SCHEMA).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if schema.get("format") != FORMAT:  # written by an older build: the caller republishes
+            return None
+        art = Artifact(vdir, schema)
+        _ATTACHED[name] = (mark, art)
+        return art
+
+def file_source(path) -> dict:
+    """Fingerprint of the file an artifact was built from (path, size, mtime)."""
+    p = Path(path)
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return {"path": str(p), "exists": False}
+    return {"path": str(p), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
@@ -0,0 +1,322 @@
+# services/batch_service.py — plan a range of weeks in one engine run (shared frames, per-week files)
+from __future__ import annotations
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import json, time
+
+import numpy as np
+import pandas as pd
+
+from services.calendar_service import DAYS, NUM_SLOTS
+from utils.atomic_io import atomic_write, update_json
+from utils.segment_scoring import segment_scores
+from utils.week_scheduler import WeekScheduler, wine_key
+from utils.week_style import COOLDOWN_DAYS, flat_week, style_pass, ultra_cap
+
+# same day policy as AVU_schedule_only
+DAY_TIERS = {
+    "Monday":    ["Budget","Premium"],
+    "Tuesday":   ["Premium"],
+    "Wednesday": ["Luxury"],
+    "Thursday":  ["Premium","Luxury"],
+    "Friday":    ["Ultra Luxury"],
+    "Saturday":  ["Luxury","Ultra Luxury"],
+    "Sunday":    ["Budget","Luxury"],
+}
+DAY_OCCASION = {
+    "Monday": "Casual", "Tuesday": "Casual", "Wednesday": "Dinner",
+    "Thursday": "Dinner", "Friday": "Party", "Saturday": "Gifting", "Sunday": "Dinner"
+}
+STOCK_SOURCES = ("stock_df_with_seasonality.pkl", "stock_df_final.pkl")
+
+def canon_tier(s) -> str:
+    t = str(s or "").strip().lower()
+    if "ultra" in t: return "Ultra Luxury"
+    if "luxury" in t: return "Luxury"
+    if "premium" in t: return "Premium"
+    if "mid" in t: return "Mid-range"
+    if "budget" in t or "entry" in t: return "Budget"
+    return ""
+
+def _price_bucket_from_01(v):
+    try:
+        x = max(0.0, min(1.0, float(v)))
+    except Exception:
+        return None
+    if x < 0.25: return "Budget"
+    if x < 0.50: return "Mid-range"
+    if x < 0.75: return "Premium"
+    return "Ultra Luxury"
+
+def _to_int(v):
+    try:
+        return int(v)
+    except Exception:
+        return None
+
+def normalize_filters(raw: dict | None) -> dict:
+    """The schedule-only notebook's UI_FILTERS shape (the fields the weekly selection reads)."""
+    raw = raw or {}
+    bucket = canon_tier(raw.get("price_tier_bucket") or _price_bucket_from_01(raw.get("price_tier")))
+    tiers = []
+    for t in raw.get("price_tiers") or []:
+        c = canon_tier(t)
+        if c and c not in tiers:
+            tiers.append(c)
+    if bucket and bucket not in tiers:
+        tiers.insert(0, bucket)
+    wine_type = raw.get("wine_type")
+    if wine_type is not None and str(wine_type).strip().lower() in ("all", ""):
+        wine_type = None
+    return {
+        "price_tier_bucket": bucket,
+        "price_tiers": tiers,
+        "loyalty_levels": [str(x).strip().lower() for x in (raw.get("loyalty_levels") or []) if str(x).strip()],
+        "wine_type": wine_type,
+        "bottle_size": _to_int(raw.get("bottle_size")),
+        "last_stock": bool(raw.get("last_stock", False)),
+        "last_stock_threshold": _to_int(raw.get("last_stock_threshold")) if raw.get("last_stock") else None,
+        "seasonality_boost": bool(raw.get("seasonality_boost", False)),
+        "style": (raw.get("style") or "default").strip().lower(),
+        "blocked_ids": [str(x).strip() for x in (raw.get("blocked_ids") or []) if str(x).strip()],
+        "blocked_keys": [str(x).strip() for x in (raw.get("blocked_keys") or []) if str(x).strip()],
+    }
+
+def week_start(year: int, week: int) -> date:
+    try:
+        return date.fromisocalendar(int(year), int(week), 1)
+    except ValueError:  # W53 in a 52-week year
+        return date.fromisocalendar(int(year), 52, 1) + timedelta(days=7)
+
+def prepare_pool(stock_df: pd.DataFrame, client_pref_df: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """Candidate wines after UI filters and blocks, with segment_score (AVU_schedule_only cell 5)."""
+    f = filters
+    df = stock_df.copy()
+    for c in ("id", "wine", "vintage", "full_type", "region_group", "price_tier", "stock"):
+        if c not in df.columns:
+            df[c] = np.nan
+    df["id"] = df["id"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    df["stock"] = pd.to_numeric(df["stock"], errors="coerce").fillna(0).astype(int)
+    df["region_group"] = df["region_group"].fillna(df.get("origin")).fillna("Unknown")
+    df["price_tier"] = df["price_tier"].map(canon_tier)
+    if "occasion" not in df.columns:
+        pt, ft = df["price_tier"], df["full_type"].fillna("").astype(str).str.lower()
+        df["occasion"] = np.select(
+            [pt.isin(["Luxury", "Ultra Luxury"]), ft.str.contains("sparkling|rosé|rose"), pt.isin(["Mid-range", "Premium"])],
+            ["Gifting", "Celebration", "Dinner"], default="Casual")
+    else:
+        df["occasion"] = df["occasion"].fillna("Casual").astype(str)
+
+    if f["price_tiers"]:
+        df = df[df["price_tier"].isin(f["price_tiers"])]
+    if f["wine_type"]:
+        df = df[df["full_type"].fillna("").astype(str).str.contains(str(f["wine_type"]), case=False, regex=False)]
+    if f["bottle_size"] is not None and "bottle_size_ml" in df.columns:
+        df = df[pd.to_numeric(df["bottle_size_ml"], errors="coerce") == f["bottle_size"]]
+    if f["last_stock"]:
+        df = df[df["stock"] <= int(f["last_stock_threshold"] or 10)]
+    df = df[df["stock"] >= (3 if f["last_stock"] else 6)]
+    keys = pd.Series([wine_key(*r) for r in zip(df["id"], df["wine"], df["vintage"])], index=df.index, dtype=object)
+    df = df[~df["id"].isin(set(f["blocked_ids"])) & ~keys.isin(set(f["blocked_keys"]))].copy()
+
+    clients = client_pref_df
+    if f["loyalty_levels"] and "loyalty_level" in clients.columns:
+        clients = clients[clients["loyalty_level"].astype(str).str.lower().isin(f["loyalty_levels"])]
+    df["segment_score"] = segment_scores(df, clients, normalize=True) if len(clients) else 0
+    return df
+
+def _history(iron: Path) -> dict:
+    """key -> last_campaign_date (ISO), keys normalized like the notebooks' _hist_key."""
+    for p in (iron / "history" / "wine_campaign_history.json", iron / "_output" / "history" / "wine_campaign_history.json"):
+        if p.exists():
+            try:
+                raw = json.loads(p.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            out = {}
+            for k, v in raw.items():
+                v = v or {}
+                sid = str(k or "").strip().replace(".0", "")
+                key = sid or f"{str(v.get('wine') or '').strip()}::{str(v.get('vintage') or 'NV').strip()}"
+                out[key] = v.get("last_campaign_date") or ""
+            return out
+    return {}
+
+def _cpi_avg(iron: Path) -> dict:
+    try:
+        from utils.cpi_store import open_cpi_store
+        store = open_cpi_store(iron)
+    except Exception:
+        store = None
+    if store is not None:
+        wf = store.wine_frame()
+    elif (iron / "cpi_matrix_latest.pkl").exists():
+        wf = pd.read_pickle(iron / "cpi_matrix_latest.pkl")
+    else:
+        return {}
+    if "avg_cpi_score" not in wf.columns:
+        return {}
+    return dict(zip(wf["id"].astype(str), pd.to_numeric(wf["avg_cpi_score"], errors="coerce").fillna(0).round(4)))
+
+def load_shared(iron: Path, filters: dict) -> dict:
+    """Everything the weeks share, loaded once per batch."""
+    stock_path = next((iron / n for n in STOCK_SOURCES if (iron / n).exists()), None)
+    if stock_path is None:
+        raise FileNotFoundError(f"no stock pickle ({' / '.join(STOCK_SOURCES)}) in {iron}")
+    client_path = iron / "client_pref_df_latest.pkl"
+    clients = pd.read_pickle(client_path) if client_path.exists() else pd.DataFrame()
+    return {"pool": prepare_pool(pd.read_pickle(stock_path), clients, filters),
+            "history": _history(iron), "cpi": _cpi_avg(iron)}
+
+def effective_locks(locked_dir: Path, year: int, week: int, overlay: dict | None = None) -> dict:
+    """Persisted week locks (year file, then legacy), with the UI snapshot laid over slot by slot."""
+    persisted = {}
+    for p in (locked_dir / f"locked_calendar_{int(year)}_week_{int(week)}.json",
+              locked_dir / f"locked_calendar_week_{int(week)}.json"):
+        try:
+            if p.exists() and p.stat().st_size > 0:
+                persisted = json.loads(p.read_text(encoding="utf-8")) or {}
+                break
+        except Exception:
+            pass
+    out = {d: (list(persisted.get(d) or []) + [None] * NUM_SLOTS)[:NUM_SLOTS] for d in DAYS}
+    for day, over in (overlay or {}).items():
+        d = next((x for x in DAYS if x.lower() == str(day).lower()), None)
+        if d:
+            for i, it in enumerate((list(over or []) + [None] * NUM_SLOTS)[:NUM_SLOTS]):
+                if it not in (None, "", "null"):
+                    out[d][i] = it
+    return out
+
+def _locked_item(it: dict) -> dict:
+    return {"id": str(it.get("id") or "").strip(), "wine": str(it.get("wine") or it.get("name") or "").strip(),
+            "vintage": str(it.get("vintage") or "NV").strip(), "full_type": it.get("full_type") or "",
+            "region_group": it.get("region_group") or "", "stock": _to_int(it.get("stock")) or 0,
+            "price_tier": canon_tier(it.get("price_tier")), "match_quality": it.get("match_quality") or "Locked",
+            "locked": True}
+
+def _auto_item(row) -> dict:
+    ft, rg = row.get("full_type", "Unknown"), row.get("region_group", "Unknown")
+    return {"id": str(row.get("id") or "").strip(), "wine": str(row.get("wine") or "").strip(),
+            "vintage": str(row.get("vintage") or "NV").strip(), "full_type": None if pd.isna(ft) else ft,
+            "region_group": None if pd.isna(rg) else rg, "stock": int(row.get("stock", 0)),
+            "price_tier": row.get("price_tier", ""), "match_quality": "Auto", "locked": False}
+
+def plan_weeks(shared: dict, year: int, weeks: list[int], locks: dict[int, dict], filters: dict | None = None) -> dict:
+    """week -> {day: [item | None] * NUM_SLOTS}.
+
+    Each week is what a single-week schedule-only run makes of it: the WeekScheduler picks (with
+    the style's Ultra Luxury cap, last year's seasonality taken around today as the notebook does),
+    then the style pass of utils.week_style over them. The range adds what one run can't know: a
+    wine is used at most once in the whole range (locked ones included) and never within its
+    style's cooldown after its last campaign. Weeks are filled in order for that reason.
+    """
+    f = normalize_filters(filters)
+    style = f["style"]
+    pool = shared["pool"]
+    cooldown = timedelta(days=COOLDOWN_DAYS.get(style, COOLDOWN_DAYS["default"]))
+    last = {}
+    for k, iso in shared["history"].items():
+        try:
+            last[k] = datetime.fromisoformat(str(iso)[:10]).date()
+        except Exception:
+            pass
+    used_ids, used_keys = set(), set()
+    for lk in locks.values():
+        for it in (x for d in DAYS for x in lk.get(d) or [] if isinstance(x, dict)):
+            item = _locked_item(it)
+            if item["id"]:
+                used_ids.add(item["id"])
+            used_keys.add(wine_key(item["id"], item["wine"], item["vintage"]))
+
+    keys = [wine_key(*r) for r in zip(pool["id"], pool["wine"], pool["vintage"])]
+    offer = pd.to_datetime(pool["OMT last offer date"], errors="coerce") if "OMT last offer date" in pool.columns else None
+    cut = datetime.today() - timedelta(days=365)
+    plans = {}
+    for week in weeks:
+        start = week_start(year, week)
+        fresh = np.array([not (k in last and start - cooldown < last[k] <= start + timedelta(days=6)) for k in keys], dtype=bool)
+        cand = pool[fresh]
+        seasonal = None
+        if offer is not None:
+            seasonal = offer[fresh].between(cut, cut + timedelta(days=7)).to_numpy()
+            if f["seasonality_boost"]:  # only what was offered around this time last year
+                cand, seasonal = cand[seasonal], None
+
+        week_locks = locks.get(week, {})
+        slots = {d: [None] * NUM_SLOTS for d in DAYS}
+        for d in DAYS:
+            for idx, it in enumerate(week_locks.get(d) or []):
+                if isinstance(it, dict) and it:
+                    s = _to_int(it.get("slot", idx))
+                    s = idx if s is None else s
+                    if 0 <= s < NUM_SLOTS:
+                        slots[d][s] = _locked_item(it)
+        free = {d: sum(x is None for x in slots[d]) for d in DAYS}
+        picks = WeekScheduler(cand, DAY_TIERS, DAY_OCCASION, seasonal).plan(
+            DAYS, free, used_ids=used_ids, used_keys=used_keys, ultra_cap=ultra_cap(style, week_locks, DAYS, NUM_SLOTS))
+        for d in DAYS:
+            open_idx = [j for j in range(NUM_SLOTS) if slots[d][j] is None]
+            for j, (_, row) in zip(open_idx, picks[d].iterrows()):
+                slots[d][j] = _auto_item(row)
+        slots = style_pass(flat_week(slots, DAYS), week_locks, f, shared["history"],
+                           blocked_ids=f["blocked_ids"], blocked_keys=f["blocked_keys"], days=DAYS, num_slots=NUM_SLOTS)
+        for it in (x for d in DAYS for x in slots[d] if x):
+            if str(it["id"]).strip():
+                used_ids.add(str(it["id"]).strip())
+            used_keys.add(wine_key(it["id"], it["wine"], it["vintage"]))
+        plans[week] = slots
+    return plans
+
+# ---------------------------------------------------------------- per-week output
+def write_week(out_dir: Path, year: int, week: int, slots: dict, history: dict, cpi: dict) -> dict:
+    """Attach last_campaign_date / avg_cpi_score and write the files the schedule-only run writes."""
+    for d in DAYS:
+        for it in slots[d]:
+            if it:
+                k = wine_key(it.get("id"), it.get("wine"), it.get("vintage"))
+                it["last_campaign_date"] = it.get("last_campaign_date") or history.get(k, "")
+                it["avg_cpi_score"] = it.get("avg_cpi_score") or float(cpi.get(it.get("id"), 0.0))
+    flat = {d: [x for x in slots[d] if x] for d in DAYS}
+    year_json = out_dir / f"weekly_campaign_schedule_{year}_week_{week}.json"
+    atomic_write(year_json, json.dumps(flat, indent=2, default=str))
+    atomic_write(out_dir / f"weekly_campaign_schedule_{year}_week_{week}.ui.json",
+                 json.dumps({"weekly_calendar": slots}, indent=2, default=str))
+    atomic_write(out_dir / f"weekly_campaign_schedule_week_{week}.json", json.dumps(slots, indent=4, default=str))
+    pd.to_pickle(slots, out_dir / f"weekly_campaign_schedule_{year}_week_{week}.pkl")
+    pd.to_pickle(slots, out_dir / f"weekly_campaign_schedule_week_{week}.pkl")
+    return {"week": week, "json": year_json.name,
+            "auto": sum(1 for d in DAYS for x in slots[d] if x and not x.get("locked")),
+            "locked": sum(1 for d in DAYS for x in slots[d] if x and x.get("locked"))}
+
+def _update_index(out_dir: Path, year: int, results: list[dict]):
+    now = datetime.now().isoformat(timespec="seconds")
+    def merge(idx):
+        for r in results:
+            idx.setdefault(str(year), {})[str(r["week"])] = {"json": r["json"], "updated_at": now}
+        if results:
+            idx["_latest_year"], idx["_latest_week"] = str(year), str(results[-1]["week"])
+    update_json(out_dir / "schedule_index.json", merge)
+
+def run_batch(iron, year: int, weeks, filters: dict | None = None, locked_calendar: dict | None = None,
+              overlay_week: int | None = None) -> dict:
+    """Plan `weeks` of `year` from one load of stock / client prefs / CPI / history.
+
+    locked_calendar (the UI snapshot) is laid over `overlay_week`'s persisted locks only,
+    as in a single-week run. Per-week files are written in this process: they are a few small
+    JSON/pickle files per week, well under the cost of planning.
+    """
+    t0 = time.perf_counter()
+    iron = Path(iron)
+    weeks = sorted({int(w) for w in weeks})
+    f = normalize_filters(filters)
+    shared = load_shared(iron, f)
+    t_load = time.perf_counter() - t0
+    locked_dir = iron / "locked_weeks"
+    locks = {w: effective_locks(locked_dir, year, w, locked_calendar if w == overlay_week else None) for w in weeks}
+    plans = plan_weeks(shared, year, weeks, locks, f)
+
+    results = [write_week(iron, year, w, plans[w], shared["history"], shared["cpi"]) for w in weeks]
+    _update_index(iron, year, results)
+    return {"year": year, "weeks": results, "load_sec": round(t_load, 3),
+            "duration_sec": round(time.perf_counter() - t0, 3)}
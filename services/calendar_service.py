@@ -3,6 +3,9 @@ from pathlib import Path
 from datetime import datetime, timezone
 import json
 
+from services.calendar_store import ANY_YEAR, get_calendar_store
+from utils.ui_state import write_state
+
 DAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
 NUM_SLOTS = 5
 
@@ -54,17 +57,45 @@ def load_schedule(iron_data: Path, week: int | None) -> dict | None:
             return None
     return None
 
-def save_locked_calendar(base_dir: Path, week: int, data: dict) -> Path:
-    base_dir.mkdir(parents=True, exist_ok=True)
-    out = base_dir / f"locked_calendar_week_{week}.json"
-    out.write_text(json.dumps(data, indent=2), encoding="utf-8")
-    return out
+def locked_file(base_dir: Path, week: int, year: int | None = None) -> Path:
+    if year:
+        return base_dir / f"locked_calendar_{int(year)}_week_{int(week)}.json"
+    return base_dir / f"locked_calendar_week_{int(week)}.json"
 
-def load_locked_calendar(base_dir: Path, week: int) -> dict:
-    p = base_dir / f"locked_calendar_week_{week}.json"
-    if not p.exists():
-        return {}
+def locked_sources(base_dir: Path, week: int, year: int | None = None) -> list[Path]:
+    """Files load_locked_calendar considers, in order (for cache validators)."""
+    store = get_calendar_store(base_dir.parent)
+    return (store.sources("locked", year, week) if year else []) + store.sources("locked", None, week)
+
+def save_locked_calendar(base_dir: Path, week: int, data: dict, year: int | None = None) -> Path:
+    """Legacy week file always; the year-scoped one (what the notebooks read first) when `year` is known."""
+    store = get_calendar_store(base_dir.parent)
+    out = locked_file(base_dir, week)
+    for y in ([year] if year else []) + [None]:
+        path = locked_file(base_dir, week, y)
+        store.put("locked", y or ANY_YEAR, week, data, path)
+        write_state(path, data)  # written behind; flush_state() before a run reads it
+    return locked_file(base_dir, week, year) if year else out
+
+def load_locked_calendar(base_dir: Path, week: int, year: int | None = None) -> dict:
+    """The year's locks, else the legacy week file's."""
     try:
-        return json.loads(p.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+        data, _ = get_calendar_store(base_dir.parent).lookup("locked", year, week)
+        return data if isinstance(data, dict) else {}
+    except Exception:  # store unavailable: read the legacy file as before
+        p = locked_file(base_dir, week)
+        try:
+            return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+        except Exception:
+            return {}
+
+def load_week_range(iron_data: Path, year: int | None, first: int, last: int) -> dict:
+    """{week: {"weekly_calendar", "locked_calendar", "leads"}} for first..last from the store."""
+    store = get_calendar_store(iron_data)
+    sched = store.week_range("schedule", year, first, last)
+    locked = store.week_range("locked", year, first, last)
+    leads = store.week_range("leads", year, first, last)
+    default_leads, _ = store.lookup("leads", None, None)
+    return {w: {"weekly_calendar": sched.get(w), "locked_calendar": locked.get(w) or {},
+                "leads": leads.get(w, default_leads)}
+            for w in range(int(first), int(last) + 1)}
@@ -0,0 +1,202 @@
+# services/calendar_store.py — locks, schedules and leads indexed by (year, week) in one SQLite file;
+# the JSON files stay the engines' interface and are (re)imported whenever their size/mtime changes
+from __future__ import annotations
+from pathlib import Path
+import hashlib, json, os, re, sqlite3, tempfile, threading, time
+
+DB_NAME = "calendar.sqlite"
+ANY_YEAR = 0      # files without a year (legacy names)
+DEFAULT_WEEK = 0  # leads_default.json
+SCHEMA_VERSION = 2
+PUT_GRACE_NS = 60 * 10**9  # a written-through row whose file never appeared is dropped after this
+
+# (kind, sub-directory, file name template, rank) — lower rank wins; {week} matches "5" and "05"
+SOURCES = (
+    ("locked", "locked_weeks", "locked_calendar_{year}_week_{week}.json", 0),
+    ("locked", "locked_weeks", "locked_calendar_week_{week}.json", 0),
+    ("schedule", "", "weekly_campaign_schedule_{year}_week_{week}.ui.json", 0),
+    ("schedule", "", "weekly_campaign_schedule_{year}_week_{week}.json", 1),
+    ("schedule", "", "weekly_campaign_schedule_week_{week}.json", 0),
+    ("leads", "", "leads_{year}_W{week}.json", 0),
+    ("leads", "", "leads_W{week}.json", 0),
+    ("leads", "", "leads_default.json", 0),
+)
+
+def _pattern(template: str) -> re.Pattern:
+    return re.compile(re.escape(template).replace(r"\{year\}", r"(?P<year>\d{4})").replace(r"\{week\}", r"(?P<week>\d{1,2})"))
+
+_PATTERNS = [(kind, sub, _pattern(tpl), rank) for kind, sub, tpl, rank in SOURCES]
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY, kind TEXT NOT NULL, year INTEGER NOT NULL, week INTEGER NOT NULL,
+    rank INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, payload TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_key ON entries (kind, week, year, rank);
+"""
+_INSERT = "INSERT OR REPLACE INTO entries (path, kind, year, week, rank, size, mtime_ns, payload) VALUES (?,?,?,?,?,?,?,?)"
+PUT_SIZE = -1  # row written through the store: newer than its file until the file is rewritten
+
+def _payload(kind: str, raw):
+    if kind == "schedule" and isinstance(raw, dict):
+        return raw.get("weekly_calendar", raw)  # as load_schedule unwraps it
+    return raw
+
+def default_db_path(iron_data: Path) -> Path:
+    """Local (not the synced IRON_DATA folder): a cache of the JSON files, rebuilt when missing."""
+    key = hashlib.sha1(str(Path(iron_data).resolve()).encode("utf-8")).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / "avu" / f"calendar_{key}.sqlite"
+
+class CalendarStore:
+    """Range reads sync the index with the directory (one scandir, files opened only when changed)
+    at most every `sync_interval` seconds. Single-week lookups re-check their own few candidate files
+    first, so what they return is never older than the files a caller just took validators from."""
+    def __init__(self, iron_data: Path, db_path: Path | None = None, sync_interval: float = 1.0):
+        self.iron = Path(iron_data)
+        self.db_path = Path(db_path or os.getenv("AVU_CALENDAR_DB") or default_db_path(self.iron))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._db.executescript(f"DROP TABLE IF EXISTS entries; PRAGMA user_version = {SCHEMA_VERSION};")
+        self._db.executescript(_DDL)
+        self._synced = 0.0
+
+    # -- import ---------------------------------------------------------------------------
+    def _candidates(self, kind: str, year: int | None, week: int | None) -> list[tuple[str, tuple]]:
+        out = []
+        for k, sub, tpl, rank in SOURCES:
+            if k != kind or ("{year}" in tpl and not year) or (("{week}" in tpl) != bool(week)):
+                continue
+            y = int(year) if "{year}" in tpl else ANY_YEAR
+            for w in dict.fromkeys((str(int(week)), f"{int(week):02d}") if week else ("",)):
+                out.append((str(self.iron / sub / tpl.format(year=y, week=w)), (kind, y, int(week or DEFAULT_WEEK), rank)))
+        return out
+
+    def sources(self, kind: str, year: int | None, week: int | None) -> list[Path]:
+        """Files that can answer (kind, year, week), best first ("5" and "05" spellings both)."""
+        return [Path(p) for p, _ in self._candidates(kind, year, week)]
+
+    def _match(self, sub: str, name: str):
+        for kind, s_sub, pat, rank in _PATTERNS:
+            m = pat.fullmatch(name) if s_sub == sub else None
+            if m:
+                g = m.groupdict()
+                return kind, int(g.get("year") or ANY_YEAR), int(g.get("week") or DEFAULT_WEEK), rank
+        return None
+
+    def _scan(self) -> dict:
+        found = {}
+        for sub in {s[1] for s in SOURCES}:
+            try:
+                entries = list(os.scandir(self.iron / sub))
+            except OSError:
+                continue
+            for e in entries:
+                key = self._match(sub, e.name)
+                if key:
+                    st = e.stat()
+                    found[e.path] = (*key, st.st_size, st.st_mtime_ns)
+        return found
+
+    def _apply(self, found: dict, known: dict) -> int:
+        """Import `found` files that changed since `known`; drop known rows whose file is gone
+        (a written-through row only once its write-behind had time to land)."""
+        changed = 0
+        for path, (kind, year, week, rank, size, mtime) in found.items():
+            old = known.get(path)
+            if old and old == (size, mtime):
+                continue
+            if old and old[0] == PUT_SIZE and mtime <= old[1]:
+                continue  # the store's own write is newer than what is on disk (flush pending)
+            try:
+                payload = json.dumps(_payload(kind, json.loads(Path(path).read_text(encoding="utf-8"))))
+            except Exception:
+                payload = None  # unreadable: remembered, skipped by lookups until the file changes
+            self._db.execute(_INSERT, (path, kind, year, week, rank, size, mtime, payload))
+            changed += 1
+        cutoff = time.time_ns() - PUT_GRACE_NS
+        gone = [(p,) for p, (size, mtime) in known.items()
+                if p not in found and (size != PUT_SIZE or mtime < cutoff)]
+        self._db.executemany("DELETE FROM entries WHERE path = ?", gone)
+        self._db.commit()
+        return changed
+
+    def sync(self, force: bool = False) -> int:
+        """Import new/changed files and drop rows whose file is gone; returns rows (re)imported."""
+        if not force and time.monotonic() - self._synced < self.sync_interval:
+            return 0
+        with self._lock:
+            found = self._scan()
+            known = {r[0]: r[1:] for r in self._db.execute("SELECT path, size, mtime_ns FROM entries")}
+            changed = self._apply(found, known)
+            self._synced = time.monotonic()
+            return changed
+
+    def refresh(self, kind: str, year: int | None, week: int | None) -> int:
+        """sync() restricted to the candidate files of one (kind, year, week): a few stat() calls."""
+        cands = self._candidates(kind, year, week)
+        found = {}
+        for p, key in cands:
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            found[p] = (*key, st.st_size, st.st_mtime_ns)
+        paths = [p for p, _ in cands]
+        if not paths:
+            return 0
+        with self._lock:
+            marks = ",".join("?" * len(paths))
+            known = {r[0]: r[1:] for r in self._db.execute(
+                f"SELECT path, size, mtime_ns FROM entries WHERE path IN ({marks})", paths)}
+            return self._apply(found, known)
+
+    # -- reads ----------------------------------------------------------------------------
+    def lookup(self, kind: str, year: int | None, week: int | None) -> tuple[object, str | None]:
+        """(payload, source path) for the best row: the year's own, then the year-less one;
+        between "5" and "05" spellings of the same file the newer wins."""
+        self.refresh(kind, year, week)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, path FROM entries WHERE kind = ? AND year IN (?, ?) AND week = ? "
+                "AND payload IS NOT NULL ORDER BY year = ?, rank, mtime_ns DESC LIMIT 1",
+                (kind, int(year or ANY_YEAR), ANY_YEAR, int(week or DEFAULT_WEEK), ANY_YEAR)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else (None, None)
+
+    def week_range(self, kind: str, year: int | None, first: int, last: int) -> dict[int, object]:
+        """{week: payload} for first..last in one query (weeks with nothing are left out)."""
+        self.sync()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT week, payload FROM entries WHERE kind = ? AND year IN (?, ?) AND week BETWEEN ? AND ? "
+                "AND payload IS NOT NULL ORDER BY week, year = ?, rank, mtime_ns DESC",
+                (kind, int(year or ANY_YEAR), ANY_YEAR, int(first), int(last), ANY_YEAR)).fetchall()
+        out: dict[int, object] = {}
+        for week, payload in rows:
+            if week not in out:
+                out[week] = json.loads(payload)
+        return out
+
+    # -- writes ---------------------------------------------------------------------------
+    def put(self, kind: str, year: int | None, week: int, data, path: Path, rank: int = 0):
+        """Row for a file the caller is about to write (possibly behind): lookups see it at once."""
+        with self._lock:
+            self._db.execute(_INSERT, (str(path), kind, int(year or ANY_YEAR), int(week), rank, PUT_SIZE,
+                                       time.time_ns(), json.dumps(_payload(kind, data))))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_STORES: dict[str, CalendarStore] = {}
+_LOCK = threading.Lock()
+
+def get_calendar_store(iron_data: Path) -> CalendarStore:
+    key = str(Path(iron_data).resolve())
+    with _LOCK:
+        if key not in _STORES:
+            _STORES[key] = CalendarStore(Path(iron_data))
+        return _STORES[key]
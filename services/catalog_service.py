@@ -0,0 +1,200 @@
+# services/catalog_service.py — quick-add catalog: per-wine records + n-gram/prefix index, built once per file
+# version and published as mapped arrays every worker searches in place
+from __future__ import annotations
+from bisect import bisect_left
+from pathlib import Path
+import json, threading, unicodedata
+
+import pandas as pd
+
+from services.artifact_store import Artifact, attach, file_source, publish
+
+CATALOG_SOURCES = ("stock_df_final.pkl", "stock_df_with_seasonality.pkl")
+MAX_GRAM = 3
+
+def fold(s) -> str:
+    """Lowercase, trimmed, accents stripped ("Château" -> "chateau")."""
+    s = unicodedata.normalize("NFKD", str(s))
+    return "".join(ch for ch in s if not unicodedata.combining(ch)).strip().lower()
+
+def _grams(name: str) -> set[str]:
+    return {name[i:i + n] for n in range(1, MAX_GRAM + 1) for i in range(len(name) - n + 1)}
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns={"Stock": "stock"})
+    for c in ("id", "wine", "vintage", "region_group", "full_type", "stock"):
+        if c not in df.columns:
+            df[c] = "" if c != "stock" else 0
+    df = df[["id", "wine", "vintage", "region_group", "full_type"]].copy()
+    df["id"] = df["id"].astype(str).str.replace(r"\.0$", "", regex=True)
+    return df
+
+def _records(df: pd.DataFrame) -> list[dict]:
+    """One item per wine, in the same (sorted by wine) order the old groupby produced."""
+    firsts = df.groupby("wine", dropna=False)[["region_group", "full_type"]].first()
+    vintages: dict = {}
+    ids: dict = {}
+    for wine, vintage, wid in zip(df["wine"].tolist(), df["vintage"].tolist(), df["id"].tolist()):
+        key = "\0nan" if pd.isna(wine) else wine
+        if not pd.isna(vintage):
+            vintages.setdefault(key, set()).add(str(vintage).strip())
+        ids.setdefault(key, {})[str(vintage)] = str(wid)
+    items = []
+    for wine, r in zip(firsts.index.tolist(), firsts.itertuples(index=False)):
+        key = "\0nan" if pd.isna(wine) else wine
+        items.append({
+            "wine": wine,
+            "vintages": sorted(vintages.get(key, ())),
+            "ids_by_vintage": ids.get(key, {}),
+            "region_group": (r.region_group or "Unknown"),
+            "full_type": (r.full_type or "Unknown"),
+        })
+    return items
+
+class CatalogIndex:
+    """Inverted index over folded wine names. Every substring of up to MAX_GRAM chars is a
+    posting key, so short queries are a dict lookup; longer ones intersect trigram postings
+    and verify. Ranking: name prefix, then word prefix, then any substring (each alphabetical)."""
+    def __init__(self, df: pd.DataFrame):
+        self.items = _records(_prepare(df))
+        self.names = [fold(it["wine"]) for it in self.items]
+
+        postings: dict[str, list[int]] = {}
+        starts, words = [], []
+        for gid, name in enumerate(self.names):
+            for g in _grams(name):
+                postings.setdefault(g, []).append(gid)
+            starts.append((name, gid))
+            for p in range(1, len(name)):
+                if name[p - 1] in " -'/(" and name[p] not in " -'/(":
+                    words.append((name[p:], gid))
+        self.postings = postings
+        starts.sort()
+        words.sort()
+        self._start_keys, self._start_ids = [k for k, _ in starts], [g for _, g in starts]
+        self._word_keys, self._word_ids = [k for k, _ in words], [g for _, g in words]
+
+    def __len__(self):
+        return len(self.items)
+
+    def _posting(self, g: str):
+        return self.postings.get(g, ())
+
+    def _item(self, gid: int) -> dict:
+        return self.items[gid]
+
+    @staticmethod
+    def _prefix(keys: list[str], ids: list[int], q: str) -> list[int]:
+        lo = bisect_left(keys, q)
+        hi = bisect_left(keys, q + "\uffff", lo)
+        return sorted(set(ids[lo:hi]))
+
+    def _substring(self, q: str) -> list[int]:
+        if len(q) <= MAX_GRAM:
+            return self._posting(q)
+        postings = sorted((self._posting(q[i:i + MAX_GRAM]) for i in range(len(q) - MAX_GRAM + 1)), key=len)
+        cand = set(postings[0])
+        for p in postings[1:]:
+            if not cand:
+                break
+            cand.intersection_update(p)
+        return sorted(gid for gid in cand if q in self.names[gid])
+
+    def search(self, q: str, limit: int = 15) -> list[dict]:
+        q = fold(q)
+        if not q:
+            return [self._item(gid) for gid in range(min(limit, len(self)))]
+        out, seen = [], set()
+        for tier in (lambda: self._prefix(self._start_keys, self._start_ids, q),
+                     lambda: self._prefix(self._word_keys, self._word_ids, q),
+                     lambda: self._substring(q)):
+            for gid in tier():
+                if gid not in seen:
+                    seen.add(gid)
+                    out.append(self._item(gid))
+                    if len(out) >= limit:
+                        return out
+        return out
+
+    def tables(self) -> tuple[pd.DataFrame, dict[str, pd.DataFrame]]:
+        """The index as flat arrays for the artifact store: one row per wine, plus the sorted
+        prefix/word keys and the gram keys with their CSR-style slices into one postings array."""
+        items = pd.DataFrame({
+            "wine": [it["wine"] for it in self.items], "name": self.names,
+            "region_group": [it["region_group"] for it in self.items],
+            "full_type": [it["full_type"] for it in self.items],
+            "vintages": [json.dumps(it["vintages"]) for it in self.items],
+            "ids_by_vintage": [json.dumps(it["ids_by_vintage"]) for it in self.items],
+        })
+        grams = sorted(self.postings)
+        sizes = [len(self.postings[g]) for g in grams]
+        start = pd.Series(sizes, dtype="int64").cumsum().shift(fill_value=0)
+        flat = [gid for g in grams for gid in self.postings[g]]
+        return items, {
+            "starts": pd.DataFrame({"key": self._start_keys, "gid": pd.Series(self._start_ids, dtype="int32")}),
+            "words": pd.DataFrame({"key": self._word_keys, "gid": pd.Series(self._word_ids, dtype="int32")}),
+            "grams": pd.DataFrame({"key": grams, "start": start, "end": start + pd.Series(sizes, dtype="int64")}),
+            "postings": pd.DataFrame({"gid": pd.Series(flat, dtype="int32")}),
+        }
+
+class MappedCatalogIndex(CatalogIndex):
+    """The same index served off the published catalog artifact: keys are binary-searched in the
+    mapped column files and only the rows a query returns are decoded, so all workers share one
+    copy in the page cache and none of them rebuilds the index."""
+    def __init__(self, art: Artifact):
+        self.version = art.version
+        self.names = art.text("name")
+        self._wine, self._vintages, self._ids = art.text("wine"), art.text("vintages"), art.text("ids_by_vintage")
+        self._region, self._type = art.text("region_group"), art.text("full_type")
+        starts, words, grams = art.table("starts"), art.table("words"), art.table("grams")
+        self._start_keys, self._start_ids = starts.text("key"), starts.column("gid")
+        self._word_keys, self._word_ids = words.text("key"), words.column("gid")
+        self._gram_keys, self._gram_start, self._gram_end = grams.text("key"), grams.column("start"), grams.column("end")
+        self._postings = art.table("postings").column("gid")
+
+    def __len__(self):
+        return len(self.names)
+
+    def _posting(self, g: str):
+        i = bisect_left(self._gram_keys, g)
+        if i == len(self._gram_keys) or self._gram_keys[i] != g:
+            return ()
+        return self._postings[self._gram_start[i]:self._gram_end[i]].tolist()
+
+    def _item(self, gid: int) -> dict:
+        return {"wine": self._wine[gid], "vintages": json.loads(self._vintages[gid]),
+                "ids_by_vintage": json.loads(self._ids[gid]),
+                "region_group": self._region[gid], "full_type": self._type[gid]}
+
+_CACHE = {"version": None, "index": None}
+_LOCK = threading.Lock()
+ARTIFACT = "catalog"
+
+def _source(iron_path: Path) -> Path | None:
+    return next((Path(iron_path) / n for n in CATALOG_SOURCES if (Path(iron_path) / n).exists()), None)
+
+def publish_catalog(iron_path: Path):
+    """Build the index from the current stock pickle and publish it into the shared artifact store
+    (a no-op when the published one was built from the same file)."""
+    src = _source(iron_path)
+    if src is None:
+        return None
+    art = attach(iron_path, ARTIFACT)
+    fp = file_source(src)
+    if art is not None and art.source == fp:
+        return art
+    items, tables = CatalogIndex(pd.read_pickle(src)).tables()
+    publish(iron_path, ARTIFACT, items, source=fp, tables=tables)
+    return attach(iron_path, ARTIFACT)
+
+def get_catalog_index(iron_path: Path) -> CatalogIndex | None:
+    """Index over the shared catalog artifact; the stock pickle is only read (and the index only
+    built) by the first worker to see a new file version. Every other worker maps the published
+    arrays — the per-worker cache holds just the mapping, swapped when the version moves."""
+    with _LOCK:
+        art = publish_catalog(iron_path)
+        if art is None:
+            return None
+        if _CACHE["index"] is None or _CACHE["version"] != art.version:
+            _CACHE.update(index=MappedCatalogIndex(art), version=art.version)
+        return _CACHE["index"]
@@ -2,6 +2,8 @@ from __future__ import annotations
 from pathlib import Path
 import json
 
+from utils.ui_state import write_state
+
 def load_filters(path: Path) -> dict:
     if not path.exists():
         return {}
@@ -11,5 +13,4 @@ def load_filters(path: Path) -> dict:
         return {}
 
 def save_filters(path: Path, filters: dict):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(filters, indent=2), encoding="utf-8")
+    write_state(path, filters)
@@ -1,19 +1,70 @@
 # services/leads_service.py
 from pathlib import Path
-import json
-
-def load_leads(iron_data: Path, year: int | None, week: int | None):
-    candidates = []
-    if year and week:
-        candidates.append(iron_data / f"leads_{year}_W{week:02d}.json")
-    if week:
-        candidates.append(iron_data / f"leads_W{week:02d}.json")
-    candidates.append(iron_data / "leads_default.json")
-    for p in candidates:
-        try:
-            if p.exists():
-                with p.open("r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception:
-            continue
-    return None
+
+from services.calendar_store import get_calendar_store
+
+DAY_NAMES = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+MERGED_MAP = {
+    "MonTue": ("Monday", 2), "TueWed": ("Tuesday", 2), "WedThu": ("Wednesday", 2),
+    "ThuFri": ("Thursday", 2), "FriSat": ("Friday", 2), "SatSun": ("Saturday", 2),
+    "SunMon": ("Sunday", 2),
+}
+
+def normalize_leads(payload):
+    out = []
+    if isinstance(payload, dict):
+        if isinstance(payload.get("leads"), list):
+            return {"leads": payload["leads"]}
+        for key, arr in payload.items():
+            if not isinstance(arr, list):
+                continue
+            if key in DAY_NAMES:
+                out += [{**ch, "day": key, "span": int(ch.get("span", 1) or 1)} for ch in arr]
+            elif key in MERGED_MAP:
+                start, span = MERGED_MAP[key]
+                out += [{**ch, "day": start, "span": span} for ch in arr]
+        return {"leads": out}
+    if isinstance(payload, list):
+        return {"leads": payload}
+    return {"leads": []}
+
+def load_leads(iron_data: Path, year: int | None, week: int | None, with_source: bool = False):
+    """leads_{year}_W{ww}.json, else leads_W{ww}.json, else leads_default.json (via the calendar store)."""
+    store = get_calendar_store(iron_data)
+    data, src = store.lookup("leads", year, week) if week else (None, None)
+    if data is None:
+        data, src = store.lookup("leads", None, None)
+    return (data, src) if with_source else data
+
+def leads_sources(iron_data: Path, year: int | None, week: int | None) -> list[Path]:
+    """Files load_leads considers, in order (for cache validators)."""
+    store = get_calendar_store(iron_data)
+    out = (store.sources("leads", year, week) if year and week else []) + (store.sources("leads", None, week) if week else [])
+    return out + store.sources("leads", None, None)
+
+def leads_view(iron_root: Path, year: int | None, week: int | None, debug: bool = False) -> dict:
+    """GET /api/leads payload: normalized to a flat list, synthesized when there is nothing."""
+    data, src_used = load_leads(iron_root, year if week else None, week, with_source=True)
+
+    if data is None:
+        data = {"TueWed": [], "ThuFri": []}
+
+    normalized = normalize_leads(data)
+
+    # Safety net: synthesize minimal leads if still empty
+    if not normalized["leads"]:
+        normalized["leads"] = [
+            {"day": "Tuesday",  "span": 2, "title": "VIP tasting push", "meta": "Team A", "lane": 0},
+            {"day": "Thursday", "span": 2, "title": "Autumn promo",     "meta": "Team B", "lane": 1},
+        ]
+        resolved = {"source": "synthesized", "path": None}
+    else:
+        resolved = {"source": "file", "path": str(src_used) if src_used else None}
+
+    if debug:
+        normalized["_debug"] = {
+            "iron_data": str(iron_root),
+            "resolved": resolved,
+        }
+
+    return normalized
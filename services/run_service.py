@@ -0,0 +1,261 @@
+# services/run_service.py — submit notebook runs to the job manager (one place for app + API routes)
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+import json, os, tempfile, time, uuid
+
+from config import Settings
+from services.calendar_service import clamp_week, set_engine_ready
+from services.catalog_service import publish_catalog
+from utils.job_manager import EXCLUSIVE, get_job_manager
+from utils.notebook_runner import run_notebook as nb_run
+from utils.notebook_status import update_status, Heartbeat
+from utils.run_profile import HOT_OUT_ENV, get_profile_store, notebook_stage_timings, read_kernel_dump
+from utils.run_progress import HISTORY_RUNS, ProgressLog, RunProgress
+from utils.ui_state import flush_state, write_state
+
+NOTEBOOKS_DIR = Path("notebooks")
+FILTERS_PATH = NOTEBOOKS_DIR / "filters.json"
+TRANSIENT_LOCKED_SNAPSHOT = NOTEBOOKS_DIR / "locked_calendar.json"
+
+IGNITION_NB = "AVU_ignition_1.ipynb"
+SCHEDULE_NB = "AVU_schedule_only.ipynb"
+OFFER_NB = "AUTONOMOUS_AVU_OMT_3.ipynb"
+NOTEBOOK_BY_MODE = {"partial": SCHEDULE_NB, "offer": OFFER_NB, "full": IGNITION_NB}
+
+def notebook_for_mode(mode: str | None, requested: str | None = None) -> str:
+    return (requested or "").strip() or NOTEBOOK_BY_MODE.get(mode or "full", IGNITION_NB)
+
+def conflict_keys(notebook: str, year: int, week: int) -> set:
+    """Ignition rebuilds shared artifacts (stock, CPI, history) → exclusive.
+    Schedule/offer runs write their own week's outputs → keyed by notebook + week; the files every
+    schedule week shares (schedule_index.json, the weekly_campaign_schedule fallback) are merged
+    under a file lock / replaced atomically (utils.atomic_io), so different weeks still run together."""
+    if notebook == SCHEDULE_NB:
+        return {f"schedule:{year}:{week}"}
+    if notebook == OFFER_NB:
+        return {f"offer:{year}:{week}"}
+    return {EXCLUSIVE}
+
+def output_path_for(notebook: str, year: int, week: int, exclusive: bool) -> Path:
+    # parallel runs of the same notebook must not overwrite each other's executed copy
+    if exclusive:
+        return NOTEBOOKS_DIR / f"executed_{notebook}"
+    return NOTEBOOKS_DIR / f"executed_{Path(notebook).stem}_{year}_W{week:02d}.ipynb"
+
+def _execute(input_path: str, output_path: str, parameters: dict, env: dict, progress_path: str | None = None) -> dict:
+    """Runs inside a pool worker process. Finished cells are appended to `progress_path` (the web
+    process turns them into progress/ETA); `profile` is taken out and stored by the job's on_done."""
+    backend = Settings.ENGINE_BACKEND
+    dump = None
+    if backend != "warm":  # the kernel is another process: it writes its hot functions + peak RSS on exit
+        dump = Path(tempfile.gettempdir()) / f"avu_profile_{os.getpid()}_{uuid.uuid4().hex[:8]}.json"
+        env = dict(env, **{HOT_OUT_ENV: str(dump)})
+    t0 = time.perf_counter()
+    log = ProgressLog(progress_path) if progress_path else None
+    info = nb_run(input_path, output_path, parameters, env=env, in_process=True, on_stage=log.write if log else None)
+    out = {"output_path": output_path, "duration_sec": round(time.perf_counter() - t0, 3)}
+    if isinstance(info, dict) and info.get("stages"):
+        out["stages"] = info["stages"]
+    profile = {"backend": backend, "duration_sec": out["duration_sec"]}
+    if isinstance(info, dict):
+        profile.update(stages=info.get("stages") or [], hot=info.get("hot") or {},
+                       peak_rss_mb=info.get("peak_rss_mb"), cache=info.get("cache"))
+    else:
+        kernel = read_kernel_dump(dump) if dump else {}
+        profile.update(stages=notebook_stage_timings(output_path), hot=kernel.get("hot") or {},
+                       peak_rss_mb=kernel.get("peak_rss_mb"))
+    out["profile"] = profile
+    return out
+
+def _save_profile(job, notebook: str, year: int, week: int, variant: str | None = None):
+    # failed runs are kept too (without stage timings: the worker raised before returning them)
+    measured = (job.result or {}).pop("profile", None) or {"backend": Settings.ENGINE_BACKEND, "stages": [], "hot": {}, "peak_rss_mb": None}
+    profile = {"run_id": job.id, "notebook": notebook, "variant": variant, "year": year, "week": week, "state": job.state,
+               "error": job.error, "started_at": job.started_at, "finished_at": job.finished_at,
+               "duration_sec": job.to_dict()["run_sec"], **measured}
+    try:
+        get_profile_store(Settings.IRON_DATA_PATH).save(profile)
+    except Exception as e:
+        print(f"[profile] could not save {job.id}: {e}")
+
+def _progress_history(notebook: str, input_path: Path, variant: str | None) -> tuple[list[str], list[dict]] | None:
+    """Stage names and the recent completed runs the progress weights come from: the same backend
+    (warm and papermill spend their time differently) and the same variant. Read before queuing."""
+    from utils.warm_engine import notebook_stages
+    try:
+        names = [st.name for st in notebook_stages(input_path)]
+        runs = get_profile_store(Settings.IRON_DATA_PATH).runs(notebook, limit=HISTORY_RUNS * 4, state="completed")
+    except Exception as e:
+        print(f"[progress] no estimate for {notebook}: {e}")
+        return None
+    history = [p for p in runs if p.get("backend") == Settings.ENGINE_BACKEND and p.get("variant") == variant]
+    return names, history[:HISTORY_RUNS]
+
+def _execute_batch(iron: str, year: int, weeks: list[int], filters: dict, locked_calendar: dict,
+                   overlay_week: int | None) -> dict:
+    """Runs inside a pool worker process."""
+    from services.batch_service import run_batch
+    return run_batch(iron, year, weeks, filters, locked_calendar, overlay_week=overlay_week)
+
+def week_range(value) -> list[int]:
+    """[from, to] / {"from", "to"} / "10-22" → clamped, inclusive list of weeks."""
+    if isinstance(value, dict):
+        lo, hi = value.get("from"), value.get("to")
+    elif isinstance(value, str) and "-" in value:
+        lo, hi = value.split("-", 1)
+    elif isinstance(value, (list, tuple)) and len(value) == 2:
+        lo, hi = value
+    else:
+        raise ValueError("week_range must be [from, to]")
+    lo, hi = clamp_week(lo), clamp_week(hi)
+    if hi < lo:
+        raise ValueError(f"week_range is reversed ({lo} > {hi})")
+    return list(range(lo, hi + 1))
+
+def _publish_artifacts():
+    # new stock pickle → one shared catalog artifact; server workers swap to it on their next request
+    try:
+        publish_catalog(Settings.IRON_DATA_PATH)
+    except Exception as e:
+        print(f"[artifacts] catalog publish failed: {e}")
+
+_JOB_PROGRESS = ("progress", "eta_sec", "message")
+
+def _on_job(job, data: dict) -> dict:
+    # parallel runs share the one UI status (/status, SSE: last writer wins), so each job keeps its
+    # own progress in meta, which /api/status?job_id returns; the keys exist from submit on
+    job.meta.update({k: data[k] for k in _JOB_PROGRESS if k in data})
+    return data
+
+def _write_transient_state(filters, locked_calendar, ui_selection, selected_wine):
+    # legacy file drop for manual/debug notebook runs. These paths are shared by every queued job
+    # (the latest submit wins); server runs read their own copy from AVU_PARAMS first.
+    iron = Settings.IRON_DATA_PATH
+    write_state(FILTERS_PATH, filters or {})
+    write_state(TRANSIENT_LOCKED_SNAPSHOT, locked_calendar or {})
+    if ui_selection is not None:
+        write_state(iron / "ui_selection.json", ui_selection)
+    if selected_wine is not None:
+        write_state(iron / "selected_wine.json", selected_wine)
+    flush_state()  # the run starts next and may read any of them (locks saved earlier included)
+
+def submit_notebook_run(notebook: str, week=None, year=None, filters: dict | None = None,
+                        locked_calendar: dict | None = None, ui_selection=None, selected_wine=None,
+                        offer_batch: bool = False, base_message: str = "⏳ Processing…", done_message: str | None = None) -> dict:
+    """Queue a notebook run; returns the job dict (job_id, state, timings…)."""
+    week = clamp_week(week or datetime.now().isocalendar().week)
+    year = int(year or datetime.now().year)
+    keys = conflict_keys(notebook, year, week)
+    exclusive = EXCLUSIVE in keys
+    input_path = NOTEBOOKS_DIR / notebook
+    output_path = output_path_for(notebook, year, week, exclusive)
+
+    parameters = {
+        "input_path": str(Settings.SOURCE_PATH),
+        "output_path": str(Settings.IRON_DATA_PATH),
+        "week_number": int(week),
+    }
+    if notebook == OFFER_NB:
+        # the offer notebook reads these as injected globals
+        parameters.update(filters=filters or {}, selected_wine=selected_wine or {})
+        if offer_batch:  # every slot of the week's schedule → notebooks/offers/<year>_W<week>/
+            parameters.update(offer_batch=True, calendar_year=year)
+    # AVU_PARAMS carries this job's own inputs; the notebooks read it before the shared files that
+    # _write_transient_state drops (ignition Cell 1/8, schedule Cell 1/4), so a later submit can't leak in
+    avu_params = dict(parameters, calendar_year=year, source_path=str(Settings.SOURCE_PATH),
+                      filters=filters or {}, locked_calendar=locked_calendar or {})
+    if ui_selection is not None:
+        avu_params["ui_selection"] = ui_selection
+    if selected_wine is not None:
+        avu_params["selected_wine"] = selected_wine
+    env = {"AVU_PARAMS": json.dumps(avu_params, ensure_ascii=False)}
+
+    variant = "batch" if notebook == OFFER_NB and offer_batch else None
+    progress_log = ProgressLog(Path(tempfile.gettempdir()) / f"avu_progress_{uuid.uuid4().hex}.jsonl")
+    hb = Heartbeat(interval=2, notebook=notebook, base_message=base_message)
+    # file I/O happens here: on_queued/on_start run under the job manager's lock
+    _write_transient_state(filters, locked_calendar, ui_selection, selected_wine)
+    stages = _progress_history(notebook, input_path, variant)
+
+    def on_queued(job):
+        update_status(_on_job(job, {
+            "notebook": notebook, "state": "queued", "done": False, "job_id": job.id, "progress": 0,
+            "eta_sec": None, "message": f"⏳ Week {week} queued behind a running job…",
+        }))
+
+    def on_start(job):
+        tracker = RunProgress(progress_log, *stages, base_message) if stages else None
+        hb.progress = lambda: _on_job(job, {"job_id": job.id, **(tracker.poll() if tracker else {})})
+        update_status(_on_job(job, {
+            "notebook": notebook, "state": "running", "done": False, "job_id": job.id, "progress": 0,
+            "eta_sec": tracker.estimator.estimate()["eta_sec"] if tracker else None,
+            "message": f"Notebook started for Week {week}…",
+        }))
+        hb.start()
+
+    def on_done(job):
+        hb.stop()
+        progress_log.remove()
+        _save_profile(job, notebook, year, week, variant)
+        if job.state == "completed":
+            if notebook == IGNITION_NB:
+                set_engine_ready(Settings.IRON_DATA_PATH)
+                _publish_artifacts()
+            update_status(_on_job(job, {
+                "notebook": notebook, "state": "completed", "done": True, "job_id": job.id,
+                "progress": 100, "eta_sec": 0, "message": done_message or f"✅ Notebook executed for Week {week}.",
+            }))
+        else:
+            update_status(_on_job(job, {
+                "notebook": notebook, "state": "error", "done": True, "job_id": job.id,
+                "progress": 0, "eta_sec": None, "message": f"❌ Error: {job.error}",
+            }))
+
+    return get_job_manager().submit(
+        _execute, str(input_path), str(output_path), parameters, env, str(progress_log.path),
+        keys=keys, label=notebook, on_start=on_start, on_done=on_done, on_queued=on_queued,
+        meta={"notebook": notebook, "year": year, "week": week, "progress": 0, "eta_sec": None, "message": base_message},
+    )
+
+def submit_batch_run(weeks: list[int], year=None, filters: dict | None = None,
+                     locked_calendar: dict | None = None, current_week=None) -> dict:
+    """Queue one job that schedules every week in `weeks` from a single load of the shared data."""
+    year = int(year or datetime.now().year)
+    weeks = sorted({clamp_week(w) for w in weeks})
+    overlay_week = clamp_week(current_week) if current_week else None
+    label = f"W{weeks[0]:02d}–W{weeks[-1]:02d}"
+    keys = {f"schedule:{year}:{w}" for w in weeks}
+    flush_state()  # locks saved from the UI are read from locked_weeks/ (before queuing: no I/O under the lock)
+
+    def on_queued(job):
+        update_status({
+            "notebook": SCHEDULE_NB, "state": "queued", "done": False, "job_id": job.id,
+            "progress": 0, "eta_sec": None, "message": f"⏳ {year} {label} queued behind a running job…",
+        })
+
+    def on_start(job):
+        update_status({
+            "notebook": SCHEDULE_NB, "state": "running", "done": False, "job_id": job.id,
+            "progress": 0, "eta_sec": None, "message": f"Scheduling {year} {label} ({len(weeks)} weeks)…",
+        })
+
+    def on_done(job):
+        if job.state == "completed":
+            update_status({
+                "notebook": SCHEDULE_NB, "state": "completed", "done": True, "job_id": job.id,
+                "progress": 100, "message": f"✅ Scheduled {len(weeks)} weeks ({label}).",
+            })
+        else:
+            update_status({
+                "notebook": SCHEDULE_NB, "state": "error", "done": True, "job_id": job.id,
+                "progress": 0, "message": f"❌ Error: {job.error}",
+            })
+
+    return get_job_manager().submit(
+        _execute_batch, str(Settings.IRON_DATA_PATH), year, weeks, filters or {}, locked_calendar or {},
+        overlay_week,
+        keys=keys, label=f"{SCHEDULE_NB} batch {label}",
+        meta={"notebook": SCHEDULE_NB, "year": year, "weeks": weeks, "batch": True},
+        on_start=on_start, on_done=on_done, on_queued=on_queued,
+    )
@@ -0,0 +1,62 @@
+# services/schedule_view.py — GET /api/schedule payloads (padded, validated, cards attached) kept as
+# ready-to-send JSON bytes per week; rebuilt only when a backing file's (size, mtime) changes
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+import json, logging, threading
+
+from services.calendar_service import DAYS, NUM_SLOTS, default_empty_schedule, load_schedule, week_file
+from services.cards_service import attach_cards
+from utils.http_cache import file_state
+from utils.schemas import ScheduleValidator, list_errors
+
+MAX_WEEKS = 64
+_CACHE: OrderedDict = OrderedDict()  # (iron, week) -> (file state, body)
+_LOCK = threading.Lock()
+STATS = {"hits": 0, "builds": 0}
+
+def schedule_sources(iron_data: Path, week: int | None) -> list[Path]:
+    """Files load_schedule may read for `week`, in its order of preference."""
+    return ([week_file(iron_data, week)] if week else []) + [iron_data / "weekly_campaign_schedule.json"]
+
+def ensure_five_slots(payload: dict) -> dict:
+    fixed = {}
+    for d in DAYS:
+        lst = list(payload.get(d, []))
+        if len(lst) < NUM_SLOTS:
+            lst = lst + [None] * (NUM_SLOTS - len(lst))
+        elif len(lst) > NUM_SLOTS:
+            lst = lst[:NUM_SLOTS]
+        fixed[d] = lst
+    return fixed
+
+def build_schedule_payload(iron_data: Path, week: int | None) -> dict:
+    schedule = load_schedule(iron_data, week)
+    if schedule is None:
+        return default_empty_schedule()
+    schedule_fixed = ensure_five_slots(schedule)
+    errs = list_errors(ScheduleValidator, schedule_fixed)
+    if errs:
+        logging.warning("schedule validation failed: %s", errs)
+        return default_empty_schedule()
+    return attach_cards(schedule_fixed)
+
+def schedule_view(iron_data: Path, week: int | None) -> bytes:
+    """Serialized payload for `week`; validation and card shaping run once per file version."""
+    key = (str(iron_data), week)
+    state, _ = file_state(schedule_sources(iron_data, week))
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None and hit[0] == state:
+            _CACHE.move_to_end(key)
+            STATS["hits"] += 1
+            return hit[1]
+    body = json.dumps(build_schedule_payload(iron_data, week), ensure_ascii=False,
+                      separators=(",", ":"), sort_keys=True).encode("utf-8")  # key order as jsonify
+    with _LOCK:
+        _CACHE[key] = (state, body)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > MAX_WEEKS:
+            _CACHE.popitem(last=False)
+        STATS["builds"] += 1
+    return body
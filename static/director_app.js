@@ -311,44 +311,68 @@ function setCalendarInteractivity(enabled) {
 }
 
 
-async function pollStatusUntilDone({ refreshSchedule=true } = {}) {
+// Follows one job: its SSE stream (/status/stream?job_id=…), else a poll of /api/status?job_id=…
+function followJob(jobId, { refreshSchedule=true, timeoutMs=30*60*1000 } = {}) {
   showStatusPanel();
   window.__avuState.runInFlight = true;
   startGaugeOscillation();
   updateStartBtnState(); updateLoadBtnState();
   setStatus({ message:"Starting…", progress:0, state:"running" });
+  const q = `job_id=${encodeURIComponent(jobId)}`;
 
   return new Promise((resolve)=>{
-    const timer = setInterval(async ()=>{
-      try{
-        const s = await U.getJSON(URLS.status);
-        setStatus({ message:s.message, progress:s.progress, state:s.state });
-        const finished = (s.state==="completed") || (s.state==="error") || Number(s.progress)>=100;
-        if(!finished) return;
-        clearInterval(timer);
-        setStatusBadge(s.state);
-        if(s.state==="completed" && refreshSchedule){
-          await handleWeekYearChange(window.__avuState.currentYear, window.__avuState.currentWeek);
-          hideStatusPanel();
-        } else { setCalendarInteractivity(true); }
-        stopGaugeOscillation();
-        window.__avuState.runInFlight = false;
-        updateStartBtnState(); updateLoadBtnState();
-        recalcAndUpdateGauge({ animate:false });
-        wireWeekSelector(); // make sure it’s live after any DOM churn
-        resolve(s);
-      }catch(e){
-        console.error("Polling error:", e);
-        clearInterval(timer);
-        setStatus({ message:"Polling failed", progress:0, state:"error" });
-        stopGaugeOscillation();
-        window.__avuState.runInFlight=false;
-        setCalendarInteractivity(true);
-        updateStartBtnState(); updateLoadBtnState();
-        wireWeekSelector();
-        resolve({ state:"error", message:"Polling failed" });
-      }
-    }, 1200);
+    let settled = false, timer = null, source = null, deadline = null;
+    const close = ()=>{ settled = true; if(timer) clearInterval(timer); if(deadline) clearTimeout(deadline); if(source) source.close(); };
+    const release = ()=>{
+      stopGaugeOscillation();
+      window.__avuState.runInFlight = false;
+      updateStartBtnState(); updateLoadBtnState();
+      wireWeekSelector(); // make sure it’s live after any DOM churn
+    };
+
+    const finish = async (s)=>{
+      close();
+      setStatusBadge(s.state);
+      if(s.state==="completed") U.clearWeekBundles();  // the run rewrote schedules
+      if(s.state==="completed" && refreshSchedule){
+        await handleWeekYearChange(window.__avuState.currentYear, window.__avuState.currentWeek);
+        hideStatusPanel();
+      } else { setCalendarInteractivity(true); }
+      release();
+      recalcAndUpdateGauge({ animate:false });
+      resolve(s);
+    };
+    const fail = (e)=>{
+      console.error("Status error:", e);
+      close();
+      setStatus({ message: e?.message || "Polling failed", progress:0, state:"error" });
+      setCalendarInteractivity(true);
+      release();
+      resolve({ job_id:jobId, state:"error", error: e?.message || "Polling failed" });
+    };
+    const onStatus = (s)=>{
+      if(settled) return;
+      const state = s.state==="unknown" ? "error" : s.state;
+      setStatus({ message: s.message || s.error || "", progress: s.progress ?? 0, state });
+      if(s.done || state==="error") finish({ ...s, state }).catch(fail);
+    };
+
+    // Fallback for browsers/proxies without SSE: poll the job
+    const poll = ()=>{
+      if(settled || timer) return;
+      timer = setInterval(async ()=>{
+        try{ onStatus(await fetch(`/api/status?${q}`, {cache:"no-store"}).then(r=>r.json())); }
+        catch(e){ fail(e); }
+      }, 1200);
+    };
+
+    deadline = setTimeout(()=>fail(new Error("Notebook timeout")), timeoutMs);
+    if(!window.EventSource || !URLS.statusStream){ poll(); return; }
+    source = new EventSource(`${URLS.statusStream}?${q}`);
+    source.addEventListener("status", (ev)=>{
+      try{ onStatus(JSON.parse(ev.data)); }catch(e){ console.warn("Bad status event", e); }
+    });
+    source.onerror = ()=>{ if(settled) return; source.close(); source = null; poll(); };
   });
 }
 
@@ -443,13 +467,11 @@ async function runNotebook(notebook, year, week, filters = {}) {
   const job = resp?.job_id;
   if (!job) throw new Error("no job_id");
 
-  // Poll until completed
-  for (let i=0;i<60;i++){
-    const st = await fetch(`/api/status?job_id=${encodeURIComponent(job)}`).then(r=>r.json());
-    if (st?.state === "completed") return true;
-    await new Promise(r=>setTimeout(r, 1000));
-  }
-  throw new Error("Notebook timeout");
+  // Follow the job until it finishes (it may sit queued behind a conflicting run first);
+  // on success the schedule of the week on screen is reloaded
+  const st = await followJob(job);
+  if (st?.state !== "completed") throw new Error(st?.error || "Notebook failed");
+  return true;
 }
 
 // --- Button wiring ---
@@ -469,7 +491,6 @@ document.addEventListener("DOMContentLoaded", async () => {
     const wk = window.__avuState?.currentWeek ?? w;
     try {
       await runNotebook("AVU_ignition_1.ipynb", yr, wk, /* filters */ {});
-      await handleWeekYearChange(yr, wk);
     } catch (e) { console.error(e); }
   });
 
@@ -480,7 +501,6 @@ document.addEventListener("DOMContentLoaded", async () => {
     const filters = window.__avuFilters?.collectFilters?.() || {};
     try {
       await runNotebook("AVU_schedule_only.ipynb", yr, wk, filters);
-      await handleWeekYearChange(yr, wk);
     } catch (e) { console.error(e); }
   });
 });
@@ -599,12 +619,11 @@ async function devBootstrapFromSchedule() {
     const y = window.__avuState?.currentYear ?? (await isoNow()).year;
     const w = window.__avuState?.currentWeek ?? (await isoNow()).week;
 
-    const resp = await fetch(`/api/schedule?year=${y}&week=${w}`, { cache: "no-store" }).then(r => r.json()).catch(() => null);
+    const resp = await fetch(`/api/schedule?year=${y}&week=${w}`, { cache: "no-cache" }).then(r => r.json()).catch(() => null);
     const cal  = resp?.weekly_calendar || resp || {};
 
     try {
-      const idx = await fetch("/api/campaign_index", { cache: "no-store" }).then(r=>r.json());
-      window.__avuState.CAMPAIGN_INDEX = { by_id: idx?.by_id || {}, by_name: idx?.by_name || {} };
+      window.__avuState.CAMPAIGN_INDEX = await U.loadCampaignIndex();
     } catch {}
 
     Calendar.clearCalendar();
@@ -164,8 +164,15 @@ async function renderDefaultScheduleFromData(resp, { year, week } = {}) {
 
 let handleWeekYearChange;
 handleWeekYearChange = async function handleWeekYearChange(year, week) {
-  const url = `${U.URLS.schedule}?year=${year}&week=${week}`;
-  const resp = await U.getJSON(url);
+  let resp;
+  try {
+    const bundle = await U.getWeekBundle(year, week);
+    if (window.__avuState) U.mergeCampaignEntries(window.__avuState, bundle.campaign);
+    resp = bundle.schedule;
+    U.prefetchWeekBundles(year, week);
+  } catch {
+    resp = await U.getJSON(`${U.URLS.schedule}?year=${year}&week=${week}`);
+  }
   await renderDefaultScheduleFromData(resp, { year, week });
   applyAllDayColors(year, week);
 };
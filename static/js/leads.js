@@ -1,5 +1,5 @@
 // static/js/leads.js
-import { URLS, DAYS } from "./utils.js";
+import { URLS, DAYS, peekWeekBundle } from "./utils.js";
 import { renderWineIntoBox, addDropZoneListeners } from "./cards.js";
 import * as U from "./utils.js";
 
@@ -232,12 +232,16 @@ export async function renderLeadsFromData(items = []) {
 
 /* --------------------------------- Fetch ---------------------------------- */
 export async function getLeadsForWeek(year, week) {
+  const bundle = peekWeekBundle(year, week);  // already fetched with the week's schedule
+  if (bundle) {
+    try { return (await bundle).leads; } catch {}
+  }
   try {
-    const r = await fetch(`${URLS.leads}?year=${encodeURIComponent(year)}&week=${encodeURIComponent(week)}`, { cache: "no-store" });
+    const r = await fetch(`${URLS.leads}?year=${encodeURIComponent(year)}&week=${encodeURIComponent(week)}`, { cache: "no-cache" });
     if (r.ok) return r.json();
   } catch {}
   try {
-    const r2 = await fetch(`${URLS.leads}?week=${encodeURIComponent(week)}`, { cache: "no-store" });
+    const r2 = await fetch(`${URLS.leads}?week=${encodeURIComponent(week)}`, { cache: "no-cache" });
     if (r2.ok) return r2.json();
   } catch {}
   return null;
@@ -4,6 +4,7 @@ export const DAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturda
 
 export const URLS = {
   status: "/status",
+  statusStream: "/status/stream",
   runFull: "/run_full_engine",
   runNotebook: "/run_notebook",
   schedule: "/api/schedule",
@@ -12,7 +13,8 @@ export const URLS = {
   selectedWine: "/api/selected_wine",
   catalog: "/api/catalog",
   engineReady: "/engine_ready",
-  campaignIndex: "/api/campaign_index"
+  campaignIndex: "/api/campaign_index",
+  weekBundle: "/api/week_bundle"
 };
 
 // tiny DOM helpers
@@ -42,7 +44,7 @@ export const getWeekFromUI = () => $("#weekSelector")?.value ?? String(isoNowEur
 
 // HTTP
 export async function getJSON(url) {
-  const r = await fetch(url, { cache: "no-store" });
+  const r = await fetch(url, { cache: "no-cache" });  // revalidate: unchanged payloads come back as 304
   if (!r.ok) throw new Error(`${url} -> ${r.status}`);
   return r.json();
 }
@@ -56,6 +58,67 @@ export async function postJSON(url, body) {
   return r.json();
 }
 
+// Campaign index: local copy (localStorage) kept current with ?since=<version> deltas, dates dictionary-coded
+const CAMPAIGN_INDEX_STORE = "campaignIndex:v1";
+function decodeCampaignIndex(p) {
+  if (!Array.isArray(p?.dates)) return { by_id: p?.by_id || {}, by_name: p?.by_name || {} };
+  const dec = (m) => Object.fromEntries(Object.entries(m || {}).map(([k, i]) => [k, p.dates[i]]));
+  return { by_id: dec(p.by_id), by_name: dec(p.by_name) };
+}
+function mergeLatest(dst, src) {
+  for (const [k, v] of Object.entries(src)) if (!dst[k] || dst[k] < v) dst[k] = v;  // ISO dates
+  return dst;
+}
+export async function loadCampaignIndex() {
+  let local = null;
+  try { local = JSON.parse(localStorage.getItem(CAMPAIGN_INDEX_STORE)); } catch {}
+  const q = new URLSearchParams({ format: "compact" });
+  if (local?.version) q.set("since", local.version);
+  const p = await getJSON(`${URLS.campaignIndex}?${q}`);
+  const got = decodeCampaignIndex(p);
+  const idx = (p.full !== false || !local)
+    ? got
+    : { by_id: mergeLatest(local.by_id || {}, got.by_id), by_name: mergeLatest(local.by_name || {}, got.by_name) };
+  try { localStorage.setItem(CAMPAIGN_INDEX_STORE, JSON.stringify({ version: p.version, ...idx })); }
+  catch { try { localStorage.removeItem(CAMPAIGN_INDEX_STORE); } catch {} }  // over quota: full fetch next time
+  return idx;
+}
+
+// Week bundle: schedule + locks + leads + campaign entries in one request; neighbours prefetched
+// here (prefetchWeekBundles), which also warms the server's caches for them
+const weekBundles = new Map();  // "year-week" -> { p: Promise<bundle>, t: fetched at }
+const WEEK_BUNDLE_TTL_MS = 15000;   // a prefetched neighbour is reused this long, then revalidated
+function freshWeekBundle(key) {
+  const hit = weekBundles.get(key);
+  return hit && Date.now() - hit.t < WEEK_BUNDLE_TTL_MS ? hit.p : null;
+}
+export function getWeekBundle(year, week) {
+  const key = `${year}-${week}`;
+  const hit = freshWeekBundle(key);
+  if (hit) return hit;
+  const q = new URLSearchParams({ year, week });
+  const p = getJSON(`${URLS.weekBundle}?${q}`);
+  p.catch(() => weekBundles.delete(key));
+  weekBundles.set(key, { p, t: Date.now() });
+  return p;
+}
+export function peekWeekBundle(year, week) {  // same TTL as getWeekBundle: stale → null, caller refetches
+  return freshWeekBundle(`${year}-${week}`);
+}
+export function clearWeekBundles() {  // after a run rewrote schedules
+  weekBundles.clear();
+}
+export function prefetchWeekBundles(year, week) {
+  for (const w of [week - 1, week + 1]) {
+    if (w >= 1 && w <= 53) getWeekBundle(year, w).catch(() => {});
+  }
+}
+export function mergeCampaignEntries(state, entries) {
+  const ci = state.CAMPAIGN_INDEX || (state.CAMPAIGN_INDEX = { by_id: {}, by_name: {} });
+  mergeLatest(ci.by_id || (ci.by_id = {}), entries?.by_id || {});
+  mergeLatest(ci.by_name || (ci.by_name = {}), entries?.by_name || {});
+}
+
 // touch helper
 export function addLongPress(el, handler, ms=450) {
   let t=null;
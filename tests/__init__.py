@@ -0,0 +1 @@
+# tests/ — parity of the vectorized engines with the notebook code they replaced (python -m pytest tests)
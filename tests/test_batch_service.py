@@ -0,0 +1,406 @@
+# tests/test_batch_service.py — a batch-planned week against the single-week schedule-only pipeline
+from __future__ import annotations
+from datetime import date, datetime, timedelta
+import json
+
+import pandas as pd
+import pytest
+
+from benchmarks.datagen import make_clients, make_stock
+from services.batch_service import DAY_OCCASION, DAY_TIERS, normalize_filters, prepare_pool, run_batch
+from utils.week_scheduler import WeekScheduler
+from utils.week_style import MAX_ULTRA, ultra_cap
+
+DAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+NUM_SLOTS = 5
+
+def legacy_style_cell(base_week, LOCKED_CALENDAR, UI_FILTERS, HISTORY_MAP, BLOCKED_IDS, BLOCKED_KEYS):
+    # AVU_schedule_only cell 5 ("CELL 6: Build schedule (style/day aware)") before utils/week_style (logic verbatim)
+    def _mk_key(it):
+        return (str(it.get("id") or "").strip()
+                or f"{(it.get('wine') or '').strip()}::{(it.get('vintage') or 'NV').strip()}")
+
+    def _val(*candidates, default=None):
+        for c in candidates:
+            if c is not None and c != "":
+                return c
+        return default
+
+    def _price_tier_of(it):
+        return _val(it.get("price_tier_bucket"), it.get("price_bucket"), it.get("price_category"),
+                    it.get("price_tier"), it.get("priceTier"), it.get("tier"), default="")
+
+    def _stock_of(it):
+        v = _val(it.get("stock"), it.get("stock_count"), it.get("qty"), it.get("quantity"))
+        try:
+            return int(v)
+        except Exception:
+            return None
+
+    def _type_name_of(it):
+        s = (it.get("full_type") or it.get("type") or "").lower()
+        name = (it.get("wine") or it.get("name") or "").lower()
+        return s, name
+
+    def _matches_filters(it, f):
+        if f.get("last_stock"):
+            thr = int(f.get("last_stock_threshold") or 10)
+            st = _stock_of(it)
+            if st is None or not (st <= thr):
+                return False
+        ptb = (f.get("price_tier_bucket") or "").strip()
+        if ptb and _price_tier_of(it) != ptb:
+            return False
+        wt = f.get("wine_type")
+        if wt:
+            want = str(wt).lower()
+            s, name = _type_name_of(it)
+            matched = (
+                want in s
+                or (want == "rosé" and ("rose" in s or "rosé" in s))
+                or (want == "rose" and ("rosé" in s or "rose" in s))
+                or (want == "red" and ("red" in s or "bordeaux" in name))
+                or (want == "sparkling" and any(k in s for k in ["spark", "champ", "cava", "prosecco", "spumante"]))
+            )
+            if not matched:
+                return False
+        return True
+
+    STYLE = (UI_FILTERS.get("style") or "default").strip().lower()
+    STYLE_CAT  = STYLE == "cat"
+    STYLE_NIGO = STYLE == "nigo"
+    DAY_TIER_PREF_CAT = {
+        "Monday":   ["Mid-range","Premium"], "Tuesday":  ["Premium","Luxury"], "Wednesday":["Premium","Luxury"],
+        "Thursday": ["Premium","Luxury","Ultra Luxury"], "Friday":   ["Luxury","Ultra Luxury"],
+        "Saturday": ["Luxury","Ultra Luxury"], "Sunday":   ["Mid-range","Premium"]
+    }
+    DAY_TIER_PREF_NIGO = {
+        "Monday":   ["Budget","Mid-range"], "Tuesday":  ["Mid-range","Premium"], "Wednesday":["Premium"],
+        "Thursday": ["Premium"], "Friday":   ["Premium","Luxury"], "Saturday": ["Premium","Luxury"],
+        "Sunday":   ["Budget","Mid-range","Premium"]
+    }
+    DAY_TIER_PREF = DAY_TIER_PREF_CAT if STYLE_CAT else (DAY_TIER_PREF_NIGO if STYLE_NIGO else {
+        d:["Budget","Mid-range","Premium","Luxury","Ultra Luxury"] for d in DAYS
+    })
+    COOLDOWN_DAYS = 7 if STYLE_CAT else (35 if STYLE_NIGO else 21)
+    MAX_ULTRA     = 3 if STYLE_CAT else (1 if STYLE_NIGO else 2)
+
+    def _last_campaign_dt(it):
+        id_  = str(it.get("id") or "").strip()
+        key  = id_ or f"{(it.get('wine') or '').strip()}::{(it.get('vintage') or 'NV').strip()}"
+        iso  = (HISTORY_MAP.get(key, {}) or {}).get("last_campaign_date") or it.get("last_campaign_date") or ""
+        try:
+            return datetime.fromisoformat(iso) if iso else None
+        except Exception:
+            return None
+
+    def _is_ultra(it):
+        return (_price_tier_of(it) or "").strip() == "Ultra Luxury"
+
+    def _style_base_score(it):
+        base = 0.0
+        mq = str(it.get("match_quality") or "").lower()
+        if "exact" in mq:  base += 3.0
+        elif "high" in mq: base += 2.0
+        elif "history" in mq: base += 0.8
+        try:
+            base += 0.5 * float(it.get("avg_cpi_score") or 0)
+        except Exception:
+            pass
+        stock = _stock_of(it) or 0
+        stock_norm = max(0.0, min(1.0, stock/150))
+        base += (1.4 if STYLE_CAT else 0.3) * stock_norm
+        tier = _price_tier_of(it)
+        if STYLE_CAT:
+            if tier in ("Luxury","Ultra Luxury"): base += 0.6
+            elif tier == "Premium":               base += 0.4
+            elif tier == "Mid-range":             base += 0.2
+        elif STYLE_NIGO:
+            if tier == "Premium":                 base += 0.5
+            elif tier == "Luxury":                base += 0.2
+            elif tier == "Ultra Luxury":          base -= 0.3
+            elif tier == "Budget":                base += 0.1
+        dt = _last_campaign_dt(it)
+        if dt:
+            age_days = max(0, (datetime.now() - dt).days)
+            strength = 1.8 if STYLE_NIGO else (0.6 if STYLE_CAT else 1.0)
+            penalty = max(0.0, strength * (1.0 - min(age_days, COOLDOWN_DAYS)/COOLDOWN_DAYS))
+            base -= penalty
+        return base
+
+    def _day_adjust_score(it, day, region_counts):
+        s = 0.0
+        if _price_tier_of(it) in DAY_TIER_PREF.get(day, []):
+            s += 0.35 if STYLE_CAT else 0.45
+        reg = str(it.get("region_group") or "").strip().lower()
+        if STYLE_NIGO and reg:
+            used = region_counts.get(reg, 0)
+            if used >= 2:
+                s -= 0.4 + 0.2*(used-2)
+        return s
+
+    def _best_for_day(day, pool_list, used_keys, ultra_used, region_counts):
+        best_idx, best_score, best_item = None, -1e9, None
+        for i, it in enumerate(pool_list):
+            if _is_ultra(it) and ultra_used >= MAX_ULTRA:
+                continue
+            s = _style_base_score(it) + _day_adjust_score(it, day, region_counts)
+            if s > best_score:
+                best_idx, best_score, best_item = i, s, it
+        return best_idx, best_item
+
+    out = {d: [None]*NUM_SLOTS for d in DAYS}
+    used_keys = set()
+    ultra_used = 0
+    region_counts = {}
+    for day in DAYS:
+        slots = (LOCKED_CALENDAR or {}).get(day) or []
+        for idx, it in enumerate(slots[:NUM_SLOTS]):
+            if not it:
+                continue
+            item = {
+                "id": it.get("id") or "", "wine": it.get("wine") or it.get("name") or "Unknown",
+                "vintage": it.get("vintage") or "NV", "full_type": it.get("full_type") or it.get("type") or "",
+                "region_group": it.get("region_group") or "", "price_tier": _price_tier_of(it) or "",
+                "stock": _stock_of(it), "match_quality": it.get("match_quality") or "Locked",
+                "avg_cpi_score": it.get("avg_cpi_score") or 0, "locked": True,
+                "last_campaign_date": it.get("last_campaign_date") or "",
+            }
+            out[day][idx] = item
+            used_keys.add(_mk_key(item))
+            if _is_ultra(item): ultra_used += 1
+            reg = str(item.get("region_group") or "").strip().lower()
+            if reg: region_counts[reg] = region_counts.get(reg, 0) + 1
+    pool = []
+    for d in DAYS:
+        for it in base_week.get(d, []):
+            if not _matches_filters(it, UI_FILTERS):
+                continue
+            kid = str(it.get("id") or "").strip()
+            key = _mk_key(it)
+            if (kid and kid in BLOCKED_IDS) or (key and key in BLOCKED_KEYS):
+                continue
+            if key in used_keys:
+                continue
+            pool.append(it)
+    for day in DAYS:
+        for slot in range(NUM_SLOTS):
+            if out[day][slot] is not None:
+                continue
+            idx, cand = _best_for_day(day, pool, used_keys, ultra_used, region_counts)
+            if idx is None or cand is None:
+                break
+            pool.pop(idx)
+            item = {
+                "id": cand.get("id") or "", "wine": cand.get("wine") or cand.get("name") or "Unknown",
+                "vintage": cand.get("vintage") or "NV", "full_type": cand.get("full_type") or cand.get("type") or "",
+                "region_group": cand.get("region_group") or "", "price_tier": _price_tier_of(cand),
+                "stock": _stock_of(cand), "match_quality": cand.get("match_quality") or "Auto",
+                "avg_cpi_score": cand.get("avg_cpi_score") or 0, "locked": bool(cand.get("locked", False)),
+                "last_campaign_date": cand.get("last_campaign_date") or "",
+            }
+            out[day][slot] = item
+            used_keys.add(_mk_key(item))
+            if _is_ultra(item): ultra_used += 1
+            reg = str(item.get("region_group") or "").strip().lower()
+            if reg: region_counts[reg] = region_counts.get(reg, 0) + 1
+    return {d: [x for x in out[d] if x is not None] for d in DAYS}
+
+def legacy_strict_cell(base_week, LOCKED_CALENDAR, UI_FILTERS, HISTORY_MAP, BLOCKED_IDS, BLOCKED_KEYS):
+    # AVU_schedule_only cell 6 ("CELL 7: Fill & persist (strict-pool)") before utils/week_style (logic verbatim,
+    # placed items trimmed to the fields compared)
+    STYLE = (UI_FILTERS.get("style") or "default").strip().lower()
+
+    def _mk_key(it):
+        i = str(it.get("id") or "").strip()
+        return i or f"{(it.get('wine') or '').strip()}::{(it.get('vintage') or 'NV').strip()}"
+
+    def _tier(it):
+        return (it.get("price_tier") or it.get("price_tier_bucket") or "").strip()
+
+    def _stock(it):
+        try:
+            return int(float(it.get("stock", 0)))
+        except Exception:
+            return 0
+
+    def _type_str(it):
+        return (it.get("full_type") or it.get("type") or "").lower()
+
+    def _last_campaign_dt(it):
+        id_  = str(it.get("id") or "").strip()
+        key  = id_ or f"{(it.get('wine') or '').strip()}::{(it.get('vintage') or 'NV').strip()}"
+        iso  = (HISTORY_MAP.get(key, {}) or {}).get("last_campaign_date") or it.get("last_campaign_date") or ""
+        try:
+            return datetime.fromisoformat(iso) if iso else None
+        except Exception:
+            return None
+
+    def _match_filters(it, f):
+        pts = set((f.get("price_tiers") or []))
+        ptb = (f.get("price_tier_bucket") or "").strip()
+        if ptb:
+            pts.add(ptb)
+        if pts and _tier(it) not in pts:
+            return False
+        wt = (f.get("wine_type") or "").strip().lower()
+        if wt and wt not in _type_str(it):
+            return False
+        if f.get("last_stock"):
+            thr = int(f.get("last_stock_threshold") or 10)
+            if not (0 < _stock(it) <= thr):
+                return False
+        else:
+            if _stock(it) < 6:
+                return False
+        return True
+
+    def _day_pref(day):
+        if STYLE == "cat":
+            return {
+                "Monday":["Mid-range","Premium"], "Tuesday":["Premium","Luxury"],
+                "Wednesday":["Premium","Luxury"], "Thursday":["Premium","Luxury","Ultra Luxury"],
+                "Friday":["Luxury","Ultra Luxury"], "Saturday":["Luxury","Ultra Luxury"],
+                "Sunday":["Mid-range","Premium"]
+            }.get(day, [])
+        if STYLE == "nigo":
+            return {
+                "Monday":["Budget","Mid-range"], "Tuesday":["Mid-range","Premium"],
+                "Wednesday":["Premium"], "Thursday":["Premium"],
+                "Friday":["Premium","Luxury"], "Saturday":["Premium","Luxury"],
+                "Sunday":["Budget","Mid-range","Premium"]
+            }.get(day, [])
+        return ["Budget","Mid-range","Premium","Luxury","Ultra Luxury"]
+
+    def _score(it, day):
+        base = float(it.get("avg_cpi_score") or 0) * 0.5
+        if _tier(it) in _day_pref(day):
+            base += 0.4
+        dt = _last_campaign_dt(it)
+        if dt:
+            age = max(0, (datetime.now() - dt).days)
+            cool = 7 if STYLE == "cat" else (35 if STYLE == "nigo" else 21)
+            penalty = max(0.0, (1.2 if STYLE == "nigo" else 0.6) * (1.0 - min(age, cool)/cool))
+            base -= penalty
+        s = _stock(it)
+        base += (1.2 if STYLE == "cat" else 0.3) * min(1.0, s/150.0)
+        return base
+
+    POOL = []
+    for day in DAYS:
+        for it in base_week.get(day, []):
+            if not _match_filters(it, UI_FILTERS):
+                continue
+            kid = str(it.get("id") or "").strip()
+            key = _mk_key(it)
+            if (kid and kid in BLOCKED_IDS) or (key and key in BLOCKED_KEYS):
+                continue
+            POOL.append(it)
+    locked = LOCKED_CALENDAR or {}
+    out = {d: [None]*NUM_SLOTS for d in DAYS}
+    used = set()
+    for day in DAYS:
+        slots = locked.get(day) or []
+        for idx, it in enumerate(slots[:NUM_SLOTS]):
+            if not it:
+                continue
+            item = {"id": it.get("id") or "", "wine": it.get("wine") or it.get("name") or "Unknown",
+                    "vintage": it.get("vintage") or "NV", "locked": True}
+            out[day][idx] = item
+            used.add(_mk_key(item))
+    for day in DAYS:
+        for s in range(NUM_SLOTS):
+            if out[day][s] is not None:
+                continue
+            best_i, best_sc = None, -1e9
+            for i, it in enumerate(POOL):
+                k = _mk_key(it)
+                if k in used:
+                    continue
+                sc = _score(it, day)
+                if sc > best_sc:
+                    best_i, best_sc = i, sc
+            if best_i is None:
+                break
+            it = POOL.pop(best_i)
+            out[day][s] = {"id": it.get("id") or "", "wine": it.get("wine") or it.get("name") or "Unknown",
+                           "vintage": it.get("vintage") or "NV", "locked": bool(it.get("locked", False))}
+            used.add(_mk_key(out[day][s]))
+    return out
+
+def single_week(stock, clients, filters, locks, history_map, year, week):
+    """What one schedule-only run makes of `week`: cell 4's WeekScheduler picks, then cells 5 and 6."""
+    f = normalize_filters(filters)
+    pool = prepare_pool(stock, clients, f)
+    cut = datetime.today() - timedelta(days=365)
+    seasonal = pd.to_datetime(pool["OMT last offer date"], errors="coerce").between(cut, cut + timedelta(days=7)).to_numpy()
+    slots = {d: [None] * NUM_SLOTS for d in DAYS}
+    used_ids, used_keys = set(), set()
+    for d in DAYS:
+        for idx, it in enumerate(locks.get(d) or []):
+            if it:
+                slots[d][int(it.get("slot", idx))] = it
+                used_ids.add(it["id"])
+                used_keys.add(it["id"])
+    free = {d: sum(x is None for x in slots[d]) for d in DAYS}
+    picks = WeekScheduler(pool, DAY_TIERS, DAY_OCCASION, seasonal).plan(
+        DAYS, free, used_ids=used_ids, used_keys=used_keys, ultra_cap=ultra_cap(f["style"], locks))
+    for d in DAYS:
+        open_idx = [j for j in range(NUM_SLOTS) if slots[d][j] is None]
+        for j, (_, r) in zip(open_idx, picks[d].iterrows()):
+            slots[d][j] = {"id": r["id"], "wine": r["wine"], "vintage": r["vintage"], "full_type": r["full_type"],
+                           "region_group": r["region_group"], "stock": int(r["stock"]),
+                           "price_tier": r["price_tier"], "locked": False}
+    weekly_calendar = {d: [x for x in slots[d] if x] for d in DAYS}
+    blocked = (set(f["blocked_ids"]), set(f["blocked_keys"]))
+    styled = legacy_style_cell(weekly_calendar, locks, f, history_map, *blocked)
+    return legacy_strict_cell(styled, locks, f, history_map, *blocked)
+
+def _ids(cal):
+    return {d: [(x or {}).get("id") or None for x in cal[d]] for d in DAYS}
+
+@pytest.fixture
+def iron(tmp_path):
+    stock, clients = make_stock(600, seed=7), make_clients(3000, seed=7)
+    stock.to_pickle(tmp_path / "stock_df_final.pkl")
+    clients.to_pickle(tmp_path / "client_pref_df_latest.pkl")
+    # recent campaigns: inside every style's recency penalty, outside the batch's cooldown window
+    recent = stock.sample(120, random_state=3)
+    history = {r["id"]: {"wine": r["wine"], "vintage": r["vintage"],
+                         "last_campaign_date": (date.today() - timedelta(days=1 + i % 30)).isoformat()}
+               for i, r in enumerate(recent.to_dict("records"))}
+    (tmp_path / "history").mkdir()
+    (tmp_path / "history" / "wine_campaign_history.json").write_text(json.dumps(history), encoding="utf-8")
+    ultra = stock[(stock["price_tier"] == "Ultra Luxury") & (stock["stock"] >= 6)].iloc[0]
+    other = stock[(stock["price_tier"] == "Premium") & (stock["stock"] >= 6)].iloc[0]
+    lock = lambda r, s: {"id": r["id"], "wine": r["wine"], "vintage": r["vintage"], "full_type": r["full_type"],
+                         "region_group": r["region_group"], "stock": int(r["stock"]), "price_tier": r["price_tier"],
+                         "slot": s, "locked": True}
+    locks = {"Tuesday": [None, lock(other, 1)], "Friday": [lock(ultra, 0)]}
+    (tmp_path / "locked_weeks").mkdir()
+    (tmp_path / "locked_weeks" / f"locked_calendar_{date.today().year + 1}_week_10.json").write_text(
+        json.dumps(locks), encoding="utf-8")
+    return tmp_path, stock, clients, locks, history
+
+@pytest.mark.parametrize("style", ["default", "cat", "nigo"])
+def test_batch_week_matches_single_week_run(iron, style):
+    path, stock, clients, locks, history = iron
+    year, filters = date.today().year + 1, {"style": style}
+    run_batch(path, year, [10, 11, 12], filters)
+    got = json.loads((path / f"weekly_campaign_schedule_{year}_week_10.ui.json").read_text(encoding="utf-8"))
+    want = single_week(stock, clients, filters, locks, history, year, 10)
+    assert _ids(got["weekly_calendar"]) == _ids(want)
+
+@pytest.mark.parametrize("style", ["default", "cat", "nigo"])
+def test_batch_weeks_keep_the_style_ultra_cap(iron, style):
+    path, stock, *_ = iron
+    year = date.today().year + 1
+    run_batch(path, year, [10, 11, 12], {"style": style})
+    tiers = dict(zip(stock["id"], stock["price_tier"]))
+    seen = []
+    for week in (10, 11, 12):
+        cal = json.loads((path / f"weekly_campaign_schedule_{year}_week_{week}.ui.json").read_text(encoding="utf-8"))
+        ids = [x["id"] for d in DAYS for x in cal["weekly_calendar"][d] if x]
+        assert sum(tiers[i] == "Ultra Luxury" for i in ids) <= MAX_ULTRA[style]
+        seen += ids
+    assert len(seen) == len(set(seen))  # no wine twice across the range
@@ -0,0 +1,89 @@
+# tests/test_cpi_store.py — CPIStore.top_k / _select against a plain argsort top-k on a seeded matrix with ties
+from __future__ import annotations
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cpi_store import META_NAME, CPIStore
+
+N_CLIENTS, N_WINES = 37, 23
+GROUPS = np.array(["Red", "White", "Rosé", "Sparkling"], dtype=object)
+
+@pytest.fixture
+def store(tmp_path):
+    rng = np.random.default_rng(11)
+    # quarter steps in [0, 1]: every row has many equal scores, also across a top-k boundary
+    scores = (rng.integers(0, 5, (N_CLIENTS, N_WINES)) / 4).astype(np.float32)
+    np.save(tmp_path / "scores_1.npy", scores)
+    np.save(tmp_path / "wine_avg_1.npy", scores.mean(axis=0))
+    meta = {"scores": "scores_1.npy", "wine_avg": "wine_avg_1.npy",
+            "columns": [f"pref_cpi_for_C{i:03d}" for i in range(N_CLIENTS)],
+            "wine_ids": [f"W{j:02d}" for j in range(N_WINES)]}
+    (tmp_path / META_NAME).write_text(json.dumps(meta), encoding="utf-8")
+    return CPIStore(tmp_path, meta), scores
+
+def argsort_top_k(scores, k, cols, label=None) -> list[tuple]:
+    """Score desc, ties by matrix position: a stable argsort over ascending positions."""
+    cols = np.asarray(sorted(cols), dtype=int)
+    out = []
+    for i, row in enumerate(scores):
+        best = cols[np.argsort(-row[cols], kind="stable")[:k]]
+        for rank, j in enumerate(best, start=1):
+            rec = (f"C{i:03d}", f"W{j:02d}", round(float(row[j]), 4), rank)
+            out.append(rec if label is None else rec[:2] + (label,) + rec[2:])
+    return out
+
+def records(df: pd.DataFrame) -> list[tuple]:
+    return [tuple(r) for r in df.itertuples(index=False)]
+
+@pytest.mark.parametrize("k", [1, 3, 5, N_WINES, N_WINES + 4])
+@pytest.mark.parametrize("block_size", [8, 1024])
+def test_top_k_matches_argsort(store, k, block_size):
+    st, scores = store
+    got = st.top_k(k, block_size=block_size)
+    assert list(got.columns) == ["customer_no", "id", "cpi_score", "rank"]
+    assert records(got) == argsort_top_k(scores, k, range(N_WINES))
+
+@pytest.mark.parametrize("k", [1, 2, 4])
+def test_top_k_per_group_matches_argsort(store, k):
+    st, scores = store
+    groups = GROUPS[np.arange(N_WINES) % len(GROUPS)]
+    got = st.top_k(k, groups=groups, block_size=10)
+    assert list(got.columns) == ["customer_no", "id", "group", "cpi_score", "rank"]
+    want = []
+    for label in sorted(set(groups)):
+        want += argsort_top_k(scores, k, np.flatnonzero(groups == label), label)
+    key = lambda r: (r[0], r[2], r[4])  # client, group, rank
+    assert sorted(records(got), key=key) == sorted(want, key=key)
+
+def test_top_k_wines_filter(store):
+    st, scores = store
+    wines = [17, 3, 3, 9, 0, 22, 12, 5]  # unordered, with a duplicate
+    got = st.top_k(3, wines=wines)
+    assert records(got) == argsort_top_k(scores, 3, set(wines))
+    assert set(got["id"]) <= {f"W{j:02d}" for j in wines}
+
+def test_top_k_wines_filter_with_groups(store):
+    st, scores = store
+    groups = GROUPS[np.arange(N_WINES) % len(GROUPS)]
+    wines = [1, 2, 5, 6, 9, 13, 14, 21]  # Sparkling is absent: no rows for it
+    got = st.top_k(2, wines=wines, groups=groups)
+    want = []
+    for label in sorted(set(groups[wines])):
+        want += argsort_top_k(scores, 2, [j for j in wines if groups[j] == label], label)
+    key = lambda r: (r[0], r[2], r[4])
+    assert sorted(records(got), key=key) == sorted(want, key=key)
+    assert "Sparkling" not in set(got["group"])
+
+def test_top_k_empty_candidates(store):
+    st, _ = store
+    got = st.top_k(3, wines=[])
+    assert got.empty and list(got.columns) == ["customer_no", "id", "cpi_score", "rank"]
+
+def test_select_breaks_boundary_ties_by_position():
+    block = np.array([[0.5, 1.0, 0.5, 0.5, 1.0, 0.25]], dtype=np.float32)
+    cols = np.array([0, 2, 3, 4, 5])
+    pos, vals = CPIStore._select(block, cols, 3)
+    assert pos.tolist() == [[4, 0, 2]] and vals.tolist() == [[1.0, 0.5, 0.5]]
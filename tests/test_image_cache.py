@@ -0,0 +1,103 @@
+# tests/test_image_cache.py — utils.image_cache.ImageCache against a stub search backend
+from __future__ import annotations
+import threading, time
+
+import pytest
+
+from utils.image_cache import ImageCache, image_query
+
+DEFAULT = "default.jpg"
+WINE = ("Château Test", "Bordeaux", "2015", 750)
+
+class Clock:
+    def __init__(self):
+        self.t = 1_000_000.0
+
+    def __call__(self):
+        return self.t
+
+class StubBackend:
+    """query → answers[query]; an Exception value is raised. Counts calls; `gate` holds calls back."""
+    def __init__(self, answers=None, default=None, gate: threading.Event | None = None):
+        self.answers, self.default, self.gate = dict(answers or {}), default, gate
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, query):
+        with self._lock:
+            self.calls.append(query)
+        if self.gate is not None:
+            self.gate.wait(5)
+        ans = self.answers.get(query, self.default)
+        if isinstance(ans, Exception):
+            raise ans
+        return ans
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def make(tmp_path, backend, clock):
+    return ImageCache(tmp_path / "images.sqlite", backend, DEFAULT, ttl=100, miss_ttl=50, error_ttl=10, clock=clock)
+
+def test_found_image_is_served_from_cache_until_ttl(tmp_path, clock):
+    be = StubBackend({image_query(*WINE): "bottle.jpg"})
+    cache = make(tmp_path, be, clock)
+    assert cache.resolve(*WINE) == "bottle.jpg"
+    clock.t += 99
+    assert cache.resolve(*WINE) == "bottle.jpg"
+    assert len(be.calls) == 1 and cache.stats["hits"] == 1
+    clock.t += 2  # past ttl → asked again
+    assert cache.resolve(*WINE) == "bottle.jpg"
+    assert len(be.calls) == 2 and cache.stats["fetches"] == 2
+
+def test_miss_is_cached_for_miss_ttl(tmp_path, clock):
+    be = StubBackend(default=None)
+    cache = make(tmp_path, be, clock)
+    assert cache.resolve(*WINE) == DEFAULT
+    clock.t += 49
+    assert cache.resolve(*WINE) == DEFAULT
+    assert len(be.calls) == 1 and cache.stats["misses_cached"] == 1
+    be.default = "late.jpg"
+    clock.t += 2
+    assert cache.resolve(*WINE) == "late.jpg"
+    assert len(be.calls) == 2
+
+def test_error_is_cached_for_error_ttl(tmp_path, clock):
+    be = StubBackend(default=RuntimeError("quota"))
+    cache = make(tmp_path, be, clock)
+    assert cache.resolve(*WINE) == DEFAULT
+    clock.t += 9
+    assert cache.resolve(*WINE) == DEFAULT
+    assert len(be.calls) == 1 and cache.stats["errors"] == 1
+    be.default = "bottle.jpg"
+    clock.t += 2  # short error ttl: retried long before a miss would be
+    assert cache.resolve(*WINE) == "bottle.jpg"
+    assert len(be.calls) == 2
+
+def test_concurrent_lookups_of_one_wine_share_one_backend_call(tmp_path, clock):
+    gate = threading.Event()
+    be = StubBackend({image_query(*WINE): "bottle.jpg"}, gate=gate)
+    cache = make(tmp_path, be, clock)
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(cache.resolve(*WINE))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while not be.calls:  # the owner is inside the backend; the others find its in-flight future
+        time.sleep(0.01)
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join(5)
+    assert out == ["bottle.jpg"] * 8
+    assert len(be.calls) == 1
+    assert cache.stats["fetches"] == 1 and cache.stats["errors"] == 0
+
+def test_prefetch_resolves_each_distinct_wine_once(tmp_path, clock):
+    other = ("Other", "Rhône", "NV", 1500)
+    be = StubBackend({image_query(*WINE): "bottle.jpg"}, default=None)
+    cache = make(tmp_path, be, clock)
+    out = cache.prefetch([WINE, other, WINE, other], concurrency=4)
+    assert sorted(out.values()) == sorted(["bottle.jpg", DEFAULT])
+    assert len(be.calls) == 2
+    assert sum(cache.stats.values()) == 2
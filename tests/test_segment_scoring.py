@@ -0,0 +1,71 @@
+# tests/test_segment_scoring.py — utils.segment_scoring against the two row-wise notebook versions
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.segment_scoring import SegmentScorer, segment_scores
+
+def legacy_match_score(stock_df, seg_df):
+    # AVU_ignition_1 get_seasonal_wines_modular: exact values, incomplete client pairs dropped
+    seg = seg_df[['region_group','full_type']].dropna()
+    def match_score(row):
+        return int(((seg['region_group'] == row['region_group']) & (seg['full_type'] == row['full_type'])).sum()) if not seg.empty else 0
+    return stock_df.apply(match_score, axis=1) if not stock_df.empty else 0
+
+def legacy_segment_score(stock_df, client_pref_df):
+    # AVU_schedule_only cell 4: str().strip().casefold() on both sides
+    def _norm(s):
+        return str(s or "").strip().casefold()
+    if not client_pref_df.empty:
+        rg_series = client_pref_df.get("region_group")
+        ft_series = client_pref_df.get("full_type")
+        rg_series = rg_series.astype(str).fillna("").map(_norm) if rg_series is not None else pd.Series([""]*len(client_pref_df))
+        ft_series = ft_series.astype(str).fillna("").map(_norm) if ft_series is not None else pd.Series([""]*len(client_pref_df))
+        seg_counts = pd.DataFrame({"rg": rg_series, "ft": ft_series}).value_counts().to_dict()
+    else:
+        seg_counts = {}
+    def _segment_score(row):
+        return int(seg_counts.get((_norm(row.get("region_group")), _norm(row.get("full_type"))), 0))
+    return 0 if not seg_counts else stock_df.apply(_segment_score, axis=1)
+
+REGIONS = ["Bordeaux", "bordeaux", " Bordeaux ", "BURGUNDY", "Burgundy", "Rhône", "rhône ", "Italy", None, np.nan, ""]
+TYPES = ["Red", "red", " Red", "White", "WHITE ", "Sparkling White", "Rosé", None, np.nan, ""]
+
+def _frame(rng, n):
+    return pd.DataFrame({
+        "region_group": pd.Series([REGIONS[i] for i in rng.integers(0, len(REGIONS), n)], dtype=object),
+        "full_type": pd.Series([TYPES[i] for i in rng.integers(0, len(TYPES), n)], dtype=object),
+        "stock": rng.integers(0, 50, n),
+    })
+
+@pytest.mark.parametrize("seed", range(5))
+def test_exact_matches_ignition(seed):
+    rng = np.random.default_rng(seed)
+    stock, seg = _frame(rng, 400), _frame(rng, 900)
+    stock.index = rng.permutation(len(stock)) + 1000
+    got = segment_scores(stock, seg, normalize=False)
+    want = legacy_match_score(stock, seg)
+    assert got.tolist() == want.tolist()
+    assert got.index.equals(stock.index)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_normalized_matches_schedule_only(seed):
+    rng = np.random.default_rng(100 + seed)
+    stock, seg = _frame(rng, 400), _frame(rng, 900)
+    got = segment_scores(stock, seg, normalize=True)
+    want = legacy_segment_score(stock, seg)
+    assert got.tolist() == want.tolist()
+
+@pytest.mark.parametrize("normalize", [False, True])
+def test_empty_segment_scores_zero(normalize):
+    stock = _frame(np.random.default_rng(1), 50)
+    got = segment_scores(stock, stock.iloc[:0], normalize=normalize)
+    assert (got == 0).all() and len(got) == len(stock)
+
+def test_add_remove_equals_rebuild():
+    rng = np.random.default_rng(9)
+    stock, seg = _frame(rng, 300), _frame(rng, 600)
+    scorer = SegmentScorer(stock, normalize=True).set_segment(seg.iloc[:400])
+    scorer.add(seg.iloc[400:]).remove(seg.iloc[:100])
+    assert scorer.scores().tolist() == segment_scores(stock, seg.iloc[100:], normalize=True).tolist()
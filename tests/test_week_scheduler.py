@@ -0,0 +1,193 @@
+# tests/test_week_scheduler.py — utils.week_scheduler.WeekScheduler.plan against the notebooks' day-by-day pickers
+from __future__ import annotations
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.batch_service import DAY_OCCASION, DAY_TIERS
+from utils.week_scheduler import IGNITION_STEPS, WeekScheduler
+
+DAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+NUM_SLOTS = 5
+TIERS = ["Budget", "Mid-range", "Premium", "Luxury", "Ultra Luxury"]
+OCCASIONS = ["Casual", "casual", "Dinner", "DINNER", "Party", "Gifting", None]
+
+def _mk_key_from_row(row) -> str:
+    rid = str(row.get("id") or "").strip()
+    if rid:
+        return rid
+    nm = str(row.get("wine") or "").strip()
+    vt = str(row.get("vintage") or "NV").strip()
+    return f"{nm}::{vt}"
+
+def legacy_schedule_week(pool, locks, ultra_cap=None):
+    """AVU_schedule_only cell 4: _pick_for_day per day, used ids/keys carried across days (logic verbatim).
+
+    Two additions, both marked: the legacy picker had no Ultra cap (it is applied as the ignition
+    picker does), and its top-up could pick a row an earlier step of the same day already took —
+    the scheduler skips those on purpose (e789f6f)."""
+    used_ids = {str(it["id"]) for d in DAYS for it in locks.get(d, [])}
+    used_keys = {_mk_key_from_row(it) for d in DAYS for it in locks.get(d, [])}
+    ultra_used = 0
+
+    def _eligible(df, taken):
+        ids = df["id"].astype(str)
+        keys = df.apply(_mk_key_from_row, axis=1)
+        return df[(~ids.isin(used_ids)) & (~keys.isin(used_keys)) & (~df.index.isin(taken))]  # + taken
+
+    def _pick_for_day(day, free_slots):
+        if free_slots <= 0:
+            return pd.DataFrame(columns=pool.columns)
+        allowed_tiers = DAY_TIERS.get(day, [])
+        need = free_slots
+        capped = ultra_cap is not None and ultra_used >= ultra_cap  # + Ultra cap
+        no_ultra = (lambda df: df[df["price_tier"] != "Ultra Luxury"]) if capped else (lambda df: df)
+
+        cand = no_ultra(_eligible(pool[
+            (pool["occasion"].fillna("").str.lower() == DAY_OCCASION[day].lower()) &
+            (pool["price_tier"].isin(allowed_tiers))
+        ], []))
+        pick = cand.sort_values(["segment_score","stock"], ascending=[False, False]).head(need)
+        if len(pick) < need:
+            cand2 = no_ultra(_eligible(pool[(pool["price_tier"].isin(allowed_tiers))], pick.index))
+            extra = cand2.sort_values(["segment_score","stock"], ascending=[False, False]).head(need - len(pick))
+            pick = pd.concat([pick, extra])
+        if len(pick) < need and "OMT last offer date" in pool.columns:
+            seasonal = pool.copy()
+            seasonal["OMT last offer date"] = pd.to_datetime(seasonal["OMT last offer date"], errors="coerce")
+            cut_start = datetime.today() - timedelta(days=365)
+            cut_end = cut_start + timedelta(days=7)
+            seasonal = seasonal[seasonal["OMT last offer date"].between(cut_start, cut_end)]
+            cand3 = _eligible(seasonal, pick.index)
+            extra = cand3.sort_values(["segment_score","stock"], ascending=[False, False]).head(need - len(pick))
+            pick = pd.concat([pick, extra])
+        if len(pick) < need:
+            cand4 = _eligible(pool, pick.index)
+            extra = cand4.sort_values(["stock","segment_score"], ascending=[False, False]).head(need - len(pick))
+            pick = pd.concat([pick, extra])
+        return pick.head(free_slots)
+
+    out = {}
+    for day in DAYS:
+        picks = _pick_for_day(day, NUM_SLOTS - len(locks.get(day, [])))
+        for _, row in picks.iterrows():
+            if str(row.get("id") or "").strip():
+                used_ids.add(str(row.get("id") or "").strip())
+            used_keys.add(_mk_key_from_row(row))
+        if ultra_cap is not None and not picks.empty:
+            ultra_used = min(ultra_cap, ultra_used + int(picks["price_tier"].eq("Ultra Luxury").sum()))
+        out[day] = picks
+    return out
+
+def legacy_ignition_week(df, num_per_day=NUM_SLOTS):
+    # AVU_ignition_1 get_seasonal_wines_modular day loop (verbatim): first non-empty step wins,
+    # Ultra Luxury capped at 2 per week, no exclusion across days
+    ultra_cap = 2
+    ultra_used = 0
+    calendar = {}
+    for day in DAYS:
+        allowed_tiers = DAY_TIERS.get(day, [])
+        occasion = DAY_OCCASION.get(day, "Casual")
+        pool = df.copy()
+        cand = pool[(pool['occasion'].astype(str).str.casefold() == occasion.casefold()) &
+                    (pool['price_tier'].isin(allowed_tiers))]
+        if ultra_used >= ultra_cap:
+            cand = cand[cand['price_tier'] != "Ultra Luxury"]
+        sel = cand.sort_values(['segment_score','stock'], ascending=[False, False]).head(num_per_day)
+        if sel.empty:
+            cand2 = pool[pool['price_tier'].isin(allowed_tiers)]
+            if ultra_used >= ultra_cap:
+                cand2 = cand2[cand2['price_tier'] != "Ultra Luxury"]
+            sel = cand2.sort_values(['segment_score','stock'], ascending=[False, False]).head(num_per_day)
+        if sel.empty:
+            seasonal_only = pool.copy()
+            seasonal_only['OMT last offer date'] = pd.to_datetime(seasonal_only.get('OMT last offer date', pd.NaT), errors='coerce')
+            last_year = datetime.today() - timedelta(days=365)
+            next_week = last_year + timedelta(days=7)
+            fallback = seasonal_only[seasonal_only['OMT last offer date'].between(last_year, next_week)]
+            sel = fallback.sort_values('stock', ascending=False).head(num_per_day)
+        if sel.empty:
+            sel = pool.sort_values('stock', ascending=False).head(num_per_day)
+        if not sel.empty and "Ultra Luxury" in sel['price_tier'].values:
+            ultra_used = min(ultra_cap, ultra_used + (sel['price_tier'].eq("Ultra Luxury").sum()))
+        calendar[day] = sel
+    return calendar
+
+def make_pool(seed: int, n: int, tiers=TIERS, occasions=OCCASIONS) -> pd.DataFrame:
+    """Few segment scores (many ties), unique stock (single-key sorts have no ties to break),
+    some rows without id (keyed by wine::vintage), ~1/4 offered in last year's seasonal window."""
+    rng = np.random.default_rng(seed)
+    season = datetime.today() - timedelta(days=365) + timedelta(days=3)
+    ids = [f"W{i}" if rng.random() > 0.1 else "" for i in range(n)]
+    return pd.DataFrame({
+        "id": ids,
+        "wine": [f"Wine {i}" for i in range(n)],
+        "vintage": [str(v) for v in rng.integers(1990, 2022, n)],
+        "price_tier": rng.choice(tiers, n),
+        "occasion": pd.Series(rng.choice(np.array(occasions, dtype=object), n), dtype=object),
+        "segment_score": rng.integers(0, 4, n),
+        "stock": rng.permutation(n) + 6,
+        "OMT last offer date": [season if rng.random() < 0.25 else season - timedelta(days=60) for _ in range(n)],
+    })
+
+def seasonal_mask(pool):
+    cut = datetime.today() - timedelta(days=365)
+    return pd.to_datetime(pool["OMT last offer date"], errors="coerce").between(cut, cut + timedelta(days=7)).to_numpy()
+
+def ids_by_day(picks) -> dict:
+    return {d: [_mk_key_from_row(r) for _, r in picks[d].iterrows()] for d in DAYS}
+
+def lock(pool, positions) -> dict:
+    """{day: [locked rows]} from (day, pool position) pairs."""
+    locks = {}
+    for day, p in positions:
+        locks.setdefault(day, []).append(pool.iloc[p].to_dict())
+    return locks
+
+@pytest.mark.parametrize("seed,n", [(0, 30), (1, 60), (2, 200), (3, 800)])
+@pytest.mark.parametrize("cap", [None, 0, 1, 3])
+def test_schedule_plan_matches_pick_for_day(seed, n, cap):
+    pool = make_pool(seed, n)
+    got = WeekScheduler(pool, DAY_TIERS, DAY_OCCASION, seasonal_mask(pool)).plan(DAYS, {d: NUM_SLOTS for d in DAYS}, ultra_cap=cap)
+    assert ids_by_day(got) == ids_by_day(legacy_schedule_week(pool, {}, cap))
+
+@pytest.mark.parametrize("seed", [4, 5, 6])
+def test_schedule_plan_with_locks_matches_pick_for_day(seed):
+    pool = make_pool(seed, 120)
+    locks = lock(pool, [("Monday", 0), ("Monday", 7), ("Friday", 3), ("Sunday", 50)])
+    used_ids = {str(it["id"]) for d in DAYS for it in locks.get(d, [])}
+    used_keys = {_mk_key_from_row(it) for d in DAYS for it in locks.get(d, [])}
+    free = {d: NUM_SLOTS - len(locks.get(d, [])) for d in DAYS}
+    got = WeekScheduler(pool, DAY_TIERS, DAY_OCCASION, seasonal_mask(pool)).plan(
+        DAYS, free, used_ids=used_ids, used_keys=used_keys, ultra_cap=1)
+    want = legacy_schedule_week(pool, locks, 1)
+    assert ids_by_day(got) == ids_by_day(want)
+    locked = {_mk_key_from_row(it) for d in DAYS for it in locks.get(d, [])}
+    picked = [k for d in DAYS for k in ids_by_day(got)[d]]
+    assert not locked & set(picked) and len(picked) == len(set(picked))  # no_repeat, locks included
+    assert [len(got[d]) for d in DAYS] == [free[d] for d in DAYS]
+
+def test_schedule_top_up_walks_every_relaxation_step():
+    # a thin pool: no Tuesday tier at all, no Party/Gifting occasions → tier, seasonal and any all fill slots
+    pool = make_pool(7, 40, tiers=["Budget", "Luxury", "Ultra Luxury"], occasions=["Casual", "Dinner"])
+    got = WeekScheduler(pool, DAY_TIERS, DAY_OCCASION, seasonal_mask(pool)).plan(DAYS, {d: NUM_SLOTS for d in DAYS}, ultra_cap=1)
+    assert ids_by_day(got) == ids_by_day(legacy_schedule_week(pool, {}, 1))
+    assert sum(len(got[d]) for d in DAYS) == len(DAYS) * NUM_SLOTS
+
+@pytest.mark.parametrize("seed,n", [(0, 12), (1, 40), (2, 200), (8, 600)])
+def test_ignition_plan_matches_legacy_loop(seed, n):
+    # no_repeat=False: the same wine may come back on another day; ultra_cap=2 as in the notebook
+    pool = make_pool(seed, n)
+    got = WeekScheduler(pool, DAY_TIERS, DAY_OCCASION, seasonal_mask(pool)).plan(
+        DAYS, {d: NUM_SLOTS for d in DAYS}, steps=IGNITION_STEPS, top_up=False, no_repeat=False, ultra_cap=2)
+    assert ids_by_day(got) == ids_by_day(legacy_ignition_week(pool))
+
+def test_ignition_plan_repeats_across_days_without_no_repeat():
+    pool = make_pool(9, 15, tiers=["Premium", "Luxury"], occasions=["Dinner"])
+    got = WeekScheduler(pool, DAY_TIERS, DAY_OCCASION, seasonal_mask(pool)).plan(
+        DAYS, {d: NUM_SLOTS for d in DAYS}, steps=IGNITION_STEPS, top_up=False, no_repeat=False, ultra_cap=2)
+    picked = [k for d in DAYS for k in ids_by_day(got)[d]]
+    assert len(picked) > len(set(picked))
+    assert ids_by_day(got) == ids_by_day(legacy_ignition_week(pool))
@@ -0,0 +1,72 @@
+# utils/atomic_io.py — replace a file in one step, safe with several writers on the same path
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+import json, os, tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# mkstemp creates 0600 files; written files get the mode a plain open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def atomic_write(path, data: str | bytes, encoding: str = "utf-8") -> Path:
+    """Write `data` to a uniquely named temp file next to `path`, then os.replace it over `path`.
+
+    Readers see the old file or the new one, never a partial write; concurrent writers each
+    use their own temp file, so the last replace wins instead of one clobbering another's tmp.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    body = data.encode(encoding) if isinstance(data, str) else data
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(body)
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path
+
+@contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on `<path>.lock`, across processes."""
+    lock = Path(str(path) + ".lock")
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+def update_json(path, fn, indent: int = 2):
+    """Read-modify-write of a shared JSON file under file_lock: fn(data) edits the dict in place
+    (or returns a new one). Writers on other weeks no longer drop each other's entries."""
+    path = Path(path)
+    with file_lock(path):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        except Exception:
+            data = {}
+        res = fn(data)
+        data = data if res is None else res
+        atomic_write(path, json.dumps(data, indent=indent))
+    return data
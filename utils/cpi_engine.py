@@ -0,0 +1,147 @@
+# utils/cpi_engine.py — vectorized client × wine CPI scoring
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from utils.run_profile import hot
+
+BASE_WEIGHTS = {
+    "grape": 1.0, "type": 1.0, "region": 1.0,
+    "sweetness": 0.5, "body": 0.5,
+    "budget": 0.75, "prefers_high_scores": 0.75,
+    "avg_score": 0.5,
+}
+STYLE_WEIGHTS = {
+    "cat":  {"type": 1.2, "region": 1.2, "avg_score": 0.4},
+    "nigo": {"budget": 1.0, "avg_score": 0.7},
+}
+LOYALTY_BONUS = {"bronze": 0.0, "silver": 0.25, "gold": 0.5, "vip": 0.75}
+
+GLOBAL_CLIENT = {
+    "customer_no": "GLOBAL", "inferred_grape_preferences": "", "inferred_type": "",
+    "inferred_region": "", "inferred_sweetness": np.nan, "inferred_body": np.nan,
+    "inferred_budget": "", "avg_critic_score": np.nan, "loyalty_level": "bronze",
+    "prefers_high_scores": False,
+}
+
+def style_weights(style: str | None = "default") -> dict:
+    w = dict(BASE_WEIGHTS)
+    w.update(STYLE_WEIGHTS.get((style or "default").lower(), {}))
+    return w
+
+def _num(s, n) -> np.ndarray:
+    if s is None:
+        return np.full(n, np.nan)
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
+
+def _lower_col(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series([""] * len(df), index=df.index)
+    return df[col].fillna("").astype(str).str.lower()
+
+def _client_col(df: pd.DataFrame, col: str, default) -> list:
+    # str()/bool() per value, exactly as the row loop saw them through iterrows()
+    if col not in df.columns:
+        return [default] * len(df)
+    return df[col].tolist()
+
+class StockEncoding:
+    """Client-independent arrays for one stock frame, built once per run."""
+    def __init__(self, stock_df: pd.DataFrame):
+        n = len(stock_df)
+        self.n = n
+        self.index = stock_df.index
+
+        grapes = _lower_col(stock_df, "grape_list").str.split("/")
+        vocab: dict[str, int] = {}
+        rows, cols = [], []
+        for i, gs in enumerate(grapes):
+            for g in gs:
+                if g:
+                    rows.append(i)
+                    cols.append(vocab.setdefault(g.strip(), len(vocab)))
+        self.grape_vocab = vocab
+        self.grape_mat = np.zeros((n, max(len(vocab), 1)), dtype=np.float32)
+        self.grape_mat[rows, cols] = 1.0
+
+        self.type_codes, self.type_uniques = pd.factorize(_lower_col(stock_df, "type"))
+        self.region_codes, self.region_uniques = pd.factorize(_lower_col(stock_df, "region"))
+        self.tier_codes, tier_uniques = pd.factorize(_lower_col(stock_df, "price_tier"))
+        self.tier_lookup = {t: i for i, t in enumerate(tier_uniques)}
+
+        self.sweetness = np.nan_to_num(_num(stock_df.get("sweetness"), n), nan=-999.0)
+        self.body = np.nan_to_num(_num(stock_df.get("body"), n), nan=-999.0)
+
+        if "high_score" in stock_df.columns:
+            self.high_score = stock_df["high_score"].fillna(False).astype(bool).to_numpy()
+        else:
+            self.high_score = np.nan_to_num(_num(stock_df.get("avg_score"), n), nan=0.0) >= 95
+        self.avg_score_ok = np.nan_to_num(_num(stock_df.get("avg_score"), n), nan=0.0) >= 90
+
+def _contains_table(uniques, patterns: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Regex-contains of each distinct client pattern against each distinct stock value."""
+    pats, inv = np.unique(np.asarray(patterns, dtype=object).astype(str), return_inverse=True)
+    vals = pd.Series(list(uniques), dtype=object)
+    table = np.zeros((len(pats), len(vals)), dtype=bool)
+    for i, p in enumerate(pats):
+        if len(vals):
+            table[i] = vals.str.contains(p, na=False).to_numpy(dtype=bool)
+    return table, inv
+
+def score_matrix(client_df: pd.DataFrame, stock_df: pd.DataFrame, style: str | None = "default",
+                 block_size: int = 512, dtype=np.float64,
+                 encoding: StockEncoding | None = None) -> tuple[list[str], np.ndarray]:
+    """Return (column names, scores[clients, wines]) with the same values as the per-client loop."""
+    if len(client_df) == 0:
+        client_df = pd.DataFrame([GLOBAL_CLIENT])
+    enc = encoding or StockEncoding(stock_df)
+    w = style_weights(style)
+    total_possible = sum(w.values()) + max(LOYALTY_BONUS.values())
+    m = len(client_df)
+
+    names = [f"pref_cpi_for_{v}" for v in _client_col(client_df, "customer_no", "GLOBAL")]
+
+    grape_prefs = [set(str(v).lower().split(",")) for v in _client_col(client_df, "inferred_grape_preferences", "")]
+    grape_req = np.zeros((m, enc.grape_mat.shape[1]), dtype=np.float32)
+    for i, prefs in enumerate(grape_prefs):
+        for g in prefs:
+            j = enc.grape_vocab.get(g)
+            if j is not None:
+                grape_req[i, j] = 1.0
+
+    type_tab, type_inv = _contains_table(enc.type_uniques, [str(v).lower() for v in _client_col(client_df, "inferred_type", "")])
+    region_tab, region_inv = _contains_table(enc.region_uniques, [str(v).lower() for v in _client_col(client_df, "inferred_region", "")])
+    tiers = np.array([enc.tier_lookup.get(str(v).lower(), -1) for v in _client_col(client_df, "inferred_budget", "")])
+
+    c_sweet = _num(pd.Series(_client_col(client_df, "inferred_sweetness", np.nan), dtype=object), m)
+    c_body = _num(pd.Series(_client_col(client_df, "inferred_body", np.nan), dtype=object), m)
+    pref_hi = np.array([bool(v) for v in _client_col(client_df, "prefers_high_scores", False)])
+    loyalty = np.array([LOYALTY_BONUS.get(str(v).lower(), 0) for v in _client_col(client_df, "loyalty_level", "bronze")], dtype=float)
+
+    out = np.empty((m, enc.n), dtype=dtype)
+    for a in range(0, m, block_size):
+        b = min(a + block_size, m)
+        # same term order as the row loop so float sums round identically
+        s = ((grape_req[a:b] @ enc.grape_mat.T) > 0).astype(float) * w["grape"]
+        s += type_tab[type_inv[a:b]][:, enc.type_codes] * w["type"]
+        s += region_tab[region_inv[a:b]][:, enc.region_codes] * w["region"]
+        s += np.isclose(enc.sweetness[None, :], c_sweet[a:b, None], atol=0.5) * w["sweetness"]
+        s += np.isclose(enc.body[None, :], c_body[a:b, None], atol=0.5) * w["body"]
+        s += ((enc.tier_codes[None, :] == tiers[a:b, None]) & (tiers[a:b, None] >= 0)) * w["budget"]
+        s += (enc.high_score[None, :] & pref_hi[a:b, None]) * w["prefers_high_scores"]
+        s += enc.avg_score_ok[None, :] * w["avg_score"]
+        s += loyalty[a:b, None]
+        s /= total_possible
+        out[a:b] = np.round(s, 4)
+    return names, out
+
+@hot()
+def compute_cpi_matrix(client_df: pd.DataFrame, stock_df: pd.DataFrame, style: str | None = "default",
+                       display_col: str = "wine", block_size: int = 512) -> pd.DataFrame:
+    """Drop-in for the notebook's compute_cpi_matrix: id, display_col, pref_cpi_for_<customer_no>..."""
+    stock_df = stock_df.copy()
+    stock_df["id"] = stock_df["id"].astype(str)
+    names, scores = score_matrix(client_df, stock_df, style=style, block_size=block_size)
+    cpi = pd.DataFrame(scores.T, index=stock_df.index, columns=names)
+    # keep the legacy concat (reset stock index, scores on the original index)
+    return pd.concat([stock_df[["id", display_col]].reset_index(drop=True), cpi], axis=1)
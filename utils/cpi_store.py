@@ -0,0 +1,200 @@
+# utils/cpi_store.py — compact (client, wine) CPI matrix on disk + streaming top-K
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime, timezone
+import json, os, time
+
+import numpy as np
+import pandas as pd
+
+from utils.atomic_io import atomic_write
+from utils.cpi_engine import GLOBAL_CLIENT, StockEncoding, score_matrix
+from utils.run_profile import hot
+
+META_NAME = "meta.json"
+
+@hot()
+def write_cpi_store(root: Path, client_df: pd.DataFrame, stock_df: pd.DataFrame, style: str | None = "default",
+                    display_col: str = "wine", dtype: str | None = None, block_size: int = 512) -> "CPIStore":
+    """Score clients block by block straight into a memory-mapped .npy; never holds the full float64 matrix."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    dtype = np.dtype(dtype or os.getenv("AVU_CPI_DTYPE", "float32"))
+    if len(client_df) == 0:
+        client_df = pd.DataFrame([GLOBAL_CLIENT])
+
+    stock_df = stock_df.copy()
+    stock_df["id"] = stock_df["id"].astype(str)
+    enc = StockEncoding(stock_df)
+    m, n = len(client_df), len(stock_df)
+
+    stamp = f"{time.strftime('%Y%m%d%H%M%S')}_{time.time_ns() % 10**9:09d}"
+    scores_name = f"scores_{stamp}.npy"
+    out = np.lib.format.open_memmap(root / scores_name, mode="w+", dtype=dtype, shape=(m, n))
+    wine_sum = np.zeros(n, dtype=np.float64)
+    columns: list[str] = []
+    for a in range(0, m, block_size):
+        names, block = score_matrix(client_df.iloc[a:a + block_size], stock_df, style=style,
+                                    block_size=block_size, encoding=enc)
+        columns += names
+        wine_sum += block.sum(axis=0)
+        out[a:a + len(block)] = block
+    out.flush()
+    del out
+
+    avg = np.round(wine_sum / max(m, 1), 4)
+    np.save(root / f"wine_avg_{stamp}.npy", avg)
+
+    meta = {
+        "version": stamp,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "style": (style or "default").lower(),
+        "dtype": dtype.name,
+        "shape": [m, n],
+        "scores": scores_name,
+        "wine_avg": f"wine_avg_{stamp}.npy",
+        "display_col": display_col,
+        "wine_ids": stock_df["id"].tolist(),
+        "wine_display": stock_df[display_col].astype(str).tolist() if display_col in stock_df.columns else [],
+        "columns": columns,
+    }
+    atomic_write(root / META_NAME, json.dumps(meta))
+    _prune(root, keep={scores_name, meta["wine_avg"]})
+    return CPIStore(root, meta)
+
+def _prune(root: Path, keep: set):
+    # old versions may still be mapped by a reader (Windows refuses the unlink) — try again next write
+    for p in list(root.glob("scores_*.npy")) + list(root.glob("wine_avg_*.npy")):
+        if p.name not in keep:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+def open_cpi_store(output_path: Path, name: str = "cpi_store") -> "CPIStore | None":
+    root = Path(output_path) / name
+    meta_path = root / META_NAME
+    if not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if not (root / meta.get("scores", "")).exists():
+        return None
+    return CPIStore(root, meta)
+
+class CPIStore:
+    """Read side: scores are memory-mapped, so readers only page in the rows they touch."""
+    def __init__(self, root: Path, meta: dict):
+        self.root = Path(root)
+        self.meta = meta
+        self._scores = None
+
+    @property
+    def scores(self) -> np.ndarray:
+        if self._scores is None:
+            self._scores = np.load(self.root / self.meta["scores"], mmap_mode="r")
+        return self._scores
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.meta.get("columns", []))
+
+    @property
+    def clients(self) -> list[str]:
+        return [c[len("pref_cpi_for_"):] for c in self.columns]
+
+    @property
+    def wine_ids(self) -> np.ndarray:
+        return np.asarray(self.meta.get("wine_ids", []), dtype=object)
+
+    def wine_avg(self) -> np.ndarray:
+        return np.load(self.root / self.meta["wine_avg"])
+
+    def wine_frame(self) -> pd.DataFrame:
+        """id, display column, avg_cpi_score and the wine's position in the matrix (no scores loaded)."""
+        df = pd.DataFrame({"id": self.meta.get("wine_ids", [])})
+        disp = self.meta.get("display_col") or "wine"
+        if self.meta.get("wine_display") and disp != "id":
+            df[disp] = self.meta["wine_display"]
+        df["avg_cpi_score"] = self.wine_avg()
+        df["pos"] = np.arange(len(df))
+        return df
+
+    def rows(self, customer_nos) -> pd.DataFrame:
+        """Legacy wide layout restricted to the requested clients."""
+        want = {str(c) for c in customer_nos}
+        sel = [i for i, c in enumerate(self.clients) if c in want]
+        base = self.wine_frame().drop(columns=["avg_cpi_score", "pos"])
+        if not sel:
+            return base
+        vals = np.asarray(self.scores[sel], dtype=np.float64).T
+        wide = pd.DataFrame(np.round(vals, 4), columns=[self.columns[i] for i in sel])
+        return pd.concat([base, wide], axis=1)
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.rows(self.clients)
+
+    def _blocks(self, block_size: int):
+        s = self.scores
+        for a in range(0, s.shape[0], block_size):
+            yield a, np.asarray(s[a:a + block_size], dtype=np.float32)
+
+    @staticmethod
+    def _select(block: np.ndarray, cols: np.ndarray, k: int):
+        """Top-k columns per row (score desc, then matrix order) via partial selection."""
+        sub = block[:, cols]
+        k = min(k, sub.shape[1])
+        if k <= 0:
+            return np.empty((len(sub), 0), dtype=int), np.empty((len(sub), 0), dtype=np.float32)
+        if k < sub.shape[1]:
+            # kth best per row; ties at the boundary go to the lowest matrix positions
+            kth = -np.partition(-sub, k - 1, axis=1)[:, k - 1:k]
+            keep = sub > kth
+            eq = sub == kth
+            keep |= eq & (np.cumsum(eq, axis=1) <= (k - keep.sum(axis=1, keepdims=True)))
+            part = np.nonzero(keep)[1].reshape(len(sub), k)
+        else:
+            part = np.tile(np.arange(sub.shape[1]), (len(sub), 1))
+        vals = np.take_along_axis(sub, part, axis=1)
+        order = np.lexsort((part, -vals), axis=1)
+        part = np.take_along_axis(part, order, axis=1)
+        return cols[part], np.take_along_axis(vals, order, axis=1)
+
+    def top_k(self, k: int = 3, wines=None, groups=None, block_size: int = 1024) -> pd.DataFrame:
+        """Per-client top-k as long rows (customer_no, id, cpi_score, rank[, group]).
+
+        `wines` limits candidates to matrix positions (e.g. in-stock after filters);
+        `groups` (one label per matrix position, e.g. full_type) gives a top-k per client per group.
+        """
+        n = self.scores.shape[1]
+        allowed = np.arange(n) if wines is None else np.unique(np.asarray(list(wines), dtype=int))
+        if groups is None:
+            buckets = [(None, allowed)]
+        else:
+            g = pd.Series(np.asarray(groups, dtype=object)[allowed])
+            buckets = [(label, allowed[idx]) for label, idx in g.groupby(g, sort=True).indices.items()]
+
+        clients = np.asarray(self.clients, dtype=object)
+        wine_ids = self.wine_ids
+        parts = []
+        for a, block in self._blocks(block_size):
+            for label, cols in buckets:
+                pos, vals = self._select(block, cols, k)
+                if pos.size == 0:
+                    continue
+                r, kk = pos.shape
+                frame = pd.DataFrame({
+                    "customer_no": np.repeat(clients[a:a + r], kk),
+                    "id": wine_ids[pos.ravel()],
+                    "cpi_score": np.round(vals.ravel().astype(np.float64), 4),
+                    "rank": np.tile(np.arange(1, kk + 1), r),
+                })
+                if groups is not None:
+                    frame.insert(2, "group", label)
+                parts.append(frame)
+        if not parts:
+            cols = ["customer_no", "id", "cpi_score", "rank"] + (["group"] if groups is not None else [])
+            return pd.DataFrame(columns=cols)
+        return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,92 @@
+# utils/http_cache.py — conditional GET for file-backed JSON endpoints: validators come from the
+# backing files' (size, mtime), so a 304 is answered from a few stat() calls
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+import gzip, hashlib, json
+
+from flask import Response, request
+
+try:  # optional: brotli when the package is installed, gzip otherwise
+    import brotli
+except Exception:
+    brotli = None
+
+REVALIDATE = "no-cache"  # the browser may store it, but must ask (If-None-Match) before every reuse
+MIN_COMPRESS = 1024
+
+def file_state(paths) -> tuple[list, float | None]:
+    """(path, size, mtime_ns) per path — missing files count too — and the newest mtime."""
+    state, newest = [], None
+    for p in paths:
+        try:
+            st = Path(p).stat()
+        except OSError:
+            state.append((str(p), None, None))
+            continue
+        state.append((str(p), st.st_size, st.st_mtime_ns))
+        newest = st.st_mtime if newest is None else max(newest, st.st_mtime)
+    return state, newest
+
+def etag_for(paths, salt: str = "") -> tuple[str, float | None]:
+    state, newest = file_state(paths)
+    digest = hashlib.sha1(repr((state, salt)).encode("utf-8")).hexdigest()[:24]
+    return digest, newest
+
+def _not_modified(etag: str, newest: float | None) -> bool:
+    if request.if_none_match:  # takes precedence over If-Modified-Since (RFC 9110 §13.2.2)
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    if since is None or newest is None:
+        return False
+    return int(newest) <= int(since.timestamp())
+
+def _stamp(resp: Response, etag: str, newest: float | None) -> Response:
+    resp.set_etag(etag)
+    if newest is not None:
+        resp.last_modified = datetime.fromtimestamp(int(newest), tz=timezone.utc)
+    resp.headers["Cache-Control"] = REVALIDATE
+    resp.headers.pop("Pragma", None)
+    return resp
+
+def conditional(paths, build, salt: str | None = None, vary: str | None = None) -> Response:
+    """build() → Response, unless the client's validators still match `paths`: then an empty 304.
+
+    salt defaults to the query string (the payload depends on it as much as on the files);
+    pass the negotiated encoding in it too when the body is compressed (and vary="Accept-Encoding")."""
+    paths = list(paths)
+    etag, newest = etag_for(paths, request.query_string.decode("latin-1") if salt is None else salt)
+    if _not_modified(etag, newest):
+        resp = Response(status=304)
+        if vary:
+            resp.headers["Vary"] = vary
+        return _stamp(resp, etag, newest)
+    return _stamp(build(), etag, newest)
+
+def pick_encoding() -> str:
+    """br > gzip > identity, by what the client accepts (and brotli being available)."""
+    accept = request.accept_encodings
+    if brotli is not None and accept.quality("br") > 0:
+        return "br"
+    if accept.quality("gzip") > 0:
+        return "gzip"
+    return "identity"
+
+def encode(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+def dumps(obj) -> bytes:
+    """Compact JSON (no indentation, no spaces after separators), UTF-8."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def json_body(body: bytes, encoding: str) -> Response:
+    """Response for an already-encoded JSON body; `encoding` as returned by pick_encoding()."""
+    resp = Response(body, mimetype="application/json")
+    if encoding != "identity":
+        resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
@@ -0,0 +1,144 @@
+# utils/image_cache.py — bottle images resolved once per wine and remembered on disk (SQLite, TTL);
+# misses are cached too (→ default image), and a week's offers can be prefetched concurrently
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+from urllib.request import urlopen
+import asyncio, json, os, re, sqlite3, threading, time
+
+from utils.run_profile import hot
+
+DB_NAME = "image_cache.sqlite"
+SERPAPI_ENDPOINT = "https://serpapi.com/search.json"
+TTL = 30 * 86400        # found image: the same bottle recurs week after week
+MISS_TTL = 3 * 86400    # search returned nothing
+ERROR_TTL = 15 * 60     # backend failed (network, quota): retry soon, but not once per offer
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS images (
+    key TEXT PRIMARY KEY, url TEXT, status TEXT NOT NULL, fetched_at REAL NOT NULL, expires_at REAL NOT NULL
+);
+"""
+
+def image_query(wine, region, vintage, size_ml) -> str:
+    """The search the offer notebook has always sent."""
+    return f"{wine} {region} {vintage} {size_ml}ml wine bottle"
+
+def image_key(wine, region, vintage, size_ml) -> str:
+    return re.sub(r"\s+", " ", image_query(wine, region, vintage, size_ml)).strip().lower()
+
+class SerpApiBackend:
+    """query → first image thumbnail (None if no results); raises on transport/API errors.
+    `endpoint` can point at any server answering in SerpAPI's images_results shape."""
+    def __init__(self, api_key: str, endpoint: str | None = None, timeout: float = 10.0):
+        self.api_key = api_key
+        self.endpoint = endpoint or os.getenv("AVU_IMAGE_ENDPOINT") or SERPAPI_ENDPOINT
+        self.timeout = timeout
+
+    def __call__(self, query: str) -> str | None:
+        params = urlencode({"engine": "google", "q": query, "tbm": "isch", "num": 5, "api_key": self.api_key})
+        with urlopen(f"{self.endpoint}?{params}", timeout=self.timeout) as r:
+            data = json.loads(r.read().decode("utf-8"))
+        if data.get("error") and not data.get("images_results"):
+            raise RuntimeError(data["error"])
+        imgs = data.get("images_results") or []
+        return (imgs[0].get("thumbnail") or imgs[0].get("original")) if imgs else None
+
+class ImageCache:
+    """resolve() answers from the cache while an entry is fresh, else asks `backend(query)`.
+    Concurrent requests for the same wine share one backend call."""
+    def __init__(self, db_path, backend, default_image: str, ttl: float = TTL, miss_ttl: float = MISS_TTL,
+                 error_ttl: float = ERROR_TTL, clock=time.time):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.backend, self.default_image = backend, default_image
+        self.ttl, self.miss_ttl, self.error_ttl, self.clock = ttl, miss_ttl, error_ttl, clock
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        self._db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        self._db.executescript(_DDL)
+        self.stats = {"hits": 0, "misses_cached": 0, "fetches": 0, "errors": 0}
+
+    def lookup(self, key: str) -> tuple[str | None, str] | None:
+        """(url, status) of a fresh entry, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT url, status FROM images WHERE key = ? AND expires_at > ?",
+                                   (key, self.clock())).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _count(self, name: str):
+        with self._lock:  # resolve() runs on prefetch threads: += on a shared dict is not atomic
+            self.stats[name] += 1
+
+    def _store(self, key: str, url: str | None, status: str):
+        now = self.clock()
+        ttl = {"ok": self.ttl, "miss": self.miss_ttl}.get(status, self.error_ttl)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO images VALUES (?,?,?,?,?)", (key, url, status, now, now + ttl))
+            self._db.commit()
+
+    def resolve(self, wine, region, vintage, size_ml) -> str:
+        key = image_key(wine, region, vintage, size_ml)
+        hit = self.lookup(key)
+        if hit is not None:
+            self._count("hits" if hit[1] == "ok" else "misses_cached")
+            return hit[0] or self.default_image
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+        if not owner:
+            return fut.result() or self.default_image
+        url = None
+        try:
+            self._count("fetches")
+            url = self.backend(image_query(wine, region, vintage, size_ml))
+            self._store(key, url, "ok" if url else "miss")
+        except Exception:
+            self._count("errors")
+            self._store(key, None, "error")
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_result(url)
+        return url or self.default_image
+
+    async def _prefetch(self, items, concurrency: int) -> dict:
+        sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+        async def one(args):
+            async with sem:
+                return await asyncio.to_thread(self.resolve, *args)
+
+        out, todo = {}, []
+        for a in dict.fromkeys(tuple(a) for a in items):
+            hit = self.lookup(image_key(*a))
+            if hit is None:
+                todo.append(a)
+            else:
+                out[image_key(*a)] = hit[0] or self.default_image
+        urls = await asyncio.gather(*(one(a) for a in todo))
+        out.update((image_key(*a), u) for a, u in zip(todo, urls))
+        return out
+
+    @hot()
+    def prefetch(self, items, concurrency: int = 4) -> dict:
+        """Resolve every (wine, region, vintage, size_ml) in `items`, at most `concurrency` backend
+        calls at a time; returns {key: url}. Safe to call from a notebook (where a loop is running)."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._prefetch(items, concurrency))
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            return ex.submit(asyncio.run, self._prefetch(items, concurrency)).result()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def open_image_cache(iron_data, api_key: str, default_image: str, backend=None) -> ImageCache:
+    """The offer notebook's cache: IRON_DATA/image_cache.sqlite (AVU_IMAGE_CACHE overrides)."""
+    path = os.getenv("AVU_IMAGE_CACHE") or Path(iron_data) / DB_NAME
+    return ImageCache(path, backend or SerpApiBackend(api_key), default_image)
@@ -0,0 +1,161 @@
+# utils/job_manager.py — bounded process pool for engine runs; conflicting jobs are serialized
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+import multiprocessing as mp
+import itertools, threading, time, uuid
+
+EXCLUSIVE = "*"  # conflict key that clashes with every other job
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+def _conflicts(a: set, b: set) -> bool:
+    return bool(a & b) or (EXCLUSIVE in a and bool(b)) or (EXCLUSIVE in b and bool(a))
+
+class Job:
+    _seq = itertools.count(1)
+
+    def __init__(self, fn, args: tuple, keys: set, label: str, meta: dict | None = None,
+                 on_start=None, on_done=None, on_queued=None):
+        self.id = f"job-{time.strftime('%Y%m%d')}-{next(Job._seq):04d}-{uuid.uuid4().hex[:6]}"
+        self.fn, self.args = fn, args
+        self.keys = set(keys) or {EXCLUSIVE}
+        self.label = label
+        self.meta = dict(meta or {})
+        self.on_start, self.on_done, self.on_queued = on_start, on_done, on_queued
+        self.state = "queued"
+        self.error = None
+        self.result = None
+        self.submitted_at, self.started_at, self.finished_at = _now_iso(), None, None
+        self._t_submit, self._t_start, self._t_end = time.perf_counter(), None, None
+
+    def to_dict(self) -> dict:
+        now = time.perf_counter()
+        queue_sec = ((self._t_start or now) - self._t_submit)
+        run_sec = (((self._t_end or now) - self._t_start) if self._t_start else None)
+        return {
+            "job_id": self.id, "label": self.label, "state": self.state,
+            "keys": sorted(self.keys), **self.meta,
+            "submitted_at": self.submitted_at, "started_at": self.started_at, "finished_at": self.finished_at,
+            "queue_sec": round(queue_sec, 3), "run_sec": round(run_sec, 3) if run_sec is not None else None,
+            "done": self.state in ("completed", "error"),
+            "error": self.error, "result": self.result,
+        }
+
+class JobManager:
+    """FIFO queue over a process pool. A job starts when a worker is free and none of its
+    conflict keys are held by a running job (or by an earlier queued job, so order is kept)."""
+    def __init__(self, max_workers: int = 2, keep_finished: int = 200):
+        self.max_workers = max(1, int(max_workers))
+        self.keep_finished = keep_finished
+        self._lock = threading.RLock()
+        self._jobs: dict[str, Job] = {}
+        self._queue: list[Job] = []
+        self._running: dict[str, Job] = {}
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp.get_context("spawn"))
+        return self._pool
+
+    def submit(self, fn, *args, keys=(), label: str = "", meta: dict | None = None,
+               on_start=None, on_done=None, on_queued=None) -> dict:
+        """on_queued(job) runs when the job has to wait; on_start/on_queued hold the manager's lock,
+        so they must be quick (no file I/O)."""
+        job = Job(fn, args, set(keys), label or getattr(fn, "__name__", "job"), meta, on_start, on_done, on_queued)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._pump()
+            if job.state == "queued" and job.on_queued:
+                try:
+                    job.on_queued(job)
+                except Exception as e:
+                    print(f"[jobs] on_queued failed for {job.id}: {e}")
+            return job.to_dict()
+
+    def _pump(self):
+        with self._lock:
+            blocked: list[set] = [j.keys for j in self._running.values()]
+            for job in list(self._queue):
+                if len(self._running) >= self.max_workers:
+                    break
+                if job not in self._queue:  # already started by a nested pump
+                    continue
+                if any(_conflicts(job.keys, k) for k in blocked):
+                    blocked.append(job.keys)
+                    continue
+                self._queue.remove(job)
+                self._start(job)
+                blocked.append(job.keys)
+
+    def _start(self, job: Job):
+        job.state = "running"
+        job.started_at, job._t_start = _now_iso(), time.perf_counter()
+        self._running[job.id] = job
+        try:
+            if job.on_start:
+                job.on_start(job)
+            fut = self._executor().submit(job.fn, *job.args)
+        except Exception as e:
+            self._finish(job, None, e)
+            return
+        fut.add_done_callback(lambda f, j=job: self._finish(j, f, None))
+
+    def _finish(self, job: Job, fut, exc):
+        if exc is None and fut is not None:
+            exc = fut.exception()
+        with self._lock:
+            job._t_end, job.finished_at = time.perf_counter(), _now_iso()
+            if isinstance(exc, BrokenProcessPool):
+                self._pool = None  # a worker died; the next job gets a fresh pool
+            if exc is not None:
+                job.state, job.error = "error", f"{type(exc).__name__}: {exc}"
+            else:
+                job.state, job.result = "completed", fut.result()
+            self._running.pop(job.id, None)
+        try:
+            if job.on_done:
+                job.on_done(job)
+        finally:
+            with self._lock:
+                self._trim()
+                self._pump()
+
+    def _trim(self):
+        done = [j for j in self._jobs.values() if j.state in ("completed", "error")]
+        for j in done[:max(0, len(done) - self.keep_finished)]:
+            self._jobs.pop(j.id, None)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [j.to_dict() for j in reversed(list(self._jobs.values()))]
+
+    def busy(self) -> bool:
+        with self._lock:
+            return bool(self._running or self._queue)
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+_MANAGER: JobManager | None = None
+_MANAGER_LOCK = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            from config import Settings
+            _MANAGER = JobManager(max_workers=Settings.ENGINE_MAX_WORKERS)
+        return _MANAGER
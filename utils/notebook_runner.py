@@ -1,21 +1,79 @@
 # utils/notebook_runner.py — simple papermill wrapper using a known-good kernel
 from __future__ import annotations
 from pathlib import Path
-import papermill as pm
+import contextlib, json, os, time
 
-def run_notebook(input_path: str, output_path: str, parameters: dict | None = None):
+from config import Settings
+
+@contextlib.contextmanager
+def _patched_env(env: dict | None):
+    """Temporarily export per-run variables (e.g. AVU_PARAMS); the kernel/worker inherits them."""
+    old = {k: os.environ.get(k) for k in (env or {})}
+    try:
+        for k, v in (env or {}).items():
+            os.environ[k] = str(v)
+        yield
+    finally:
+        for k, v in old.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+def _papermill_hooks(input_path: str, on_stage) -> dict:
+    """nbclient cell hooks that report each code cell of the input notebook to `on_stage` as the
+    warm engine does ({index, name, status, duration_sec}); cells are matched by id, so papermill's
+    injected-parameters cell is not counted."""
+    from utils.warm_engine import notebook_stages
+    nb = json.loads(Path(input_path).read_text(encoding="utf-8"))
+    ids = {c.get("id"): i for i, c in enumerate(x for x in nb.get("cells", []) if x.get("cell_type") == "code")}
+    names = [st.name for st in notebook_stages(input_path)]
+    started = {}
+
+    def on_cell_start(cell, cell_index, **_):
+        started[cell_index] = time.perf_counter()
+
+    def on_cell_executed(cell, cell_index, execute_reply=None, **_):
+        t0 = started.pop(cell_index, None)
+        i = ids.get(cell.get("id"))
+        if i is None:
+            return
+        failed = ((execute_reply or {}).get("content") or {}).get("status") == "error"
+        on_stage({"index": i, "name": names[i], "status": "failed" if failed else "completed",
+                  "duration_sec": round(time.perf_counter() - t0, 4) if t0 is not None else None})
+
+    return {"on_cell_start": on_cell_start, "on_cell_executed": on_cell_executed}
+
+def run_notebook(input_path: str, output_path: str, parameters: dict | None = None,
+                 backend: str | None = None, env: dict | None = None, in_process: bool = False,
+                 on_stage=None):
+    """`on_stage(timing)` is called as each code cell finishes (not for the non-in-process warm
+    worker, which only reports when the run is over)."""
     ip = str(Path(input_path))
     op = str(Path(output_path))
     params = parameters or {}
 
+    # "warm": same cells, run inside a long-lived worker process (see utils/warm_engine.py)
+    if (backend or Settings.ENGINE_BACKEND) == "warm":
+        from utils.warm_engine import get_engine, run_warm
+        if in_process:  # caller is itself a long-lived worker (job pool)
+            with _patched_env(env):
+                return get_engine().run(ip, op, params, on_stage=on_stage)
+        return run_warm(ip, op, params, env=env)
+
+    import papermill as pm
+
     # Use the kernel we just installed in your current env
     KERNEL = "avu-base"  # created via: python -m ipykernel install --user --name avu-base
 
-    pm.execute_notebook(
-        ip, op,
-        parameters=params,
-        kernel_name=KERNEL,
-        progress_bar=False,
-        request_save_on_cell_execute=False,
-        report_mode=False,
-    )
+    hooks = _papermill_hooks(ip, on_stage) if on_stage else {}
+    with _patched_env(env):
+        pm.execute_notebook(
+            ip, op,
+            parameters=params,
+            kernel_name=KERNEL,
+            progress_bar=False,
+            request_save_on_cell_execute=False,
+            report_mode=False,
+            **hooks,
+        )
@@ -1,7 +1,8 @@
 # utils/notebook_status.py
+from __future__ import annotations
 from pathlib import Path
 from datetime import datetime, timezone
-import json, threading, time
+import atexit, json, multiprocessing, os, threading
 
 _STATUS_PATH = Path("notebooks") / "status.json"
 _LOCK = threading.Lock()
@@ -9,20 +10,7 @@ _LOCK = threading.Lock()
 def _now_iso():
     return datetime.now(timezone.utc).isoformat()
 
-def update_status(data: dict):
-    """Merge update into status.json and always refresh updated_at."""
-    with _LOCK:
-        prev = {}
-        if _STATUS_PATH.exists():
-            try:
-                prev = json.loads(_STATUS_PATH.read_text(encoding="utf-8") or "{}")
-            except Exception:
-                prev = {}
-        prev.update(data or {})
-        prev["updated_at"] = _now_iso()
-        _STATUS_PATH.write_text(json.dumps(prev, indent=2), encoding="utf-8")
-
-def get_status():
+def _read_file() -> dict:
     if not _STATUS_PATH.exists():
         return {}
     try:
@@ -30,27 +18,179 @@ def get_status():
     except Exception:
         return {}
 
+def _write_file(data: dict):
+    tmp = _STATUS_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, _STATUS_PATH)
+
+class StatusStore:
+    """In-memory status for the web process. Subscribers wait on a version counter;
+    status.json is written behind (every `flush_interval`) and re-read when another
+    process (a notebook kernel / pool worker) changes it."""
+    def __init__(self, flush_interval: float = 1.0):
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._state = _read_file()
+        self._version = 1
+        self._dirty = False
+        self._mtime = self._file_mtime()
+        self._stop = threading.Event()
+        self._th = None
+
+    @staticmethod
+    def _file_mtime():
+        try:
+            return _STATUS_PATH.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    @property
+    def closed(self) -> bool:
+        return self._stop.is_set()
+
+    def update(self, data: dict):
+        with self._cond:
+            self._state.update(data or {})
+            self._state["updated_at"] = _now_iso()
+            self._version += 1
+            self._dirty = True
+            self._cond.notify_all()
+
+    def touch(self):
+        """Refresh updated_at in memory only: no new version for subscribers, nothing to flush."""
+        with self._cond:
+            self._state["updated_at"] = _now_iso()
+
+    def get(self) -> dict:
+        with self._cond:
+            return dict(self._state)
+
+    def snapshot(self) -> tuple[int, dict]:
+        with self._cond:
+            return self._version, dict(self._state)
+
+    def wait(self, since: int, timeout: float = 15.0) -> tuple[int, dict]:
+        """Block until the version moves past `since` (or timeout); returns (version, state)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != since or self._stop.is_set(), timeout=timeout)
+            return self._version, dict(self._state)
+
+    def _ingest_external(self):
+        mtime = self._file_mtime()
+        if mtime is None or mtime == self._mtime:
+            return
+        self._mtime = mtime
+        data = _read_file()
+        with self._cond:
+            if data and (data.get("updated_at") or "") > (self._state.get("updated_at") or ""):
+                self._state.update(data)
+                self._version += 1
+                self._cond.notify_all()
+
+    def flush(self):
+        with self._cond:
+            if not self._dirty:
+                return
+            data, self._dirty = dict(self._state), False
+        with _LOCK:
+            _write_file(data)
+            self._mtime = self._file_mtime()
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._ingest_external()
+                self.flush()
+            except Exception:
+                pass
+
+    def start(self):
+        if self._th and self._th.is_alive():
+            return
+        self._th = threading.Thread(target=self._loop, name="status-flush", daemon=True)
+        self._th.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self.flush()
+
+_STORE: StatusStore | None = None
+
+def start_status_store(flush_interval: float = 1.0) -> StatusStore | None:
+    """Call once in the web process; elsewhere update_status writes through to the file."""
+    global _STORE
+    if multiprocessing.parent_process() is not None:
+        return None  # spawned pool worker re-importing the app module
+    if _STORE is None:
+        _STORE = StatusStore(flush_interval)
+        _STORE.start()
+        atexit.register(_STORE.stop)
+    return _STORE
+
+def get_status_store() -> StatusStore | None:
+    return _STORE
+
+def update_status(data: dict | None = None, **fields):
+    """Merge update into the status and always refresh updated_at."""
+    data = {**(data or {}), **fields}
+    if _STORE is not None:
+        _STORE.update(data)
+        return
+    with _LOCK:
+        prev = _read_file()
+        prev.update(data)
+        prev["updated_at"] = _now_iso()
+        _write_file(prev)
+
+def touch_status():
+    """A beat with nothing new: fresh updated_at for /status polls, no file write or SSE wake-up."""
+    if _STORE is not None:
+        _STORE.touch()
+
+def get_status():
+    if _STORE is not None:
+        return _STORE.get()
+    return _read_file()
+
 class Heartbeat:
-    """Background heartbeat to prevent UI 'stuck at 75%'—refreshes updated_at."""
-    def __init__(self, interval=5, notebook="(unknown)", base_message=None):
+    """Background heartbeat to prevent UI 'stuck at 75%'—refreshes updated_at.
+    `progress`: optional callable returning extra fields for each beat (progress, eta_sec, message).
+    A beat is published only when those fields change; otherwise it just touches the status."""
+    def __init__(self, interval=5, notebook="(unknown)", base_message=None, progress=None):
         self.interval = interval
         self.notebook = notebook
         self.base_message = base_message or "Processing…"
+        self.progress = progress
         self._stop = threading.Event()
         self._th = None
+        self._last = None
 
     def start(self):
         if self._th and self._th.is_alive(): return
         def _run():
             while not self._stop.is_set():
-                update_status({
+                data = {
                     "notebook": self.notebook,
                     "state": "running",
                     "message": self.base_message,
-                })
+                }
+                if self.progress is not None:
+                    try:
+                        data.update(self.progress() or {})
+                    except Exception:
+                        pass
+                if data != self._last:
+                    update_status(data)
+                    self._last = data
+                else:
+                    touch_status()
                 self._stop.wait(self.interval)
         self._th = threading.Thread(target=_run, daemon=True)
         self._th.start()
 
     def stop(self):
         self._stop.set()
+        if self._th is not None and self._th is not threading.current_thread():
+            self._th.join(timeout=2)  # a beat in flight must not land after the final status
@@ -0,0 +1,158 @@
+# utils/offer_batch.py — every offer of a scheduled week from one load of the inputs: lookups are
+# indexed once, offers render on a thread pool (image fetches wait on the network, not the CPU)
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import json, re, threading, time
+
+import pandas as pd
+
+from utils.atomic_io import atomic_write
+from utils.run_profile import hot
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+MANIFEST = "manifest.json"
+
+def schedule_candidates(iron, week: int, year: int | None = None) -> list[Path]:
+    """Schedule files for `week`, best first (as the calendar store ranks them)."""
+    iron = Path(iron)
+    out = []
+    if year:
+        out += [iron / f"weekly_campaign_schedule_{int(year)}_week_{int(week)}.ui.json",
+                iron / f"weekly_campaign_schedule_{int(year)}_week_{int(week)}.json"]
+    return out + [iron / f"weekly_campaign_schedule_week_{int(week)}.json"]
+
+def load_week_schedule(iron, week: int, year: int | None = None) -> tuple[dict | None, Path | None]:
+    for p in schedule_candidates(iron, week, year):
+        try:
+            raw = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        return (raw.get("weekly_calendar", raw) if isinstance(raw, dict) else None), p
+    return None, None
+
+def week_slots(schedule: dict | None) -> list[dict]:
+    """[{day, slot, item}] for every filled slot, in calendar order."""
+    out = []
+    for d in DAYS:
+        for j, it in enumerate((schedule or {}).get(d) or []):
+            if isinstance(it, dict) and (it.get("wine") or it.get("name") or it.get("id")):
+                out.append({"day": d, "slot": j, "item": it})
+    return out
+
+def _clean_id(v) -> str:
+    s = re.sub(r"\.0$", "", str(v if v is not None else "").strip())
+    return re.sub(r"^0+(\d+)$", r"\1", s)
+
+def _clean_no(v) -> str:
+    s = re.sub(r"\.0$", "", str(v).strip())
+    return "" if s == "nan" else s
+
+class OfferInputs:
+    """pick_wine_and_client() for many selections: stock by id / (name, vintage) and the most
+    recommended client per wine are dictionary lookups instead of a frame scan per offer.
+    Expects the frames as the offer notebook leaves them (canon_cols, normalized ids)."""
+    def __init__(self, stock_df, recs_df, client_df):
+        self.stock, self.recs, self.clients = stock_df, recs_df, client_df
+        self._by_id, self._by_name, self._by_name_vintage = {}, {}, {}
+        if isinstance(stock_df, pd.DataFrame):
+            ids = stock_df["id"].astype(str) if "id" in stock_df.columns else [""] * len(stock_df)
+            names = stock_df["wine_name"].astype(str).str.lower()
+            vintages = stock_df["vintage"].astype(str) if "vintage" in stock_df.columns else [""] * len(stock_df)
+            for i, (wid, n, v) in enumerate(zip(ids, names, vintages)):
+                self._by_id.setdefault(wid, i)
+                self._by_name.setdefault(n, i)
+                self._by_name_vintage.setdefault((n, v), i)
+        self._top: dict[str, object] = {}
+        self._client_pos: dict[str, int] | None = None
+        self._lock = threading.Lock()
+
+    def prepare(self, wine_ids):
+        """Best client per wine for all of `wine_ids` in one pass over the recommendations."""
+        with self._lock:
+            self._prepare({str(w) for w in wine_ids if w} - set(self._top))
+
+    def _prepare(self, todo: set):
+        recs, clients = self.recs, self.clients
+        if not todo or not isinstance(clients, pd.DataFrame) or not isinstance(recs, pd.DataFrame) \
+                or "id" not in recs.columns or "customer_no" not in recs.columns \
+                or "customer_no" not in clients.columns:
+            return
+        sub = recs.loc[recs["id"].isin(todo), ["id", "customer_no"]]
+        top = {wid: g["customer_no"].map(_clean_no).value_counts().index[0] for wid, g in sub.groupby("id", sort=False)}
+        if self._client_pos is None:
+            self._client_pos = {}
+            for i, no in enumerate(clients["customer_no"].astype(str).str.strip()):
+                self._client_pos.setdefault(no, i)
+        for wid, no in top.items():
+            i = self._client_pos.get(str(no))
+            self._top[wid] = clients.iloc[i] if i is not None else None
+        for wid in todo - set(top):
+            self._top[wid] = None  # no recommendation: first client, as in single mode
+
+    def _client(self, wine_id):
+        if wine_id:
+            self.prepare([wine_id])
+            row = self._top.get(str(wine_id))
+            if row is not None:
+                return row
+        if isinstance(self.clients, pd.DataFrame) and len(self.clients):
+            return self.clients.iloc[0]
+        return None
+
+    def pick(self, sel: dict, fallback_row, fallback_client):
+        """(wine_row, client_row, how) — the single-offer notebook's order: id, name(+vintage), selection."""
+        if not isinstance(self.stock, pd.DataFrame):
+            return fallback_row(sel), fallback_client, "selection"
+        wid = _clean_id(sel.get("id") or sel.get("wine_id") or "")
+        if wid and wid in self._by_id:
+            return self.stock.iloc[self._by_id[wid]], self._client(wid), "id"
+        name = str(sel.get("wine") or sel.get("name") or "").strip().lower()
+        vintage = str(sel.get("vintage") or "").strip()
+        i = (self._by_name_vintage.get((name, vintage)) if vintage else self._by_name.get(name)) if name else None
+        if i is not None:
+            row = self.stock.iloc[i]
+            return row, self._client(row.get("id")), "name"
+        return fallback_row(sel), fallback_client, "selection"
+
+def offer_filename(day: str, slot: int, wine_id) -> str:
+    wid = re.sub(r"[^\w.-]+", "_", str(wine_id or "")) or "selected"
+    return f"{day[:3].lower()}_{slot + 1}_offer_{wid}.html"
+
+@hot()
+def render_week(slots: list[dict], inputs: OfferInputs, compose, out_dir, workers: int = 8,
+                row_from_selection=dict, default_client=None, meta: dict | None = None) -> dict:
+    """compose(wine_row, client_row) → {"subject", "html", ...} for each slot on `workers` threads;
+    HTML files plus a manifest (with per-offer timings) in `out_dir`. Returns the manifest.
+    Slots not found in stock become row_from_selection(item) with default_client, as in single mode."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    inputs.prepare(_clean_id(s["item"].get("id") or s["item"].get("wine_id") or "") for s in slots)
+    prepare_sec = time.perf_counter() - t0
+
+    def one(slot):
+        t = time.perf_counter()
+        entry = {"day": slot["day"], "slot": slot["slot"], "wine": slot["item"].get("wine") or slot["item"].get("name")}
+        try:
+            wine_row, client_row, how = inputs.pick(slot["item"], row_from_selection, default_client)
+            offer = compose(wine_row, client_row)
+            path = out_dir / offer_filename(slot["day"], slot["slot"], offer.get("wine_id"))
+            atomic_write(path, offer["html"])
+            entry.update({k: v for k, v in offer.items() if k != "html"}, match=how, html_path=str(path))
+        except Exception as e:  # one bad slot must not cost the other offers
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entry["sec"] = round(time.perf_counter() - t, 4)
+        return entry
+
+    t1 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as ex:
+        offers = list(ex.map(one, slots))
+    manifest = dict(meta or {}, generated_at=datetime.now().isoformat(timespec="seconds"),
+                    workers=max(1, int(workers)), count=len(offers),
+                    errors=sum(1 for o in offers if "error" in o),
+                    prepare_sec=round(prepare_sec, 4), render_sec=round(time.perf_counter() - t1, 4),
+                    offers=offers)
+    atomic_write(out_dir / MANIFEST, json.dumps(manifest, indent=2, ensure_ascii=False, default=str))
+    return manifest
@@ -0,0 +1,143 @@
+# utils/parse_cache.py — content-addressed cache of parsed Excel sources (skip openpyxl when nothing changed)
+from __future__ import annotations
+from pathlib import Path
+import hashlib, io, json, os, threading, time
+
+import pandas as pd
+
+from utils.run_profile import hot
+
+try:  # optional: columnar cache files when pyarrow is installed, pickle otherwise
+    import pyarrow  # noqa: F401
+    _HAS_PARQUET = True
+except Exception:
+    _HAS_PARQUET = False
+
+MANIFEST = "manifest.json"
+_LOCK = threading.Lock()
+STATS = {"hits": 0, "misses": 0, "files": []}
+
+def _enabled() -> bool:
+    return os.getenv("AVU_PARSE_CACHE", "1") != "0"
+
+def _force_refresh() -> bool:
+    return os.getenv("AVU_PARSE_CACHE_REFRESH", "0") == "1"
+
+def _default_dir() -> Path:
+    env = os.getenv("AVU_PARSE_CACHE_DIR")
+    if env:
+        return Path(env)
+    from config import Settings
+    return Settings.IRON_DATA_PATH / "parse_cache"
+
+def _entry_key(path: Path, kwargs: dict) -> str:
+    return f"{path.resolve()}|{json.dumps(kwargs, sort_keys=True, default=str)}"
+
+def _load_manifest(root: Path) -> dict:
+    try:
+        return json.loads((root / MANIFEST).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def _save_manifest(root: Path, manifest: dict):
+    tmp = root / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    os.replace(tmp, root / MANIFEST)
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Stable dtypes for storage: string column labels stay, all-null object columns become float."""
+    df = df.copy()
+    for c in df.columns:
+        if df[c].dtype == object and df[c].isna().all():
+            df[c] = df[c].astype("float64")
+    return df
+
+def _write_frame(root: Path, stem: str, df: pd.DataFrame) -> str:
+    # parquet only when the frame round-trips exactly (labels, dtypes, values); pickle always does
+    if _HAS_PARQUET and all(isinstance(c, str) for c in df.columns):
+        name = stem + ".parquet"
+        try:
+            df.to_parquet(root / name)
+            back = pd.read_parquet(root / name)
+            pd.testing.assert_frame_equal(df, back, check_exact=True)
+            return name
+        except Exception:
+            (root / name).unlink(missing_ok=True)
+    name = stem + ".pkl"
+    df.to_pickle(root / name)
+    return name
+
+def _read_frame(root: Path, name: str) -> pd.DataFrame:
+    if name.endswith(".parquet"):
+        return pd.read_parquet(root / name)
+    return pd.read_pickle(root / name)
+
+def _record(name: str, status: str, seconds: float):
+    STATS["hits" if status == "hit" else "misses"] += 1
+    STATS["files"].append({"file": name, "status": status, "sec": round(seconds, 3)})
+    print(f"[PARSE-CACHE] {status:<7} {name} ({seconds:.2f}s)")
+
+@hot()
+def read_excel_cached(path, cache_dir=None, refresh: bool | None = None, **kwargs) -> pd.DataFrame:
+    """pd.read_excel(path, **kwargs) served from a cache keyed by file fingerprint + read options.
+
+    size + mtime match → cached frame without touching the workbook; otherwise the content
+    hash decides (a touched-but-identical file is still a hit). AVU_PARSE_CACHE_REFRESH=1
+    (or refresh=True) re-parses; AVU_PARSE_CACHE=0 bypasses the cache entirely.
+    """
+    path = Path(path)
+    if not _enabled():
+        return pd.read_excel(path, **kwargs)
+    t0 = time.perf_counter()
+    root = Path(cache_dir) if cache_dir is not None else _default_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    refresh = _force_refresh() if refresh is None else refresh
+    key = _entry_key(path, kwargs)
+    st = path.stat()
+
+    with _LOCK:
+        manifest = _load_manifest(root)
+        entry = manifest.get(key)
+        if entry and not refresh and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            try:
+                df = _read_frame(root, entry["file"])
+                _record(path.name, "hit", time.perf_counter() - t0)
+                return df
+            except Exception:
+                entry = None
+
+    buf = path.read_bytes()
+    sha = hashlib.sha256(buf).hexdigest()
+    with _LOCK:
+        manifest = _load_manifest(root)
+        entry = manifest.get(key)
+        if entry and not refresh and entry.get("sha256") == sha and (root / entry["file"]).exists():
+            try:
+                df = _read_frame(root, entry["file"])
+                entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                _save_manifest(root, manifest)
+                _record(path.name, "hit", time.perf_counter() - t0)
+                return df
+            except Exception:
+                pass
+
+    df = normalize_frame(pd.read_excel(io.BytesIO(buf), **kwargs))
+    opts = hashlib.sha256(key.split("|", 1)[1].encode()).hexdigest()[:8]
+    with _LOCK:
+        name = _write_frame(root, f"{sha[:20]}_{opts}", df)
+        manifest = _load_manifest(root)
+        old = manifest.get(key)
+        manifest[key] = {"source": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                         "sha256": sha, "file": name, "rows": int(len(df))}
+        _save_manifest(root, manifest)
+        if old and old.get("file") != name and not any(e.get("file") == old["file"] for e in manifest.values()):
+            (root / old["file"]).unlink(missing_ok=True)
+    _record(path.name, "refresh" if refresh else "miss", time.perf_counter() - t0)
+    return _read_frame(root, name)
+
+def reset_stats():
+    STATS.update(hits=0, misses=0, files=[])
+
+def cache_report() -> dict:
+    """Hit/miss counts for this process (printed at the end of an ignition run)."""
+    return {"hits": STATS["hits"], "misses": STATS["misses"], "files": list(STATS["files"])}
@@ -0,0 +1,287 @@
+# utils/run_profile.py — what a notebook run spent, per stage (wall, CPU, peak RSS) and per tagged
+# hot function; one JSON per job id under IRON_DATA/profiles/ (served by /api/engine/profile)
+from __future__ import annotations
+from pathlib import Path
+import atexit, functools, json, os, re, sys, threading, time
+
+try:  # optional: portable RSS (Windows has neither /proc nor resource)
+    import psutil
+except Exception:
+    psutil = None
+try:
+    import resource
+except Exception:
+    resource = None
+
+PROFILE_DIR = "profiles"
+KEEP = 200             # profiles kept on disk (the job manager keeps as many finished jobs)
+HOT_OUT_ENV = "AVU_PROFILE_OUT"  # set for papermill runs: the kernel dumps its hot functions there on exit
+_RUN_ID = re.compile(r"^[\w.-]{1,120}$")
+
+def _mb(n) -> float | None:
+    return round(n / 2**20, 1) if n else None
+
+# ---------------------------------------------------------------- memory
+def current_rss() -> int | None:
+    """Resident set of this process in bytes (None when the platform gives no way to read it)."""
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss
+        except Exception:
+            pass
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+def max_rss() -> int | None:
+    """High-water mark of this process's resident set in bytes."""
+    if resource is not None:
+        v = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return v if sys.platform == "darwin" else v * 1024  # bytes on macOS, KiB elsewhere
+    if psutil is not None:
+        try:
+            mi = psutil.Process().memory_info()
+            return getattr(mi, "peak_wset", None) or mi.rss
+        except Exception:
+            pass
+    return None
+
+class RssMeter:
+    """Samples the resident set on a thread; take() returns the peak (MB) since the previous take().
+    The process high-water mark only ever grows, so it can't say which stage a peak belongs to."""
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.available = current_rss() is not None
+        self._peak = current_rss() or 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._th = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            v = current_rss() or 0
+            with self._lock:
+                if v > self._peak:
+                    self._peak = v
+
+    def take(self) -> float | None:
+        if not self.available:
+            return None
+        v = current_rss() or 0
+        with self._lock:
+            peak, self._peak = max(self._peak, v), v
+        return _mb(peak)
+
+    def __enter__(self):
+        if self.available:
+            self._th = threading.Thread(target=self._run, name="rss-meter", daemon=True)
+            self._th.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._th is not None:
+            self._th.join(timeout=1)
+
+# ---------------------------------------------------------------- hot functions
+_HOT: dict[str, list] = {}  # label → [calls, wall_sec, cpu_sec]
+_HOT_LOCK = threading.Lock()
+
+def hot(name: str | None = None):
+    """Decorator: count and time calls of an engine hot path into this process's run profile.
+    CPU is process time, so work a function hands to its own threads is included."""
+    def deco(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t, c = time.perf_counter(), time.process_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                wall, cpu = time.perf_counter() - t, time.process_time() - c
+                with _HOT_LOCK:
+                    rec = _HOT.setdefault(label, [0, 0.0, 0.0])
+                    rec[0] += 1
+                    rec[1] += wall
+                    rec[2] += cpu
+        return wrapper
+    return deco
+
+def hot_report(reset: bool = False) -> dict:
+    """{label: {calls, wall_sec, cpu_sec}}, slowest first."""
+    with _HOT_LOCK:
+        items = sorted(_HOT.items(), key=lambda kv: -kv[1][1])
+        if reset:
+            _HOT.clear()
+    return {k: {"calls": n, "wall_sec": round(w, 4), "cpu_sec": round(c, 4)} for k, (n, w, c) in items}
+
+def reset_hot():
+    with _HOT_LOCK:
+        _HOT.clear()
+
+def _dump_at_exit(path: str):
+    try:
+        Path(path).write_text(json.dumps({"hot": hot_report(), "peak_rss_mb": _mb(max_rss())}), encoding="utf-8")
+    except Exception:
+        pass
+
+if os.getenv(HOT_OUT_ENV):  # a papermill kernel: this process ends with the run
+    atexit.register(_dump_at_exit, os.environ[HOT_OUT_ENV])
+
+def read_kernel_dump(path) -> dict:
+    p = Path(path)
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    finally:
+        p.unlink(missing_ok=True)
+
+# ---------------------------------------------------------------- executed notebooks
+def notebook_stage_timings(path) -> list[dict]:
+    """Per-cell timings of an executed notebook: the warm engine's avu_stages, else papermill's
+    cell metadata (wall time only — the kernel is another process)."""
+    from utils.warm_engine import _stage_name
+    try:
+        nb = json.loads(Path(path).read_text(encoding="utf-8"))
+    except Exception:
+        return []
+    if nb.get("metadata", {}).get("avu_stages"):
+        return nb["metadata"]["avu_stages"]
+    out = []
+    cells = [x for x in nb.get("cells", []) if x.get("cell_type") == "code"
+             and "injected-parameters" not in ((x.get("metadata") or {}).get("tags") or [])]
+    for i, c in enumerate(cells):  # indexed like the input notebook's code cells
+        pm = (c.get("metadata") or {}).get("papermill") or {}
+        if pm.get("duration") is None:  # not reached (an earlier cell failed) or not executed
+            continue
+        out.append({"index": i, "name": _stage_name("".join(c.get("source", [])), i),
+                    "status": "failed" if pm.get("exception") else "completed",
+                    "duration_sec": round(float(pm["duration"]), 4), "cpu_sec": None, "peak_rss_mb": None})
+    return out
+
+# ---------------------------------------------------------------- store
+def summary(profile: dict) -> dict:
+    stages = [s for s in profile.get("stages") or [] if s.get("duration_sec") is not None]
+    slowest = max(stages, key=lambda s: s["duration_sec"], default=None)
+    return {
+        "run_id": profile.get("run_id"), "notebook": profile.get("notebook"), "state": profile.get("state"),
+        "backend": profile.get("backend"), "started_at": profile.get("started_at"),
+        "duration_sec": profile.get("duration_sec"), "peak_rss_mb": profile.get("peak_rss_mb"),
+        "stages": len(stages), "slowest_stage": ({"name": slowest["name"], "duration_sec": slowest["duration_sec"]}
+                                                 if slowest else None),
+        **{k: profile[k] for k in ("variant", "year", "week") if k in profile},
+    }
+
+class ProfileStore:
+    """<root>/profiles/<run_id>.json, newest `keep` retained."""
+    def __init__(self, root, keep: int = KEEP):
+        self.dir = Path(root) / PROFILE_DIR
+        self.keep = keep
+
+    def _path(self, run_id: str) -> Path:
+        if not _RUN_ID.match(run_id or ""):
+            raise ValueError(f"bad run id: {run_id!r}")
+        return self.dir / f"{run_id}.json"
+
+    def save(self, profile: dict) -> Path:
+        path = self._path(profile["run_id"])
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(profile, indent=1, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        self._prune()
+        return path
+
+    def get(self, run_id: str) -> dict | None:
+        try:
+            return json.loads(self._path(run_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _files(self) -> list[Path]:
+        try:
+            files = list(self.dir.glob("*.json"))
+        except OSError:
+            return []
+        return sorted(files, key=lambda p: p.stat().st_mtime_ns, reverse=True)
+
+    def runs(self, notebook: str | None = None, limit: int = 50, state: str | None = None) -> list[dict]:
+        """Full profiles, newest first."""
+        out = []
+        for p in self._files():
+            try:
+                prof = json.loads(p.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if (notebook and prof.get("notebook") != notebook) or (state and prof.get("state") != state):
+                continue
+            out.append(prof)
+            if len(out) >= limit:
+                break
+        return out
+
+    def list(self, notebook: str | None = None, limit: int = 50) -> list[dict]:
+        return [summary(p) for p in self.runs(notebook, limit)]
+
+    def _prune(self):
+        for p in self._files()[self.keep:]:
+            p.unlink(missing_ok=True)
+
+_STORES: dict[str, ProfileStore] = {}
+
+def get_profile_store(root) -> ProfileStore:
+    key = str(Path(root))
+    if key not in _STORES:
+        _STORES[key] = ProfileStore(root)
+    return _STORES[key]
+
+# ---------------------------------------------------------------- compare
+def _keyed(stages) -> dict:
+    # stages are matched by name (cells move when the notebook is edited); repeats get #2, #3…
+    out, seen = {}, {}
+    for s in stages or []:
+        seen[s["name"]] = seen.get(s["name"], 0) + 1
+        out[s["name"] if seen[s["name"]] == 1 else f"{s['name']} #{seen[s['name']]}"] = s
+    return out
+
+def _ratio(a, b):
+    return round(b / a, 3) if a and b is not None else None
+
+def compare_profiles(base: dict, run: dict, threshold: float = 0.15, min_delta_sec: float = 0.1) -> dict:
+    """Stage and hot-function deltas of `run` against `base`, biggest slowdown first. A row is
+    `regressed` when it got more than `threshold` slower and by at least `min_delta_sec`."""
+    def row(name, o, n, key):
+        a, b = (o or {}).get(key), (n or {}).get(key)
+        delta = round(b - a, 4) if a is not None and b is not None else None
+        r = {"name": name, "base_sec": a, "run_sec": b, "delta_sec": delta, "ratio": _ratio(a, b)}
+        r["regressed"] = bool(delta is not None and delta >= min_delta_sec and r["ratio"] and r["ratio"] > 1 + threshold)
+        return r
+
+    a, b = _keyed(base.get("stages")), _keyed(run.get("stages"))
+    stages = []
+    for name in list(a) + [n for n in b if n not in a]:
+        o, n = a.get(name), b.get(name)
+        r = row(name, o, n, "duration_sec")
+        r.update(base_cpu_sec=(o or {}).get("cpu_sec"), run_cpu_sec=(n or {}).get("cpu_sec"),
+                 base_rss_mb=(o or {}).get("peak_rss_mb"), run_rss_mb=(n or {}).get("peak_rss_mb"))
+        if not (o and n):
+            r["note"] = "only in run" if n else "only in base"
+        stages.append(r)
+    ha, hb = base.get("hot") or {}, run.get("hot") or {}
+    hot_rows = [row(name, ha.get(name), hb.get(name), "wall_sec") for name in list(ha) + [n for n in hb if n not in ha]]
+    by_delta = lambda r: -(r["delta_sec"] if r["delta_sec"] is not None else float("-inf"))
+    stages.sort(key=by_delta)
+    hot_rows.sort(key=by_delta)
+    total = row("total", base, run, "duration_sec")
+    return {
+        "base": summary(base), "run": summary(run), "threshold": threshold,
+        "total": {k: total[k] for k in ("base_sec", "run_sec", "delta_sec", "ratio", "regressed")},
+        "peak_rss_mb": {"base": base.get("peak_rss_mb"), "run": run.get("peak_rss_mb")},
+        "stages": stages, "hot": hot_rows,
+        "regressed": [r["name"] for r in stages + hot_rows if r["regressed"]],
+        "same_notebook": base.get("notebook") == run.get("notebook"),
+    }
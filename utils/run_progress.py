@@ -0,0 +1,133 @@
+# utils/run_progress.py — progress of a running notebook from its cell completions, each cell weighted
+# by how long it took in past runs (utils/run_profile), and the ETA that follows from the same history
+from __future__ import annotations
+from pathlib import Path
+import json, statistics, threading, time
+
+HISTORY_RUNS = 5        # most recent completed runs of the notebook the weights come from
+MAX_PROGRESS = 99       # 100 is the job's on_done, not a guess
+SPEED_CLAMP = (0.25, 4.0)
+OVERDUE_SEC = 5.0       # a stage this far past its expected time is reported as slower than usual
+
+def expected_durations(n_stages: int, history: list[dict]) -> tuple[list[float], int]:
+    """Median seconds per stage index over `history` profiles (completed stages only: a cached,
+    skipped stage says nothing about the work). Stages never seen get the median of the others;
+    with no history at all every stage weighs the same. Returns (seconds, runs used)."""
+    seen: dict[int, list[float]] = {}
+    used = 0
+    for prof in history:
+        stages = [s for s in prof.get("stages") or [] if s.get("status") == "completed"]
+        if not stages:
+            continue
+        used += 1
+        for s in stages:
+            if s.get("index") is not None and s.get("duration_sec") is not None and s["index"] < n_stages:
+                seen.setdefault(int(s["index"]), []).append(float(s["duration_sec"]))
+    med = {i: statistics.median(v) for i, v in seen.items()}
+    fill = statistics.median(med.values()) if med else 1.0
+    return [max(med.get(i, fill), 0.01) for i in range(n_stages)], used
+
+def _fmt_eta(sec: float) -> str:
+    if sec < 60:
+        return f"~{max(int(round(sec)), 1)}s left"
+    m, s = divmod(int(round(sec)), 60)
+    return f"~{m} min {s:02d}s left" if m < 10 else f"~{m} min left"
+
+class ProgressLog:
+    """Stage completions as JSON lines: the pool worker appends, the web process tails the file."""
+    def __init__(self, path):
+        self.path = Path(path)
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def write(self, event: dict):
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # progress is best effort; the run itself must not fail on it
+
+    def read_new(self) -> list[dict]:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return []
+        end = data.rfind(b"\n") + 1  # a line still being written is picked up next time
+        self._offset += end
+        out = []
+        for line in data[:end].splitlines():
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                pass
+        return out
+
+    def remove(self):
+        self.path.unlink(missing_ok=True)
+
+class ProgressEstimator:
+    """Weighted share of the expected work done so far. The running stage counts for the time it has
+    been running (up to 95% of its weight); the ETA scales what is left by how fast this run has been
+    compared to history. `calibrated` is False without history: progress is then by cell count, no ETA."""
+    def __init__(self, names: list[str], expected: list[float], calibrated: bool = True, clock=time.monotonic):
+        self.names, self.expected, self.calibrated = list(names), list(expected), calibrated
+        self.total = sum(self.expected) or 1.0
+        self.clock = clock
+        self._last = clock()
+        self._done: dict[int, float] = {}
+
+    def stage_done(self, index: int, duration_sec: float | None = None):
+        if 0 <= index < len(self.expected):
+            self._done[index] = float(duration_sec or 0.0)
+            self._last = self.clock()
+
+    @property
+    def current(self) -> int | None:
+        nxt = max(self._done, default=-1) + 1
+        return nxt if nxt < len(self.expected) else None
+
+    def estimate(self) -> dict:
+        cur = self.current
+        in_stage = self.clock() - self._last
+        done_exp = sum(self.expected[i] for i in self._done)
+        partial = min(in_stage, self.expected[cur] * 0.95) if cur is not None else 0.0
+        progress = min(int((done_exp + partial) / self.total * 100), MAX_PROGRESS)
+        out = {"progress": progress, "eta_sec": None, "stage_index": cur, "stages": len(self.expected),
+               "stage": self.names[cur] if cur is not None and cur < len(self.names) else None, "overdue": False}
+        if self.calibrated:
+            actual = sum(self._done.values())
+            speed = 1.0
+            if done_exp >= 1.0:  # a few ms of finished cells say nothing about this run's pace
+                speed = min(max(actual / done_exp, SPEED_CLAMP[0]), SPEED_CLAMP[1])
+            left = sum(self.expected[i] for i in range(len(self.expected)) if i not in self._done and i != cur)
+            running = max(self.expected[cur] * speed - in_stage, 0.0) if cur is not None else 0.0
+            out["eta_sec"] = int(round(left * speed + running))
+            # past its expected time the stage's share of the ETA is unknown: say so rather than count down
+            out["overdue"] = cur is not None and in_stage - self.expected[cur] * speed > OVERDUE_SEC
+        return out
+
+class RunProgress:
+    """Web-process side of one run: tails the worker's ProgressLog and turns it into status fields."""
+    def __init__(self, log: ProgressLog, names: list[str], history: list[dict], base_message: str = ""):
+        expected, used = expected_durations(len(names), history)
+        self.log = log
+        self.base_message = base_message
+        self.estimator = ProgressEstimator(names, expected, calibrated=used > 0)
+        self.history_runs = used
+
+    def poll(self) -> dict:
+        for ev in self.log.read_new():
+            if ev.get("index") is not None:
+                self.estimator.stage_done(int(ev["index"]), ev.get("duration_sec"))
+        est = self.estimator.estimate()
+        msg = self.base_message
+        if est["stage_index"] is None:
+            return {"progress": est["progress"], "eta_sec": est["eta_sec"], "message": f"{msg} finishing…".strip()}
+        msg = f"{msg} {est['stage_index'] + 1}/{est['stages']}: {est['stage']}".strip()
+        if est["overdue"]:
+            msg = f"{msg} · taking longer than usual"
+        elif est["eta_sec"]:
+            msg = f"{msg} · {_fmt_eta(est['eta_sec'])}"
+        return {"progress": est["progress"], "eta_sec": est["eta_sec"], "message": msg}
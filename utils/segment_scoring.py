@@ -0,0 +1,110 @@
+# utils/segment_scoring.py — segment_score from one grouped count of client (region_group, full_type) pairs
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from utils.cpi_engine import LOYALTY_BONUS
+from utils.run_profile import hot
+
+PAIR = ("region_group", "full_type")
+
+def _norm_value(s) -> str:
+    return str(s or "").strip().casefold()
+
+def _norm(s: pd.Series) -> pd.Series:
+    """_norm per value (schedule-only matching), computed once per distinct value."""
+    memo: dict = {}
+    out = [memo[v] if v in memo else memo.setdefault(v, _norm_value(v)) for v in s.tolist()]
+    return pd.Series(out, index=s.index, dtype=object)
+
+def _seg_pairs(seg_df: pd.DataFrame, normalize: bool) -> pd.DataFrame:
+    n = len(seg_df)
+    cols = {}
+    for c in PAIR:
+        s = seg_df[c] if c in seg_df.columns else pd.Series([None] * n, index=seg_df.index, dtype=object)
+        cols[c] = _norm(s.astype(str).fillna("")) if normalize else s  # as the notebook built seg_counts
+    out = pd.DataFrame(cols, index=seg_df.index)
+    return out if normalize else out.dropna()
+
+def _stock_pairs(stock_df: pd.DataFrame, normalize: bool) -> list[pd.Series]:
+    n = len(stock_df)
+    cols = []
+    for c in PAIR:
+        s = stock_df[c] if c in stock_df.columns else pd.Series([None] * n, index=stock_df.index, dtype=object)
+        cols.append(_norm(s) if normalize else s)
+    return cols
+
+def weight_by(seg_df: pd.DataFrame, column: str, table: dict, default: float = 1.0) -> pd.Series:
+    """Per-client weight looked up from `column` (lowercased) in `table`, e.g. a style or loyalty map."""
+    if column not in seg_df.columns:
+        return pd.Series(default, index=seg_df.index, dtype=float)
+    keys = seg_df[column].fillna("").astype(str).str.lower()
+    return keys.map({str(k).lower(): float(v) for k, v in table.items()}).fillna(default).astype(float)
+
+def loyalty_weights(seg_df: pd.DataFrame, table: dict | None = None) -> pd.Series:
+    """1 + the CPI loyalty bonus (bronze 1.0 … vip 1.75) unless another table is given."""
+    table = table or {k: 1.0 + v for k, v in LOYALTY_BONUS.items()}
+    return weight_by(seg_df, "loyalty_level", table)
+
+def segment_counts(seg_df: pd.DataFrame, normalize: bool = False, weights=None) -> pd.Series:
+    """(region_group, full_type) -> number of clients (or summed weight).
+
+    normalize=False matches values exactly and drops incomplete pairs (ignition match_score);
+    normalize=True compares str().strip().casefold() forms (schedule-only _segment_score).
+    weights: None, a seg_df column name, or a Series/array aligned to seg_df rows.
+    """
+    pairs = _seg_pairs(seg_df, normalize)
+    if weights is None:
+        return pairs.groupby(list(PAIR), sort=False, dropna=False).size()
+    w = seg_df[weights] if isinstance(weights, str) else pd.Series(np.asarray(weights, dtype=float), index=seg_df.index)
+    w = pd.to_numeric(w, errors="coerce").fillna(0.0).loc[pairs.index]
+    return w.groupby([pairs[c] for c in PAIR], sort=False, dropna=False).sum()
+
+class SegmentScorer:
+    """Stock pairs are factorized once; the segment side is a count per distinct stock pair, so
+    a changed client segment (set_segment / add / remove) re-scores with one array gather."""
+    def __init__(self, stock_df: pd.DataFrame, normalize: bool = False):
+        self.index = stock_df.index
+        self.normalize = normalize
+        rg, ft = _stock_pairs(stock_df, normalize)
+        valid = (rg.notna() & ft.notna()).to_numpy()
+        mi = pd.MultiIndex.from_arrays([rg, ft])
+        codes, uniq = pd.factorize(mi)
+        codes = np.where(valid, codes, -1)
+        self._codes = codes
+        self._pairs = pd.MultiIndex.from_tuples(list(uniq), names=list(PAIR)) if len(uniq) else None
+        self._counts = np.zeros(len(uniq) + 1, dtype=float)  # last slot: pairs that never match
+        self._weighted = False
+
+    def _gather(self, counts: pd.Series) -> np.ndarray:
+        if self._pairs is None or counts.empty:
+            return np.zeros(len(self._counts) - 1)
+        counts.index = counts.index.set_names(list(PAIR))
+        return counts.reindex(self._pairs).fillna(0).to_numpy(dtype=float)
+
+    def set_segment(self, seg_df: pd.DataFrame, weights=None) -> "SegmentScorer":
+        self._counts[:-1] = self._gather(segment_counts(seg_df, self.normalize, weights))
+        self._weighted = weights is not None
+        return self
+
+    def add(self, seg_df: pd.DataFrame, weights=None) -> "SegmentScorer":
+        """Clients joining the segment (incremental; no re-scan of the rest)."""
+        self._counts[:-1] += self._gather(segment_counts(seg_df, self.normalize, weights))
+        self._weighted |= weights is not None
+        return self
+
+    def remove(self, seg_df: pd.DataFrame, weights=None) -> "SegmentScorer":
+        self._counts[:-1] -= self._gather(segment_counts(seg_df, self.normalize, weights))
+        self._weighted |= weights is not None
+        return self
+
+    def scores(self) -> pd.Series:
+        out = self._counts[self._codes]  # -1 picks the zero slot
+        if not self._weighted:
+            return pd.Series(np.rint(out).astype(int), index=self.index, name="segment_score")
+        return pd.Series(out, index=self.index, name="segment_score")
+
+@hot()
+def segment_scores(stock_df: pd.DataFrame, seg_df: pd.DataFrame, normalize: bool = False, weights=None) -> pd.Series:
+    """segment_score per stock row: clients (or weight) in the row's (region_group, full_type)."""
+    return SegmentScorer(stock_df, normalize).set_segment(seg_df, weights).scores()
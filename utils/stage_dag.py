@@ -0,0 +1,192 @@
+# utils/stage_dag.py — skip notebook stages whose inputs, parameters and code are unchanged
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import NamedTuple
+import ast, hashlib, importlib.util, json, os, pickle
+
+STAGE_KEY = "avu_stage"  # code-cell metadata key
+LOCAL_PACKAGES = ("utils",)  # a stage also goes stale when the repo code it imports changes
+
+class StageSpec(NamedTuple):
+    """Declared in cell metadata, e.g.
+    {"avu_stage": {"name": "stock", "inputs": ["{SOURCE_PATH}/Detailed Stock List.xlsx"],
+                   "outputs": ["{OUTPUT_PATH}/stock_df_final.pkl"], "params": [], "frames": [],
+                   "restore": "stock_df = pd.read_pickle(OUTPUT_PATH / 'stock_df_final.pkl')"}}
+    inputs/outputs are path templates over notebook globals; params are globals hashed as JSON;
+    frames are in-memory DataFrames hashed by content; restore rebuilds what later cells read.
+    The utils/ modules the cell imports (and the ones they import) are hashed too, see code_deps."""
+    name: str
+    inputs: tuple = ()
+    outputs: tuple = ()
+    params: tuple = ()
+    frames: tuple = ()
+    restore: str = ""
+
+def stage_specs(nb: dict) -> dict[int, StageSpec]:
+    """Code-cell index -> spec, for cells that declare one."""
+    out = {}
+    code = [c for c in nb.get("cells", []) if c.get("cell_type") == "code"]
+    for i, c in enumerate(code):
+        meta = (c.get("metadata") or {}).get(STAGE_KEY)
+        if meta and meta.get("name"):
+            out[i] = StageSpec(meta["name"], tuple(meta.get("inputs", ())), tuple(meta.get("outputs", ())),
+                               tuple(meta.get("params", ())), tuple(meta.get("frames", ())),
+                               meta.get("restore") or "")
+    return out
+
+def _sha_file(path: Path, memo: dict) -> str:
+    try:
+        st = path.stat()
+    except OSError:
+        return "missing"
+    key = f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+    if key not in memo:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        memo[key] = h.hexdigest()
+    return memo[key]
+
+def _hash_value(v) -> str:
+    try:
+        import pandas as pd
+        if isinstance(v, pd.DataFrame):
+            h = hashlib.sha256(repr((list(v.columns), [str(t) for t in v.dtypes])).encode())
+            try:
+                h.update(pd.util.hash_pandas_object(v, index=True).to_numpy().tobytes())
+            except Exception:  # unhashable cells (lists, dicts)
+                h.update(pickle.dumps(v))
+            return h.hexdigest()
+    except ImportError:
+        pass
+    return hashlib.sha256(json.dumps(v, sort_keys=True, default=str).encode()).hexdigest()
+
+def _local_imports(source: str, top_level: bool = False) -> set[str]:
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return set()
+    out = set()
+    nodes = ast.walk(tree)
+    if top_level:  # a module's own imports, incl. try/if blocks, but not the lazy ones inside functions
+        nodes = [n for stmt in tree.body if not isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                 for n in ast.walk(stmt)]
+    for n in nodes:
+        if isinstance(n, ast.ImportFrom) and n.module and not n.level:
+            names = [n.module] + ([f"{n.module}.{a.name}" for a in n.names] if n.module in LOCAL_PACKAGES else [])
+        elif isinstance(n, ast.Import):
+            names = [a.name for a in n.names]
+        else:
+            continue
+        out.update(m for m in names if m.split(".")[0] in LOCAL_PACKAGES)
+    return out
+
+def _module_file(name: str) -> Path | None:
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    return Path(spec.origin) if spec and spec.origin and spec.origin.endswith(".py") else None
+
+def code_deps(source: str) -> dict[str, Path]:
+    """{module: file} of the local modules a cell imports, followed through their own imports."""
+    seen: dict[str, Path] = {}
+    todo = sorted(_local_imports(source))
+    while todo:
+        name = todo.pop()
+        path = _module_file(name) if name not in seen else None
+        if path is None:
+            continue
+        seen[name] = path
+        try:
+            todo += sorted(_local_imports(path.read_text(encoding="utf-8"), top_level=True) - seen.keys())
+        except OSError:
+            pass
+    return seen
+
+def _definitions(source: str) -> str:
+    """Top-level imports, defs and classes of a cell (a skipped stage still provides its helpers)."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return ""
+    keep = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef))]
+    return "\n".join(ast.get_source_segment(source, n) or "" for n in keep)
+
+class StageDAG:
+    """Per-notebook manifest of stage fingerprints under <OUTPUT_PATH>/.stages/."""
+    def __init__(self, notebook: str, specs: dict[int, StageSpec], force: bool | None = None):
+        self.notebook = Path(notebook).stem
+        self.specs = specs
+        self.force = os.getenv("AVU_STAGE_FORCE", "0") == "1" if force is None else force
+        self._root: Path | None = None
+        self._manifest: dict | None = None
+
+    def _resolve(self, template: str, ns: dict) -> Path:
+        return Path(template.format_map({k: v for k, v in ns.items() if isinstance(v, (str, Path, int))}))
+
+    def _load(self, ns: dict) -> dict:
+        if self._manifest is None:
+            self._root = Path(ns.get("OUTPUT_PATH") or ns.get("output_path") or ".") / ".stages"
+            try:
+                self._manifest = json.loads((self._root / f"{self.notebook}.json").read_text(encoding="utf-8"))
+            except Exception:
+                self._manifest = {}
+            self._manifest.setdefault("stages", {})
+            self._manifest.setdefault("files", {})
+        return self._manifest
+
+    def fingerprint(self, index: int, source: str, ns: dict) -> str:
+        spec, m = self.specs[index], self._load(ns)
+        h = hashlib.sha256(source.encode())
+        for t in spec.inputs:
+            h.update(f"in:{t}={_sha_file(self._resolve(t, ns), m['files'])}".encode())
+        for p in spec.params:
+            h.update(f"param:{p}={_hash_value(ns.get(p))}".encode())
+        for f in spec.frames:
+            h.update(f"frame:{f}={_hash_value(ns.get(f))}".encode())
+        for name, path in sorted(code_deps(source).items()):
+            h.update(f"code:{name}={_sha_file(path, m['files'])}".encode())
+        return h.hexdigest()
+
+    def should_skip(self, index: int, source: str, ns: dict) -> tuple[bool, str]:
+        spec = self.specs.get(index)
+        if spec is None:
+            return False, ""
+        fp = self.fingerprint(index, source, ns)
+        prev = self._load(ns)["stages"].get(spec.name)
+        if self.force or not prev or prev.get("fingerprint") != fp:
+            return False, fp
+        # outputs must still be the files this stage wrote
+        files = self._manifest["files"]
+        for t, sha in prev.get("outputs", {}).items():
+            if _sha_file(self._resolve(t, ns), files) != sha:
+                return False, fp
+        return True, fp
+
+    def restore(self, index: int, source: str, ns: dict):
+        code = _definitions(source) + "\n" + self.specs[index].restore
+        exec(compile(code, f"<restore {self.specs[index].name}>", "exec"), ns)
+
+    def record(self, index: int, fp: str, ns: dict, duration: float):
+        spec, m = self.specs[index], self._load(ns)
+        m["stages"][spec.name] = {
+            "fingerprint": fp,
+            "outputs": {t: _sha_file(self._resolve(t, ns), m["files"]) for t in spec.outputs},
+            "duration_sec": round(duration, 4),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def save(self):
+        if self._manifest is None or self._root is None:
+            return
+        latest: dict = {}  # keep only the newest hash memo per path
+        for k, v in self._manifest["files"].items():
+            latest[k.split("|")[0]] = (k, v)
+        self._manifest["files"] = dict(latest.values())
+        self._root.mkdir(parents=True, exist_ok=True)
+        tmp = self._root / f"{self.notebook}.json.tmp"
+        tmp.write_text(json.dumps(self._manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, self._root / f"{self.notebook}.json")
@@ -0,0 +1,164 @@
+# utils/ui_filters.py — AVU_schedule_only's hard UI filters on the stock frame (shared with benchmarks/)
+from __future__ import annotations
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.run_profile import hot
+
+def canon_tier_name(s) -> str:
+    t = str(s or "").strip().lower()
+    if not t: return ""
+    if "ultra" in t: return "Ultra Luxury"
+    if "luxury" in t: return "Luxury"
+    if "premium" in t: return "Premium"
+    if "mid" in t: return "Mid-range"
+    if "budget" in t or "entry" in t: return "Budget"
+    return ""
+
+def canon_tiers(seq) -> list[str]:
+    if not seq: return []
+    out = []
+    for x in seq:
+        n = canon_tier_name(x)
+        if n and n not in out:
+            out.append(n)
+    return out
+
+def week_to_season(week_no: int) -> str:
+    if 1 <= week_no <= 8 or 49 <= week_no <= 53: return "Winter"
+    if 9 <= week_no <= 22:  return "Spring"
+    if 23 <= week_no <= 35: return "Summer"
+    if 36 <= week_no <= 48: return "Autumn"
+    return "Unknown"
+
+def matches_wine_type_row(row, want) -> bool:
+    if not want:
+        return True
+    want = str(want).strip().lower()
+    full_type = str(row.get('full_type', '')).lower()
+    typ       = str(row.get('type', '')).lower()
+    color     = str(row.get('color', '')).lower()
+
+    # common intents: red / white / rosé / sparkling / sweet
+    if want in full_type or want in typ:
+        return True
+    if want in ("rose", "rosé") and ("rosé" in full_type or "rose" in full_type or "rosé" in typ or "rose" in typ):
+        return True
+    if want == "red" and "red" in color:
+        return True
+    if want == "white" and "white" in color:
+        return True
+    if want.startswith("spark") and ("sparkling" in full_type or "sparkling" in typ):
+        return True
+    if want.startswith("sweet") and ("sweet" in full_type or "sweet" in typ):
+        return True
+    return False
+
+def _to_ml(x):
+    try:
+        s = str(x).lower().strip().replace('ml','').replace('cl','')
+        v = float(s)
+        return int(round(v*10)) if v < 100 else int(round(v))
+    except Exception:
+        return np.nan
+
+@hot()
+def apply_ui_filters(stock_df: pd.DataFrame, ui_filters: dict, season: str, log=print, now=None) -> pd.DataFrame:
+    """The notebook's _apply_ui_filters; `season` is its _SELECTED_SEASON, `now` anchors the
+    last-year seasonality window (defaults to the current time, as in the notebook)."""
+    df = stock_df.copy()
+
+    # Ensure common columns exist / normalized
+    df.columns = df.columns.str.strip()
+    if 'price_tier' in df.columns:
+        df['price_tier'] = df['price_tier'].map(canon_tier_name)
+    else:
+        df['price_tier'] = ""
+
+    if 'stock' not in df.columns:
+        df['stock'] = 0
+    df['stock'] = pd.to_numeric(df['stock'], errors='coerce').fillna(0).astype(int)
+
+    # full_type if missing
+    if 'full_type' not in df.columns:
+        tcol = 'type' if 'type' in df.columns else None
+        ccol = 'color' if 'color' in df.columns else None
+        if tcol and ccol:
+            df['full_type'] = df[tcol].astype(str).str.title().str.strip() + " " + df[ccol].astype(str).str.title().str.strip()
+        elif tcol:
+            df['full_type'] = df[tcol].astype(str).str.title().str.strip()
+        else:
+            df['full_type'] = "Unknown"
+
+    # bottle size (prefer ml), parsed from 'size' or 'size_cl'
+    if 'bottle_size_ml' not in df.columns:
+        if 'size' in df.columns:
+            df['bottle_size_ml'] = df['size'].apply(_to_ml)
+        elif 'size_cl' in df.columns:
+            df['bottle_size_ml'] = df['size_cl'].apply(_to_ml)
+        else:
+            df['bottle_size_ml'] = np.nan
+
+    # ---- Apply filters (hard) ----
+    tiers = canon_tiers(ui_filters.get("price_tiers", []))
+    single_bucket = canon_tier_name(ui_filters.get("price_tier_bucket", ""))
+    if single_bucket and single_bucket not in tiers:
+        tiers = [single_bucket] + [t for t in tiers if t != single_bucket]
+    if tiers:
+        before = len(df)
+        df = df[df['price_tier'].isin(tiers)]
+        log(f"🎛️ price_tiers {tiers} → kept {len(df)}/{before}")
+
+    wt = ui_filters.get("wine_type")
+    if wt:
+        before = len(df)
+        df = df[df.apply(lambda r: matches_wine_type_row(r, wt), axis=1)]
+        log(f"🎛️ wine_type '{wt}' → kept {len(df)}/{before}")
+
+    # bottle size: treat UI value as a minimum (so 'bigger' works naturally)
+    bs = ui_filters.get("bottle_size")
+    if bs:
+        try:
+            bs = int(bs)
+            before = len(df)
+            df = df[df['bottle_size_ml'].fillna(0) >= bs]
+            log(f"🎛️ bottle_size ≥ {bs} ml → kept {len(df)}/{before}")
+        except Exception:
+            pass
+
+    if ui_filters.get("last_stock"):
+        raw_thr = ui_filters.get("last_stock_threshold", None)
+        try:
+            thr = int(raw_thr) if raw_thr is not None and str(raw_thr).strip() != "" else 10
+        except Exception:
+            thr = 10
+        before = len(df)
+        df = df[df['stock'] <= thr]
+        log(f"🎛️ last_stock ≤ {thr} → kept {len(df)}/{before}")
+
+    # seasonality: prefer explicit season tag, else fallback to “same week ±7d last year” using last offer date
+    if ui_filters.get("seasonality_boost", False):
+        before = len(df)
+        if 'seasonality_boost' in df.columns:
+            df = df[df['seasonality_boost'].apply(lambda x: season in x if isinstance(x, list) else False)]
+            log(f"🎛️ seasonality={season} (tag) → kept {len(df)}/{before}")
+        else:
+            date_col = None
+            for cand in ['OMT last offer date', 'most_recent_date', 'Schedule DateTime']:
+                if cand in df.columns:
+                    date_col = cand; break
+            if date_col:
+                df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+                last_year = (now or datetime.now()) - timedelta(days=365)
+                window_end = last_year + timedelta(days=7)
+                df = df[df[date_col].between(last_year, window_end)]
+            log(f"🎛️ seasonality={season} (date fallback) → kept {len(df)}/{before}")
+
+    # Always require some minimum availability for scheduling
+    before = len(df)
+    df = df[df['stock'] > 0]
+    log(f"📦 enforce in-stock (>0) → kept {len(df)}/{before}")
+
+    return df
@@ -0,0 +1,99 @@
+# utils/ui_state.py — write-behind store for the UI state files (filters, locks, selection):
+# requests update memory and return; a flusher writes each changed file at most once per interval
+from __future__ import annotations
+from pathlib import Path
+import atexit, json, multiprocessing, os, threading
+
+from utils.atomic_io import atomic_write
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _mtime(path: Path):
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+class UIStateStore:
+    """Latest value per file, held in memory. A burst of updates to one file becomes one write;
+    a value equal to what is already on disk is not written at all (no OneDrive sync churn)."""
+    def __init__(self, flush_interval: float = 1.0):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._io = threading.Lock()
+        self._pending: dict[Path, object] = {}
+        self._written: dict[Path, tuple] = {}  # path -> (body, mtime_ns) of our last write
+        self._stop = threading.Event()
+        self._th = None
+        self.stats = {"puts": 0, "writes": 0, "skipped": 0, "errors": 0}
+
+    def put(self, path, data):
+        with self._lock:
+            self._pending[Path(path)] = data
+            self.stats["puts"] += 1
+
+    def flush(self, *paths):
+        """Write pending files now — all of them, or just `paths`."""
+        with self._io:
+            with self._lock:
+                keys = [Path(p) for p in paths if Path(p) in self._pending] if paths else list(self._pending)
+                batch = {p: self._pending.pop(p) for p in keys}
+            for path, data in batch.items():
+                body = _dumps(data)
+                if self._written.get(path) == (body, _mtime(path)):
+                    self.stats["skipped"] += 1
+                    continue
+                try:
+                    atomic_write(path, body)
+                except OSError:  # e.g. OneDrive holding the file: retry next round unless superseded
+                    with self._lock:
+                        self._pending.setdefault(path, data)
+                    self.stats["errors"] += 1
+                    continue
+                self._written[path] = (body, _mtime(path))
+                self.stats["writes"] += 1
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def start(self):
+        if self._th and self._th.is_alive():
+            return
+        self._th = threading.Thread(target=self._loop, name="ui-state-flush", daemon=True)
+        self._th.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+_STORE: UIStateStore | None = None
+
+def start_ui_state_store(flush_interval: float | None = None) -> UIStateStore | None:
+    """Call once in the web process; elsewhere write_state writes through."""
+    global _STORE
+    if multiprocessing.parent_process() is not None:
+        return None
+    if _STORE is None:
+        _STORE = UIStateStore(flush_interval or float(os.getenv("AVU_UI_FLUSH_SEC", "1.0")))
+        _STORE.start()
+        atexit.register(_STORE.stop)
+    return _STORE
+
+def get_ui_state_store() -> UIStateStore | None:
+    return _STORE
+
+def write_state(path, data):
+    if _STORE is not None:
+        _STORE.put(path, data)
+        return
+    atomic_write(Path(path), _dumps(data))
+
+def flush_state(*paths):
+    """Before anything outside this process reads the files (notebook runs, batch jobs)."""
+    if _STORE is not None:
+        _STORE.flush(*paths)
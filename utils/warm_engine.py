@@ -0,0 +1,290 @@
+# utils/warm_engine.py — run notebook code cells in a long-lived worker (no kernel spawn per run)
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime, timezone
+from collections import OrderedDict, namedtuple
+import atexit, contextlib, io, json, multiprocessing as mp, os, threading, time, traceback
+
+from utils.run_profile import RssMeter, hot_report, reset_hot
+from utils.stage_dag import StageDAG, stage_specs
+
+Stage = namedtuple("Stage", "index name source")
+
+class WarmEngineError(RuntimeError):
+    pass
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+def _stage_name(src: str, index: int) -> str:
+    for line in src.splitlines():
+        s = line.strip().lstrip("#").strip(" -")
+        if s:
+            return s[:80]
+    return f"cell {index}"
+
+def notebook_stages(path) -> list[Stage]:
+    """Code cells of a notebook as ordered, named stages (the notebook stays the source of truth)."""
+    nb = json.loads(Path(path).read_text(encoding="utf-8"))
+    out = []
+    for i, c in enumerate(x for x in nb.get("cells", []) if x.get("cell_type") == "code"):
+        src = "".join(c.get("source", []))
+        out.append(Stage(i, _stage_name(src, i), src))
+    return out
+
+class _FrameCache:
+    """LRU of parsed frames keyed by (reader, path, size, mtime, kwargs); callers get copies."""
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def wrap(self, name: str, fn):
+        def reader(path, *args, **kwargs):
+            if not isinstance(path, (str, os.PathLike)) or args:
+                return fn(path, *args, **kwargs)
+            p = Path(path)
+            try:
+                st = p.stat()
+                key = (name, str(p.resolve()), st.st_size, st.st_mtime_ns, repr(sorted(kwargs.items())))
+            except Exception:
+                return fn(path, *args, **kwargs)
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return _copy(self._data[key])
+            self.misses += 1
+            obj = fn(path, **kwargs)
+            self._data[key] = obj
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return _copy(obj)
+        reader.__wrapped__ = fn
+        return reader
+
+def _copy(obj):
+    if isinstance(obj, dict):  # read_excel(sheet_name=None)
+        return {k: _copy(v) for k, v in obj.items()}
+    if hasattr(obj, "copy"):
+        try:
+            return obj.copy(deep=True)
+        except TypeError:
+            return obj.copy()
+    return obj
+
+class WarmEngine:
+    """Executes notebook stages in-process; imports and parsed frames survive between runs."""
+    READERS = ("read_pickle", "read_excel", "read_csv")
+
+    def __init__(self, max_cached_frames: int | None = None):
+        self.cache = _FrameCache(max_cached_frames or int(os.getenv("AVU_WARM_CACHE_ENTRIES", "16")))
+        self._compiled: dict = {}
+        import numpy, pandas  # noqa: F401  (warm the heavy imports once)
+
+    def _compile(self, path: Path, stage: Stage):
+        key = (str(path), stage.index, hash(stage.source))
+        code = self._compiled.get(key)
+        if code is None:
+            code = compile(stage.source, f"<{path.name}:cell {stage.index}>", "exec")
+            self._compiled[key] = code
+        return code
+
+    @contextlib.contextmanager
+    def _cached_readers(self):
+        import pandas as pd
+        orig = {n: getattr(pd, n) for n in self.READERS}
+        try:
+            for n, fn in orig.items():
+                setattr(pd, n, self.cache.wrap(n, fn))
+            yield
+        finally:
+            for n, fn in orig.items():
+                setattr(pd, n, fn)
+
+    def run(self, input_path, output_path, parameters: dict | None = None, on_stage=None,
+            stage_cache: bool | None = None) -> dict:
+        """Run every code cell with `parameters` as globals; write an executed copy like papermill.
+
+        Cells tagged with an `avu_stage` spec are skipped (and restored from their outputs) when
+        their fingerprint is unchanged; AVU_STAGE_CACHE=0 disables that, AVU_STAGE_FORCE=1 reruns all.
+        """
+        ip, op = Path(input_path), Path(output_path)
+        params = dict(parameters or {})
+        nb = json.loads(ip.read_text(encoding="utf-8"))
+        code_cells = [c for c in nb.get("cells", []) if c.get("cell_type") == "code"]
+        stages = notebook_stages(ip)
+        if stage_cache is None:
+            stage_cache = os.getenv("AVU_STAGE_CACHE", "1") != "0"
+        specs = stage_specs(nb) if stage_cache else {}
+        dag = StageDAG(ip.name, specs) if specs else None
+
+        ns = {"__name__": "__main__", "__file__": str(ip)}
+        ns.update(params)
+        try:
+            from IPython.display import display as _display
+        except Exception:
+            def _display(*objs, **_):
+                for o in objs:
+                    print(o)
+        ns.setdefault("display", _display)
+
+        started = time.perf_counter()
+        nb_start = _now_iso()
+        timings, error = [], None
+        reset_hot()  # hot functions tagged with utils.run_profile.hot, counted for this run only
+        with self._cached_readers(), RssMeter() as rss:
+            for stage, cell in zip(stages, code_cells):
+                buf = io.StringIO()
+                t0, c0 = time.perf_counter(), time.process_time()
+                cell_start = _now_iso()
+                status = "completed"
+                skip, fp = False, ""
+                if dag is not None and stage.index in dag.specs:
+                    try:
+                        skip, fp = dag.should_skip(stage.index, stage.source, ns)
+                    except Exception as e:
+                        print(f"[STAGE] fingerprint failed for cell {stage.index}: {e}")
+                try:
+                    with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+                        if skip:
+                            try:
+                                dag.restore(stage.index, stage.source, ns)
+                                status = "skipped"
+                                print(f"⏭️ Stage '{dag.specs[stage.index].name}' unchanged; restored from its outputs.")
+                            except Exception as e:
+                                print(f"[STAGE] restore failed ({e}); running the cell.")
+                        if status != "skipped":
+                            exec(self._compile(ip, stage), ns)
+                except BaseException as e:  # SystemExit from a cell must not take the worker down
+                    status = "failed"
+                    error = (stage, e, traceback.format_exc())
+                dur = time.perf_counter() - t0
+                if status == "completed" and fp:
+                    dag.record(stage.index, fp, ns, dur)
+                cell["execution_count"] = stage.index + 1
+                cell["outputs"] = []
+                if buf.getvalue():
+                    cell["outputs"].append({"name": "stdout", "output_type": "stream",
+                                            "text": buf.getvalue().splitlines(keepends=True)})
+                if status == "failed":
+                    cell["outputs"].append({"output_type": "error", "ename": type(error[1]).__name__,
+                                            "evalue": str(error[1]), "traceback": error[2].splitlines()})
+                cell.setdefault("metadata", {})["papermill"] = {
+                    "start_time": cell_start, "end_time": _now_iso(), "duration": dur,
+                    "exception": status == "failed", "status": status,
+                }
+                name = dag.specs[stage.index].name if dag is not None and stage.index in dag.specs else stage.name
+                timing = {"index": stage.index, "name": name, "status": status,
+                          "duration_sec": round(dur, 4), "cpu_sec": round(time.process_time() - c0, 4),
+                          "peak_rss_mb": rss.take()}
+                timings.append(timing)
+                if on_stage:
+                    on_stage(timing)
+                if status == "failed":
+                    break
+
+        if dag is not None:
+            try:
+                dag.save()
+            except Exception as e:
+                print(f"[STAGE] could not save stage manifest: {e}")
+        nb.setdefault("metadata", {})["papermill"] = {
+            "engine": "warm", "parameters": params, "input_path": str(ip), "output_path": str(op),
+            "start_time": nb_start, "end_time": _now_iso(), "duration": time.perf_counter() - started,
+            "exception": error is not None,
+        }
+        nb["metadata"]["avu_stages"] = timings  # which stages ran / were skipped, and their timings
+        op.parent.mkdir(parents=True, exist_ok=True)
+        tmp = op.with_suffix(op.suffix + ".tmp")
+        tmp.write_text(json.dumps(nb, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+        os.replace(tmp, op)
+
+        info = {"notebook": ip.name, "stages": timings, "duration_sec": round(time.perf_counter() - started, 4),
+                "cache": {"hits": self.cache.hits, "misses": self.cache.misses},
+                "hot": hot_report(), "peak_rss_mb": max((t["peak_rss_mb"] or 0 for t in timings), default=0) or None}
+        if error is not None:
+            stage, e, tb = error
+            raise WarmEngineError(f"{ip.name} failed in cell {stage.index} ({stage.name}): {type(e).__name__}: {e}\n{tb}")
+        return info
+
+# ---------------------------------------------------------------- worker process
+_ENGINE: WarmEngine | None = None
+
+def get_engine() -> WarmEngine:
+    """Per-process engine (used directly by long-lived pool workers)."""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = WarmEngine()
+    return _ENGINE
+
+def _worker_main(conn, cwd: str):
+    os.chdir(cwd)
+    engine = get_engine()
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:
+            return
+        ip, op, params, env = msg
+        try:
+            from utils.notebook_runner import _patched_env
+            with _patched_env(env):
+                conn.send(("ok", engine.run(ip, op, params)))
+        except BaseException as e:
+            conn.send(("error", str(e)))
+
+class WarmWorker:
+    """One spawned child that keeps a WarmEngine alive; runs are serialized through it."""
+    def __init__(self):
+        self._proc = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        if self._proc is not None and self._proc.is_alive():
+            return
+        ctx = mp.get_context("spawn")
+        parent, child = ctx.Pipe()
+        self._proc = ctx.Process(target=_worker_main, args=(child, os.getcwd()), name="avu-warm-engine")
+        self._proc.start()
+        self._conn = parent
+
+    def run(self, input_path, output_path, parameters: dict | None = None, env: dict | None = None) -> dict:
+        with self._lock:
+            self._ensure()
+            try:
+                self._conn.send((str(input_path), str(output_path), dict(parameters or {}), dict(env or {})))
+                status, payload = self._conn.recv()
+            except (EOFError, OSError) as e:
+                self._proc = None
+                raise WarmEngineError(f"warm engine worker died: {e}")
+            if status != "ok":
+                raise WarmEngineError(payload)
+            return payload
+
+    def stop(self):
+        with self._lock:
+            if self._proc is not None and self._proc.is_alive():
+                try:
+                    self._conn.send(None)
+                except Exception:
+                    pass
+                self._proc.join(timeout=5)
+                if self._proc.is_alive():
+                    self._proc.terminate()
+            self._proc = None
+
+_WORKER = WarmWorker()
+# multiprocessing.util registers its own exit hook (which joins children) on import; importing it
+# first makes ours run before it, so the worker is told to quit instead of being waited on forever
+import multiprocessing.util  # noqa: E402,F401
+atexit.register(lambda: _WORKER.stop())
+
+def run_warm(input_path, output_path, parameters: dict | None = None, env: dict | None = None) -> dict:
+    return _WORKER.run(input_path, output_path, parameters, env)
+
+def stop_worker():
+    _WORKER.stop()
@@ -0,0 +1,127 @@
+# utils/week_scheduler.py — presorted candidate pools + one pass over the week's slots
+from __future__ import annotations
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from utils.run_profile import hot
+
+ULTRA = "Ultra Luxury"
+
+class Step(NamedTuple):
+    """One relaxation level: which candidates (occasion_tier | tier | seasonal | any) and their sort."""
+    source: str
+    sort: tuple
+
+# AVU_schedule_only: each level tops up what the previous ones left open
+SCHEDULE_STEPS = (
+    Step("occasion_tier", ("segment_score", "stock")),
+    Step("tier", ("segment_score", "stock")),
+    Step("seasonal", ("segment_score", "stock")),
+    Step("any", ("stock", "segment_score")),
+)
+# AVU_ignition_1 get_seasonal_wines_modular: a level only runs when the previous ones found nothing
+IGNITION_STEPS = (
+    Step("occasion_tier", ("segment_score", "stock")),
+    Step("tier", ("segment_score", "stock")),
+    Step("seasonal", ("stock",)),
+    Step("any", ("stock",)),
+)
+
+def wine_key(wid, wine, vintage) -> str:
+    """id, else wine::vintage (same as the notebooks' _mk_key)."""
+    rid = str(wid or "").strip()
+    if rid:
+        return rid
+    return f"{str(wine or '').strip()}::{str(vintage or 'NV').strip()}"
+
+class WeekScheduler:
+    """Candidate lists per (occasion, tier) and per tier are built once, in every sort order a
+    step needs; filling a day then just walks those lists, skipping wines already used."""
+    def __init__(self, pool: pd.DataFrame, day_tiers: dict, day_occasion: dict, seasonal_mask=None):
+        self.pool = pool
+        self.day_tiers = {d: list(t) for d, t in day_tiers.items()}
+        self.day_occasion = dict(day_occasion)
+        n = len(self.pool)
+        col = lambda c: self.pool[c] if c in self.pool.columns else pd.Series([None] * n)
+        self.ids = col("id").astype(str).tolist()
+        self.keys = [wine_key(*r) for r in zip(col("id").tolist(), col("wine").tolist(), col("vintage").tolist())]
+        self.tiers = col("price_tier").tolist()
+        self.occasions = col("occasion").fillna("").astype(str).str.lower().to_numpy(dtype=object)
+        self.is_ultra = np.array([t == ULTRA for t in self.tiers], dtype=bool)
+        self.seasonal = (np.zeros(n, dtype=bool) if seasonal_mask is None
+                         else np.asarray(seasonal_mask, dtype=bool).reshape(-1))
+        self._rank: dict[tuple, np.ndarray] = {}
+        self._lists: dict[tuple, np.ndarray] = {}
+
+    def _order(self, sort: tuple) -> np.ndarray:
+        """Row positions sorted descending by `sort`, ties kept in pool order (a stable sort)."""
+        if sort not in self._rank:
+            if len(self.pool) == 0:
+                order = np.array([], dtype=int)
+            else:
+                cols = [pd.to_numeric(self.pool[c], errors="coerce").fillna(-np.inf).to_numpy() for c in sort]
+                order = np.lexsort([np.arange(len(self.pool))] + [-c for c in reversed(cols)])
+            rank = np.empty(len(order), dtype=int)
+            rank[order] = np.arange(len(order))
+            self._rank[sort] = rank
+        return self._rank[sort]
+
+    def candidates(self, step: Step, day: str) -> np.ndarray:
+        """Positions of the step's candidates for `day`, best first."""
+        tiers = tuple(self.day_tiers.get(day, ()))
+        occ = str(self.day_occasion.get(day, "")).lower()
+        key = (step, tiers, occ if step.source == "occasion_tier" else None)
+        if key not in self._lists:
+            if step.source == "occasion_tier":
+                mask = (self.occasions == occ) & np.isin(np.asarray(self.tiers, dtype=object), list(tiers))
+            elif step.source == "tier":
+                mask = np.isin(np.asarray(self.tiers, dtype=object), list(tiers))
+            elif step.source == "seasonal":
+                mask = self.seasonal
+            else:
+                mask = np.ones(len(self.pool), dtype=bool)
+            pos = np.flatnonzero(mask)
+            rank = self._order(step.sort)
+            self._lists[key] = pos[np.argsort(rank[pos], kind="stable")]
+        return self._lists[key]
+
+    @hot()
+    def plan(self, days, free: dict, steps=SCHEDULE_STEPS, top_up: bool = True, no_repeat: bool = True,
+             used_ids=(), used_keys=(), ultra_cap: int | None = None) -> dict[str, pd.DataFrame]:
+        """Picks per day (pool rows, in slot order) for `free[day]` open slots.
+
+        no_repeat: a wine (by id or key) is used at most once in the week, locked ones included.
+        ultra_cap: at most this many Ultra Luxury picks per week in the occasion/tier levels.
+        """
+        used_ids, used_keys = set(used_ids), set(used_keys)
+        ultra_used = 0
+        out = {}
+        for day in days:
+            need = int(free.get(day, 0) or 0)
+            picks: list[int] = []
+            taken: set[int] = set()
+            for step in steps:
+                if need <= 0 or len(picks) >= need or (picks and not top_up):
+                    break
+                capped = ultra_cap is not None and ultra_used >= ultra_cap and step.source in ("occasion_tier", "tier")
+                for p in self.candidates(step, day):
+                    if p in taken or (capped and self.is_ultra[p]):
+                        continue
+                    if no_repeat and (self.ids[p] in used_ids or self.keys[p] in used_keys):
+                        continue
+                    picks.append(p)
+                    taken.add(p)
+                    if len(picks) >= need:
+                        break
+            if no_repeat:
+                for p in picks:
+                    rid = self.ids[p].strip()
+                    if rid:
+                        used_ids.add(rid)
+                    used_keys.add(self.keys[p])
+            if ultra_cap is not None and picks:
+                ultra_used = min(ultra_cap, ultra_used + int(self.is_ultra[picks].sum()))
+            out[day] = self.pool.iloc[picks]
+        return out
@@ -0,0 +1,255 @@
+# utils/week_style.py — the schedule's style pass (AVU_schedule_only cells 6 and 7): per-style day tier
+# preferences, the weekly Ultra Luxury cap and the nigo region spread, then the strict re-fill
+from __future__ import annotations
+from datetime import datetime
+
+ALL_TIERS = ["Budget", "Mid-range", "Premium", "Luxury", "Ultra Luxury"]
+ULTRA = "Ultra Luxury"
+DAY_TIER_PREF = {
+    "cat": {
+        "Monday": ["Mid-range", "Premium"], "Tuesday": ["Premium", "Luxury"],
+        "Wednesday": ["Premium", "Luxury"], "Thursday": ["Premium", "Luxury", "Ultra Luxury"],
+        "Friday": ["Luxury", "Ultra Luxury"], "Saturday": ["Luxury", "Ultra Luxury"],
+        "Sunday": ["Mid-range", "Premium"],
+    },
+    "nigo": {
+        "Monday": ["Budget", "Mid-range"], "Tuesday": ["Mid-range", "Premium"],
+        "Wednesday": ["Premium"], "Thursday": ["Premium"],
+        "Friday": ["Premium", "Luxury"], "Saturday": ["Premium", "Luxury"],
+        "Sunday": ["Budget", "Mid-range", "Premium"],
+    },
+}
+COOLDOWN_DAYS = {"cat": 7, "nigo": 35, "default": 21}
+MAX_ULTRA = {"cat": 3, "nigo": 1, "default": 2}
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+NUM_SLOTS = 5
+
+def style_of(style) -> str:
+    """"cat" / "nigo"; anything else schedules as "default"."""
+    s = str(style or "").strip().lower()
+    return s if s in ("cat", "nigo") else "default"
+
+def day_tier_pref(style, day: str) -> list[str]:
+    pref = DAY_TIER_PREF.get(style_of(style))
+    return ALL_TIERS if pref is None else pref.get(day, [])
+
+def _val(*candidates, default=None):
+    return next((c for c in candidates if c is not None and c != ""), default)
+
+def price_tier_of(it: dict) -> str:
+    return _val(it.get("price_tier_bucket"), it.get("price_bucket"), it.get("price_category"),
+                it.get("price_tier"), it.get("priceTier"), it.get("tier"), default="")
+
+def stock_of(it: dict) -> int | None:
+    try:
+        return int(_val(it.get("stock"), it.get("stock_count"), it.get("qty"), it.get("quantity")))
+    except Exception:
+        return None
+
+def is_ultra(it: dict) -> bool:
+    return (price_tier_of(it) or "").strip() == ULTRA
+
+def item_key(it: dict) -> str:
+    return (str(it.get("id") or "").strip()
+            or f"{(it.get('wine') or '').strip()}::{(it.get('vintage') or 'NV').strip()}")
+
+def ultra_cap(style, locked: dict | None = None, days=DAYS, num_slots: int = NUM_SLOTS) -> int:
+    """Ultra Luxury picks the week can still take once its locked Ultra slots are counted."""
+    n = sum(1 for d in days for it in ((locked or {}).get(d) or [])[:num_slots] if it and is_ultra(it))
+    return max(0, MAX_ULTRA[style_of(style)] - n)
+
+def last_campaign_dt(it: dict, history: dict) -> datetime | None:
+    """History entries are either {"last_campaign_date": iso} (HISTORY_MAP) or the iso string."""
+    h = history.get(item_key(it))
+    iso = (h.get("last_campaign_date") if isinstance(h, dict) else h) or it.get("last_campaign_date") or ""
+    try:
+        return datetime.fromisoformat(iso) if iso else None
+    except Exception:
+        return None
+
+def matches_filters(it: dict, f: dict) -> bool:
+    """Cell 6's filter: last_stock, the single price_tier_bucket and a broad wine_type match."""
+    if f.get("last_stock"):
+        st = stock_of(it)
+        if st is None or not st <= int(f.get("last_stock_threshold") or 10):
+            return False
+    ptb = (f.get("price_tier_bucket") or "").strip()
+    if ptb and price_tier_of(it) != ptb:
+        return False
+    wt = f.get("wine_type")
+    if wt:
+        want, s = str(wt).lower(), (it.get("full_type") or it.get("type") or "").lower()
+        name = (it.get("wine") or it.get("name") or "").lower()
+        if not (want in s
+                or (want == "rosé" and ("rose" in s or "rosé" in s))
+                or (want == "rose" and ("rosé" in s or "rose" in s))
+                or (want == "red" and ("red" in s or "bordeaux" in name))
+                or (want == "sparkling" and any(k in s for k in ["spark", "champ", "cava", "prosecco", "spumante"]))):
+            return False
+    return True
+
+def _placed(it: dict, quality: str, tier: str, stock, locked: bool) -> dict:
+    return {
+        "id": it.get("id") or "", "wine": it.get("wine") or it.get("name") or "Unknown",
+        "vintage": it.get("vintage") or "NV", "full_type": it.get("full_type") or it.get("type") or "",
+        "region_group": it.get("region_group") or "", "price_tier": tier, "stock": stock,
+        "match_quality": it.get("match_quality") or quality, "avg_cpi_score": it.get("avg_cpi_score") or 0,
+        "locked": locked, "last_campaign_date": it.get("last_campaign_date") or "",
+    }
+
+def _blocked(it: dict, blocked_ids, blocked_keys) -> bool:
+    kid, key = str(it.get("id") or "").strip(), item_key(it)
+    return bool((kid and kid in blocked_ids) or (key and key in blocked_keys))
+
+def style_fill(base_week: dict, locked: dict | None, filters: dict, history: dict | None = None,
+               blocked_ids=(), blocked_keys=(), days=DAYS, num_slots: int = NUM_SLOTS, now=None) -> dict:
+    """Cell 6: lay the locks, then fill each open slot with the best-scoring base-week wine for the
+    day — CPI, stock and tier by style, the day's preferred tiers, a recency penalty within the
+    style's cooldown, at most MAX_ULTRA Ultra Luxury wines a week (locks included) and, for nigo,
+    a penalty on the third and later wine of a region. Returns {day: [item | None] * num_slots}."""
+    style, history, now = style_of(filters.get("style")), history or {}, now or datetime.now()
+    cat, nigo = style == "cat", style == "nigo"
+    cool, cap = COOLDOWN_DAYS[style], MAX_ULTRA[style]
+    blocked_ids, blocked_keys = set(blocked_ids), set(blocked_keys)
+
+    def base_score(it):
+        base = 0.0
+        mq = str(it.get("match_quality") or "").lower()
+        if "exact" in mq: base += 3.0
+        elif "high" in mq: base += 2.0
+        elif "history" in mq: base += 0.8
+        try:
+            base += 0.5 * float(it.get("avg_cpi_score") or 0)
+        except Exception:
+            pass
+        base += (1.4 if cat else 0.3) * max(0.0, min(1.0, (stock_of(it) or 0) / 150))
+        tier = price_tier_of(it)
+        if cat:
+            base += {"Luxury": 0.6, "Ultra Luxury": 0.6, "Premium": 0.4, "Mid-range": 0.2}.get(tier, 0.0)
+        elif nigo:
+            base += {"Premium": 0.5, "Luxury": 0.2, "Ultra Luxury": -0.3, "Budget": 0.1}.get(tier, 0.0)
+        dt = last_campaign_dt(it, history)
+        if dt:
+            age = max(0, (now - dt).days)
+            base -= max(0.0, (1.8 if nigo else (0.6 if cat else 1.0)) * (1.0 - min(age, cool) / cool))
+        return base
+
+    def day_score(it, day, regions):
+        s = (0.35 if cat else 0.45) if price_tier_of(it) in day_tier_pref(style, day) else 0.0
+        reg = str(it.get("region_group") or "").strip().lower()
+        if nigo and reg and regions.get(reg, 0) >= 2:
+            s -= 0.4 + 0.2 * (regions[reg] - 2)
+        return s
+
+    out = {d: [None] * num_slots for d in days}
+    used, ultra, regions = set(), 0, {}
+
+    def take(day, slot, item):
+        nonlocal ultra
+        out[day][slot] = item
+        used.add(item_key(item))
+        ultra += is_ultra(item)
+        reg = str(item.get("region_group") or "").strip().lower()
+        if reg:
+            regions[reg] = regions.get(reg, 0) + 1
+
+    for day in days:
+        for idx, it in enumerate(((locked or {}).get(day) or [])[:num_slots]):
+            if it:
+                take(day, idx, _placed(it, "Locked", price_tier_of(it) or "", stock_of(it), True))
+    pool = [it for d in days for it in base_week.get(d, [])
+            if matches_filters(it, filters) and not _blocked(it, blocked_ids, blocked_keys) and item_key(it) not in used]
+    for day in days:
+        for slot in range(num_slots):
+            if out[day][slot] is not None:
+                continue
+            best_i, best = None, -1e9
+            for i, it in enumerate(pool):
+                if is_ultra(it) and ultra >= cap:
+                    continue
+                s = base_score(it) + day_score(it, day, regions)
+                if s > best:
+                    best_i, best = i, s
+            if best_i is None:
+                break
+            it = pool.pop(best_i)
+            take(day, slot, _placed(it, "Auto", price_tier_of(it), stock_of(it), bool(it.get("locked", False))))
+    return out
+
+def _tier(it: dict) -> str:
+    return (it.get("price_tier") or it.get("price_tier_bucket") or "").strip()
+
+def _stock(it: dict) -> int:
+    try:
+        return int(float(it.get("stock", 0)))
+    except Exception:
+        return 0
+
+def _strict_match(it: dict, f: dict) -> bool:
+    pts = set(f.get("price_tiers") or [])
+    if (f.get("price_tier_bucket") or "").strip():
+        pts.add(f["price_tier_bucket"].strip())
+    if pts and _tier(it) not in pts:
+        return False
+    wt = (f.get("wine_type") or "").strip().lower()
+    if wt and wt not in (it.get("full_type") or it.get("type") or "").lower():
+        return False
+    if f.get("last_stock"):
+        return 0 < _stock(it) <= int(f.get("last_stock_threshold") or 10)
+    return _stock(it) >= 6
+
+def strict_fill(base_week: dict, locked: dict | None, filters: dict, history: dict | None = None,
+                blocked_ids=(), blocked_keys=(), days=DAYS, num_slots: int = NUM_SLOTS, now=None) -> dict:
+    """Cell 7: re-place the style pass's wines (strictly from `base_week`, after filters and blocks)
+    around the locks, each slot taking the best by CPI, the day's preferred tiers, recency and stock."""
+    style, history, now = style_of(filters.get("style")), history or {}, now or datetime.now()
+    cool = COOLDOWN_DAYS[style]
+    blocked_ids, blocked_keys = set(blocked_ids), set(blocked_keys)
+
+    def score(it, day):
+        base = float(it.get("avg_cpi_score") or 0) * 0.5
+        if _tier(it) in day_tier_pref(style, day):
+            base += 0.4
+        dt = last_campaign_dt(it, history)
+        if dt:
+            age = max(0, (now - dt).days)
+            base -= max(0.0, (1.2 if style == "nigo" else 0.6) * (1.0 - min(age, cool) / cool))
+        return base + (1.2 if style == "cat" else 0.3) * min(1.0, _stock(it) / 150.0)
+
+    pool = [it for d in days for it in base_week.get(d, [])
+            if _strict_match(it, filters) and not _blocked(it, blocked_ids, blocked_keys)]
+    out = {d: [None] * num_slots for d in days}
+    used = set()
+    for day in days:
+        for idx, it in enumerate(((locked or {}).get(day) or [])[:num_slots]):
+            if it:
+                out[day][idx] = _placed(it, "Locked", _tier(it), _stock(it), True)
+                used.add(item_key(out[day][idx]))
+    for day in days:
+        for slot in range(num_slots):
+            if out[day][slot] is not None:
+                continue
+            best_i, best = None, -1e9
+            for i, it in enumerate(pool):
+                if item_key(it) in used:
+                    continue
+                sc = score(it, day)
+                if sc > best:
+                    best_i, best = i, sc
+            if best_i is None:
+                break
+            it = pool.pop(best_i)
+            out[day][slot] = _placed(it, "Auto", _tier(it), _stock(it), bool(it.get("locked", False)))
+            used.add(item_key(out[day][slot]))
+    return out
+
+def flat_week(slots: dict, days=DAYS) -> dict:
+    """{day: [item, ...]} without the empty slots (the API file's shape)."""
+    return {d: [x for x in (slots.get(d) or []) if x is not None] for d in days}
+
+def style_pass(base_week: dict, locked: dict | None, filters: dict, history: dict | None = None,
+               blocked_ids=(), blocked_keys=(), days=DAYS, num_slots: int = NUM_SLOTS, now=None) -> dict:
+    """Both passes, as a single-week schedule-only run applies them to its candidate week."""
+    kw = dict(blocked_ids=blocked_ids, blocked_keys=blocked_keys, days=days, num_slots=num_slots, now=now)
+    first = style_fill(base_week, locked, filters, history, **kw)
+    return strict_fill(flat_week(first, days), locked, filters, history, **kw)
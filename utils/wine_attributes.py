@@ -0,0 +1,243 @@
+# utils/wine_attributes.py — stock trait inference (grapes, type class, body, sweetness, size, occasion)
+# as column-wise regex rules over distinct inputs, memoized on disk across runs
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+import hashlib, json, os, re, threading
+
+import numpy as np
+import pandas as pd
+
+from utils.run_profile import hot
+
+try:
+    from unidecode import unidecode
+except Exception:  # same fallback as the ignition notebook
+    import unicodedata
+    def unidecode(x):
+        return unicodedata.normalize("NFKD", str(x)).encode("ascii", "ignore").decode("ascii")
+
+# keyword -> grape; matched as substrings of " {wine} {producer} {origin} " (padded keys are whole words)
+GRAPE_KEYWORDS = {
+    'nebbiolo':'Nebbiolo','tempranillo':'Tempranillo','cabernet sauvignon':'Cabernet Sauvignon',
+    ' cabernet ':'Cabernet Sauvignon',' cab ':'Cabernet Sauvignon','merlot':'Merlot',
+    'pinot noir':'Pinot Noir',' pinot ':'Pinot Noir','sangiovese':'Sangiovese','syrah':'Syrah',
+    'shiraz':'Syrah','grenache':'Grenache','chardonnay':'Chardonnay',' chard ':'Chardonnay',
+    'riesling':'Riesling','sauvignon blanc':'Sauvignon Blanc',' sauvignon ':'Sauvignon Blanc',
+    ' sauv ':'Sauvignon Blanc','zinfandel':'Zinfandel','primitivo':'Primitivo','malbec':'Malbec',
+    'grigio':'Pinot Grigio','garganega':'Garganega',"nero d avola":"Nero d'Avola",'barbera':'Barbera',
+    'carmenere':'Carmenère','trebbiano':'Trebbiano','vermentino':'Vermentino','teroldego':'Teroldego'
+}
+# first matching rule wins; tested on unidecoded "{type} {color}"
+TYPE_CLASS_RULES = (
+    ("Sparkling", ("sparkling", "champagne", "cava", "prosecco")),
+    ("Dessert", ("dessert", "sweet", "sauternes", "porto")),
+    ("Rose", ("rose", "rosé")),
+    ("White", ("white", "blanc", "bianco")),
+    ("Red", ("red", "rouge", "rosso")),
+)
+BLEND_RULES = (("Red Blend", ("red",)), ("White Blend", ("white",)),
+               ("Sparkling Blend", ("sparkling",)), ("Rosé Blend", ("rose", "rosé")))
+VINTAGE_LABELS = {
+    "client": {"nv": "Non-Vintage Lover", "current": "Likes Current Vintage", "primeur": "Likes En Primeur",
+               "young": "Likes Young Wines", "mature": "Likes Mature Wines", "old": "Likes Old Wines"},
+    "powerbi": {"nv": "Non-Vintage", "current": "Current Vintage", "primeur": "En Primeur",
+                "young": "Young Wines", "mature": "Mature Wines", "old": "Old Wines"},
+}
+
+KEY_COLS = ("wine", "producer", "origin", "type", "color", "size")
+ATTR_COLS = ("type_class", "bottle_size_ml", "grape_list", "body", "sweetness")
+RULES_VERSION = hashlib.sha256(
+    json.dumps([GRAPE_KEYWORDS, TYPE_CLASS_RULES, BLEND_RULES, "size-v1"], ensure_ascii=False).encode()
+).hexdigest()[:12]
+CACHE_FILE = "wine_attributes.pkl"
+# memo entries whose inputs no run has seen for this long are dropped (sold-out / renamed wines)
+MEMO_MAX_AGE_DAYS = int(os.getenv("AVU_ATTR_CACHE_DAYS", "90"))
+_LOCK = threading.Lock()
+
+def _alt(words) -> str:
+    return "|".join(re.escape(w) for w in words)
+
+def _grape_patterns() -> dict[str, re.Pattern]:
+    """One compiled alternation per grape (all keywords that map to it)."""
+    by_grape: dict[str, list] = {}
+    for k, g in GRAPE_KEYWORDS.items():
+        by_grape.setdefault(g, []).append(k)
+    return {g: re.compile(_alt(ks)) for g, ks in by_grape.items()}
+
+_GRAPE_PATTERNS = _grape_patterns()
+
+def _text(df: pd.DataFrame, col: str) -> pd.Series:
+    """str(value) per row, as row.get(col, "") saw it in the apply (NaN -> "nan")."""
+    if col not in df.columns:
+        return pd.Series([""] * len(df), index=df.index, dtype=object)
+    return pd.Series([str(v) for v in df[col].tolist()], index=df.index, dtype=object)
+
+def _fold(s: pd.Series) -> pd.Series:
+    memo: dict = {}
+    return pd.Series([memo[v] if v in memo else memo.setdefault(v, unidecode(v.lower().strip())) for v in s.tolist()],
+                     index=s.index, dtype=object)
+
+def _has(s: pd.Series, words) -> np.ndarray:
+    return s.str.contains(_alt(words), regex=True).to_numpy(dtype=bool)
+
+def parse_bottle_size_ml(val):
+    """'75cl' / '0.75 l' / '750ml' / 'Magnum' -> ml (NaN when unparseable)."""
+    s = unidecode(str(val)).lower().strip()
+    if not s or s == "nan": return np.nan
+    if "jeroboam" in s: return 3000
+    if "magnum" in s:   return 1500
+    s = s.replace("lt", "l")
+    if "l" in s and "ml" not in s and "cl" not in s:
+        num = re.sub(r"[^\d\.]", "", s)
+        try: return int(float(num) * 1000)
+        except Exception: return np.nan
+    s = s.replace("cl","").replace("ml","").strip()
+    s = re.sub(r"[^\d\.]", "", s)
+    try:
+        num = float(s)
+        return int(num * 10) if num < 100 else int(num)
+    except Exception:
+        return np.nan
+
+def _keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalized rule inputs: folded name/producer/origin, lowercased type/color, raw size text."""
+    wine, prod, orig = (_fold(_text(df, c)) for c in ("wine", "producer", "origin"))
+    return pd.DataFrame({"wine": wine, "producer": prod, "origin": orig,
+                         "type": _text(df, "type").str.lower(), "color": _text(df, "color").str.lower(),
+                         "size": _text(df, "size")}, index=df.index)
+
+def _infer(keys: pd.DataFrame) -> pd.DataFrame:
+    """Rules applied column-wise to distinct key rows."""
+    out = keys.copy()
+    t_fold, c_fold = _fold(keys["type"]), _fold(keys["color"])
+    txt = t_fold + " " + c_fold
+    conds = [_has(txt, words) for _, words in TYPE_CLASS_RULES]
+    out["type_class"] = np.select(conds, [label for label, _ in TYPE_CLASS_RULES], default="Red")
+
+    sizes = {v: parse_bottle_size_ml(v) for v in pd.unique(keys["size"])}
+    out["bottle_size_ml"] = keys["size"].map(sizes).astype(float)
+
+    padded = " " + keys["wine"] + " " + keys["producer"] + " " + keys["origin"] + " "
+    hits = pd.DataFrame({g: padded.str.contains(p) for g, p in _GRAPE_PATTERNS.items()}, index=keys.index)
+    names = np.array(sorted(hits.columns))
+    mat = hits[list(names)].to_numpy(dtype=bool)
+    blend_t = keys["type"].map(unidecode)  # legacy: unidecode(str(type)).lower()
+    blend = np.select([_has(blend_t, w) for _, w in BLEND_RULES], [b for b, _ in BLEND_RULES], default="Unknown")
+    out["grape_list"] = ["/".join(names[row]) if row.any() else b for row, b in zip(mat, blend)]
+
+    t, c = keys["type"], keys["color"]
+    out["body"] = np.select([_has(t, ["sparkling"]), _has(c, ["red"]), _has(c, ["white", "ros"])], [2, 4, 2], default=3)
+    out["sweetness"] = np.select([_has(t, ["brut", "dry"]), _has(t, ["sweet"]), _has(t, ["medium"])], [1, 5, 3], default=3)
+    return out
+
+def _default_dir() -> Path:
+    env = os.getenv("AVU_ATTR_CACHE_DIR")
+    if env:
+        return Path(env)
+    from config import Settings
+    return Settings.IRON_DATA_PATH / "attr_cache"
+
+def _load_cache(root: Path) -> pd.DataFrame | None:
+    try:
+        cached = pd.read_pickle(root / CACHE_FILE)
+    except Exception:
+        return None
+    if cached.attrs.get("rules_version") != RULES_VERSION:
+        return None
+    return cached
+
+def _save_cache(root: Path, frame: pd.DataFrame):
+    root.mkdir(parents=True, exist_ok=True)
+    frame.attrs["rules_version"] = RULES_VERSION
+    tmp = root / (CACHE_FILE + ".tmp")
+    frame.to_pickle(tmp)
+    os.replace(tmp, root / CACHE_FILE)
+
+STATS = {"rows": 0, "distinct": 0, "inferred": 0, "pruned": 0}
+
+def _touch_and_prune(memo: pd.DataFrame, distinct: pd.DataFrame, today: pd.Timestamp) -> tuple[pd.DataFrame, bool]:
+    """Stamp last_seen (day resolution) on the entries this run used; drop the ones unseen for
+    MEMO_MAX_AGE_DAYS. Returns (memo, changed) — unchanged on every run after the first of a day."""
+    seen = memo[list(KEY_COLS)].merge(distinct, on=list(KEY_COLS), how="left", indicator=True)["_merge"].eq("both").to_numpy()
+    old = pd.to_datetime(memo["last_seen"]) if "last_seen" in memo.columns else pd.Series(pd.NaT, index=memo.index)
+    last = old.where(~seen, today).fillna(today)  # entries from before last_seen existed start their clock now
+    keep = (last >= today - pd.Timedelta(days=MEMO_MAX_AGE_DAYS)).to_numpy()
+    changed = bool((~keep).any() or (last != old).any())
+    memo = memo.assign(last_seen=last)[keep].reset_index(drop=True)
+    return memo, changed
+
+@hot()
+def infer_attributes(df: pd.DataFrame, cache_dir=None, use_cache: bool | None = None) -> pd.DataFrame:
+    """type_class, bottle_size_ml, grape_list, body, sweetness per row of `df` (same index).
+
+    Rows are reduced to distinct normalized inputs; those already in the on-disk memo
+    (<cache_dir>/wine_attributes.pkl, dropped when the rules change) are not re-inferred.
+    Memo entries no run has asked for in MEMO_MAX_AGE_DAYS are pruned, so it tracks the stock.
+    AVU_ATTR_CACHE=0 (or use_cache=False) keeps everything in memory.
+    """
+    use_cache = os.getenv("AVU_ATTR_CACHE", "1") != "0" if use_cache is None else use_cache
+    keys = _keys(df)
+    distinct = keys.drop_duplicates().reset_index(drop=True)
+    root = (Path(cache_dir) if cache_dir is not None else _default_dir()) if use_cache else None
+
+    pruned = 0
+    with _LOCK:
+        cached = _load_cache(root) if root is not None else None
+        if cached is not None and len(cached):
+            known = distinct.merge(cached[list(KEY_COLS)], on=list(KEY_COLS), how="left", indicator=True)
+            todo = distinct[(known["_merge"] == "left_only").to_numpy()]
+        else:
+            cached, todo = None, distinct
+        if cached is None:
+            memo = _infer(todo)
+        elif len(todo):
+            memo = pd.concat([cached, _infer(todo)], ignore_index=True)
+            memo = memo.drop_duplicates(subset=list(KEY_COLS), keep="last").reset_index(drop=True)
+        else:
+            memo = cached
+        if root is not None:
+            size = len(memo)
+            memo, changed = _touch_and_prune(memo, distinct, pd.Timestamp(datetime.now().date()))
+            pruned = size - len(memo)
+            if changed or len(todo):
+                _save_cache(root, memo)
+    STATS.update(rows=len(df), distinct=len(distinct), inferred=len(todo), pruned=pruned)
+
+    out = keys.merge(memo, on=list(KEY_COLS), how="left")[list(ATTR_COLS)]
+    out.index = df.index
+    out["bottle_size_ml"] = out["bottle_size_ml"].astype(float)
+    out["body"] = out["body"].astype(int)
+    out["sweetness"] = out["sweetness"].astype(int)
+    return out
+
+def infer_occasion(price_tier: pd.Series, wine_type: pd.Series) -> np.ndarray:
+    """Stock occasion: Gifting for (Ultra) Luxury, Celebration for sparkling/rosé, Dinner, else Casual."""
+    t = pd.Series([str(v).lower() for v in wine_type.tolist()], index=wine_type.index, dtype=object)
+    tier = price_tier.astype(object)
+    return np.select([tier.isin(["Luxury", "Ultra Luxury"]).to_numpy(), _has(t, ["sparkling", "ros"]),
+                      tier.isin(["Mid-range", "Premium"]).to_numpy()],
+                     ["Gifting", "Celebration", "Dinner"], default="Casual")
+
+def classify_vintage_groups(vintages: pd.Series, labels: str = "client", year: int | None = None) -> pd.Series:
+    """Vintage year -> age bucket label, computed once per distinct value."""
+    lab = VINTAGE_LABELS[labels]
+    cy = year or datetime.now().year
+
+    def one(v):
+        try:
+            s = str(v).strip().upper()
+            if s == "NV": return lab["nv"]
+            y = int(s)
+            if y == cy: return lab["current"]
+            if y == cy - 1: return lab["primeur"]
+            if cy - y <= 3: return lab["young"]
+            if cy - y <= 8: return lab["mature"]
+            if cy - y > 15: return lab["old"]
+            return "Unknown"
+        except Exception:
+            return "Unknown"
+
+    memo: dict = {}
+    return pd.Series([memo[v] if v in memo else memo.setdefault(v, one(v)) for v in vintages.tolist()],
+                     index=vintages.index, dtype=object)